@@ -1,12 +1,54 @@
-from utils.mask_bits import mask_bits
-from utils.sign_extend import sign_extend, get_bit_size
+from classes.ALUOperation import ALUOperation
 from utils.unsigned import unsigned
 
+MASK_32 = 0xFFFFFFFF
+
+
+def sra(a, b):
+    """
+    Arithmetic shift right of a 32-bit number, the shift amount is b[4:0].
+
+    :param a: value to shift
+    :type a: int
+    :param b: shift amount
+    :type b: int
+    :return: the result of the operation as a 32-bit number
+    :rtype: int
+    """
+    return ((((a & MASK_32) ^ 0x80000000) - 0x80000000) >> (b & 0x1F)) & MASK_32
+
+
+# Operation -> function performing it, every result is a 32-bit number
+FUNCTIONS = {
+    ALUOperation.ADD: lambda a, b: (a + b) & MASK_32,
+    ALUOperation.SUB: lambda a, b: (a - b) & MASK_32,
+    ALUOperation.AND: lambda a, b: a & b & MASK_32,
+    ALUOperation.OR: lambda a, b: (a | b) & MASK_32,
+    ALUOperation.XOR: lambda a, b: (a ^ b) & MASK_32,
+    ALUOperation.SLL: lambda a, b: (a << b) & MASK_32,
+    ALUOperation.SRL: lambda a, b: (a >> b) & MASK_32,
+    ALUOperation.SRA: sra,
+    ALUOperation.SLT: lambda a, b: int(a < b),
+    ALUOperation.SLTU: lambda a, b: int(unsigned(a) < unsigned(b)),
+    ALUOperation.MUL: lambda a, b: (a * b) & MASK_32,
+    ALUOperation.DIV: lambda a, b: (a // b) & MASK_32,
+    ALUOperation.NOT: lambda a, b: ~a & MASK_32,
+}
+
+# Functions indexed by the value of the operation
+OPERATIONS = tuple(FUNCTIONS[operation] for operation in ALUOperation)
+
 
 class ALU:
     """
     The ALU class represents the arithmetic logic unit (ALU) of a RISC-V processor model. It gets two inputs,
     a selection value, perform an operation an returns an output.
+
+    As a combinational block, the output only changes when the inputs or the selection change: operate() computes it
+    once and returns the same output until pass_inputs() or set_select() is called again.
+
+        evaluations (int) - number of times the output was computed
+        evaluations_avoided (int) - number of calls to operate() that returned the output already computed
     """
 
     def __init__(self):
@@ -17,6 +59,9 @@ class ALU:
         self.in_2 = None
         self.select = None
         self.output = None
+        self.changed = True
+        self.evaluations = 0
+        self.evaluations_avoided = 0
 
     def pass_inputs(self, a, b):
         """
@@ -31,15 +76,23 @@ class ALU:
         """
         self.in_1 = a
         self.in_2 = b
+        self.changed = True
 
     def set_select(self, select_value):
         """
         Sets the selection input for the ALU, choosing the operation.
 
-        :param select_value: the operation to be performed by the ALU
-        :type select_value: str
+        :param select_value: the operation to be performed by the ALU (its name is also accepted, e.g. "add")
+        :type select_value: ALUOperation|str
+        :raises: ValueError if the operation is not supported
         """
+        if isinstance(select_value, str):
+            try:
+                select_value = ALUOperation[select_value.upper()]
+            except KeyError:
+                raise ValueError(f"Invalid ALU operation ({select_value})!") from None
         self.select = select_value
+        self.changed = True
 
     def get_output(self):
         """
@@ -52,48 +105,16 @@ class ALU:
 
     def operate(self):
         """
-        Performs an operation with in_1 and in_2 based on the selection value.
+        Performs an operation with in_1 and in_2 based on the selection value, unless the output was already computed
+        for the current inputs.
 
         :return: the result of the operation as a 32-bit number
         :rtype: int
         """
-        if self.select == "add":
-            self.output = self.in_1 + self.in_2
-        elif self.select == "sub":
-            self.output = self.in_1 - self.in_2
-        elif self.select == "mul":
-            self.output = self.in_1 * self.in_2
-        elif self.select == "div":
-            self.output = self.in_1 / self.in_2
-        elif self.select == "and":
-            self.output = self.in_1 & self.in_2
-        elif self.select == "or":
-            self.output = self.in_1 | self.in_2
-        elif self.select == "xor":
-            self.output = self.in_1 ^ self.in_2
-        elif self.select == "not":
-            self.output = ~self.in_1
-        elif self.select == "sll":
-            self.output = self.in_1 << self.in_2
-        elif self.select == "srl":
-            self.output = self.in_1 >> self.in_2
-        elif self.select == "slt":
-            self.output = int(self.in_1 < self.in_2)
-        elif self.select == "sltu":
-            self.output = int(unsigned(self.in_1) < unsigned(self.in_2))
-        elif self.select == "sra":
-            # TODO: Make it better
-            # imm[0:4] is the shift value
-            # imm[5:11] is 0x20 and makes the value wrong
-            self.in_2 = mask_bits(self.in_2, 0, 4)
-            output = self.in_1 >> self.in_2
-            size = get_bit_size(output)
-            self.output = sign_extend(
-                output,
-                sign=mask_bits(output, size - self.in_2, size - self.in_2),
-                size=size,
-            )
-        else:
-            self.output = None
-        self.output = mask_bits(self.output, 0, 31)
+        if not self.changed:
+            self.evaluations_avoided += 1
+            return self.output
+        self.output = OPERATIONS[self.select](self.in_1, self.in_2)
+        self.changed = False
+        self.evaluations += 1
         return self.output
@@ -0,0 +1,22 @@
+from enum import IntEnum
+
+
+class ALUOperation(IntEnum):
+    """
+    The ALUOperation IntEnum class defines the operations of the ALU. The values are small consecutive integers, so the
+    ALU selects the operation by indexing a tuple of functions.
+    """
+
+    ADD = 0
+    SUB = 1
+    AND = 2
+    OR = 3
+    XOR = 4
+    SLL = 5
+    SRL = 6
+    SRA = 7
+    SLT = 8
+    SLTU = 9
+    MUL = 10
+    DIV = 11
+    NOT = 12
@@ -0,0 +1,256 @@
+import hashlib
+import os
+import struct
+import sys
+from array import array
+
+from utils.encode_instruction import AssembledProgram
+from utils.encode_instructions import ASSEMBLER_VERSION, assemble_text
+
+# First bytes of every entry file, followed by the number of instructions (32-bit little-endian), the encoded
+# instructions (32-bit little-endian words) and the symbol table (a "label address" line per label, UTF-8)
+MAGIC = b"RVAC"
+COUNT = struct.Struct("<I")
+
+
+def get_default_cache_directory():
+    """
+    Returns the default directory of the assembly cache ($XDG_CACHE_HOME or ~/.cache, subdirectory
+    riscv-processor-model).
+
+    :return: path of the directory
+    :rtype: str
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "riscv-processor-model")
+
+
+class AssemblyCache:
+    """
+    The AssemblyCache class stores encoded programs on disk, keyed on a hash (SHA-256) of the Assembly source and the
+    version of the assembler, so a program run again is loaded without going through the assembler. Each program is
+    a file with its encoded instructions as 32-bit little-endian words and its symbol table. The total size of the
+    files is bounded, with a least recently used (LRU) eviction policy: the modification time of a file is updated
+    every time it is used, and the files used the longest time ago are removed first.
+
+        directory (str) - directory holding the files of the cache
+        max_size (int) - maximum total size of the files of the cache, in bytes
+        hits (int) - number of lookups that found the encoded program
+        misses (int) - number of lookups that did not find the encoded program
+        evictions (int) - number of files removed to respect the size limit
+    """
+
+    def __init__(self, directory=None, max_size=16 * 2**20):
+        """
+        Constructor method
+
+        :param directory: directory holding the files of the cache, created if needed (default:
+        get_default_cache_directory())
+        :type directory: str, optional
+        :param max_size: maximum total size of the files of the cache, in bytes (default: 16 MiB)
+        :type max_size: int, optional
+        :raises: ValueError if max_size is smaller than 1
+        """
+        if max_size < 1:
+            raise ValueError("The size limit of the assembly cache must be at least 1!")
+        self.directory = directory if directory is not None else get_default_cache_directory()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def get_key(text):
+        """
+        Returns the key of an Assembly source: the hash of the version of the assembler and the source.
+
+        :param text: Assembly source
+        :type text: str
+        :return: hexadecimal SHA-256 digest
+        :rtype: str
+        """
+        digest = hashlib.sha256(f"{ASSEMBLER_VERSION}\n".encode())
+        digest.update(text.encode())
+        return digest.hexdigest()
+
+    def get_path(self, key):
+        """
+        Returns the path of the file of an entry.
+
+        :param key: key of the entry (see get_key())
+        :type key: str
+        :return: path of the file
+        :rtype: str
+        """
+        return os.path.join(self.directory, key + ".bin")
+
+    def lookup(self, text):
+        """
+        Looks up the assembled program of an Assembly source, updating the hit/miss counters and marking the entry
+        as the most recently used. Unreadable or corrupted entries are removed and count as misses.
+
+        :param text: Assembly source
+        :type text: str
+        :return: encoded instructions and symbol table or None if they are not in the cache
+        :rtype: AssembledProgram|NoneType
+        """
+        path = self.get_path(self.get_key(text))
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            program = self._decode(data)
+        except (ValueError, struct.error):
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return program
+
+    def insert(self, text, program):
+        """
+        Stores the assembled program of an Assembly source, evicting the least recently used entries if the cache
+        gets bigger than its size limit. The file is written under a temporary name and renamed, so concurrent runs
+        never read a partial entry.
+
+        :param text: Assembly source
+        :type text: str
+        :param program: encoded instructions and symbol table
+        :type program: AssembledProgram
+        :return: the assembled program
+        :rtype: AssembledProgram
+        """
+        path = self.get_path(self.get_key(text))
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(self._encode(program))
+        os.replace(temporary, path)
+        self._evict()
+        return program
+
+    def encode(self, text, workers=1):
+        """
+        Returns the assembled program of an Assembly source from the cache, assembling and storing it if it is not
+        there yet.
+
+        :param text: Assembly source
+        :type text: str
+        :param workers: number of processes assembling the program (see utils.encode_instruction.assemble())
+        :type workers: int, optional
+        :return: encoded instructions and symbol table
+        :rtype: AssembledProgram
+        """
+        program = self.lookup(text)
+        if program is None:
+            program = self.insert(text, assemble_text(text, workers))
+        return program
+
+    def encode_file(self, file, workers=1):
+        """
+        Returns the assembled program of an Assembly file (see encode()).
+
+        :param file: asm file containing instructions
+        :type file: str
+        :param workers: number of processes assembling the program (see utils.encode_instruction.assemble())
+        :type workers: int, optional
+        :return: encoded instructions and symbol table
+        :rtype: AssembledProgram
+        """
+        with open(file, "r") as f:
+            return self.encode(f.read(), workers)
+
+    def get_entries(self):
+        """
+        Returns the files of the cache, from the least to the most recently used.
+
+        :return: (path, size) of each file
+        :rtype: list
+        """
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(".bin") and entry.is_file():
+                    status = entry.stat()
+                    entries.append((status.st_mtime_ns, entry.path, status.st_size))
+        entries.sort()
+        return [(path, size) for _, path, size in entries]
+
+    def clear(self):
+        """
+        Removes all the files of the cache and resets the counters.
+
+        :return: None
+        :rtype: NoneType
+        """
+        for path, _ in self.get_entries():
+            self._remove(path)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_stats(self):
+        """
+        Returns the counters of the cache.
+
+        :return: number of hits, misses, evictions and entries and total size of the files, in bytes
+        :rtype: dict
+        """
+        entries = self.get_entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(entries),
+            "bytes": sum(size for _, size in entries),
+        }
+
+    @staticmethod
+    def _encode(program):
+        words = array("I", program.instructions)
+        if sys.byteorder == "big":
+            words.byteswap()
+        symbols = "".join(f"{label} {address}\n" for label, address in program.symbols.items())
+        return MAGIC + COUNT.pack(len(words)) + words.tobytes() + symbols.encode()
+
+    @staticmethod
+    def _decode(data):
+        if data[:len(MAGIC)] != MAGIC:
+            raise ValueError("Invalid entry of the assembly cache!")
+        (count,) = COUNT.unpack_from(data, len(MAGIC))
+        start = len(MAGIC) + COUNT.size
+        if len(data) < start + 4 * count:
+            raise ValueError("Invalid entry of the assembly cache!")
+        words = array("I")
+        words.frombytes(data[start:start + 4 * count])
+        if sys.byteorder == "big":
+            words.byteswap()
+        symbols = {}
+        for line in data[start + 4 * count:].decode().splitlines():
+            label, address = line.split()
+            symbols[label] = int(address)
+        return AssembledProgram(words.tolist(), symbols)
+
+    def _evict(self):
+        entries = self.get_entries()
+        total = sum(size for _, size in entries)
+        for path, size in entries:
+            if total <= self.max_size:
+                break
+            self._remove(path)
+            total -= size
+            self.evictions += 1
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
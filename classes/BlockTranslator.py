@@ -0,0 +1,768 @@
+import sys
+import time
+
+from classes.ALU import MASK_32, OPERATIONS
+from classes.ALUOperation import ALUOperation
+from classes.BranchProfile import BranchProfile
+from classes.DecodeCache import DecodeCache
+from classes.FlatRegisterFiles import FlatRegisterFiles
+from classes.HaltReason import HALT_REASONS, HaltReason
+from classes.HookRegistry import HookRegistry
+from classes.RunResult import DEADLINE_CHECK_INTERVAL
+from classes.ThreadedEngine import raise_misaligned
+from classes.TraceCache import Trace, TraceCache
+from classes.TraceRecorder import NO_ADDRESS, TraceRecorder
+
+# Comparison type -> Python operator of the condition for the branch to be taken
+BRANCH_OPERATORS = {
+    "beq": "==",
+    "bne": "!=",
+    "blt": "<",
+    "bge": ">=",
+}
+
+# Operation -> Python expression of the ALU operation (a and b are 32-bit unsigned numbers)
+ALU_EXPRESSIONS = {
+    ALUOperation.ADD: "({a} + {b}) & 0xFFFFFFFF",
+    ALUOperation.SUB: "({a} - {b}) & 0xFFFFFFFF",
+    ALUOperation.AND: "{a} & {b}",
+    ALUOperation.OR: "{a} | {b}",
+    ALUOperation.XOR: "{a} ^ {b}",
+    ALUOperation.SLL: "({a} << {b}) & 0xFFFFFFFF",
+    ALUOperation.SRL: "{a} >> {b}",
+    ALUOperation.SLT: "(1 if {a} < {b} else 0)",
+    ALUOperation.SLTU: "(1 if {a} < {b} else 0)",
+    ALUOperation.SRA: "((({a} ^ 0x80000000) - 0x80000000) >> ({b} & 0x1F)) & 0xFFFFFFFF",
+}
+
+
+def _reg(key):
+    """
+    Returns the name of the local variable holding a register (x0 is always the constant 0).
+
+    :param key: register address
+    :type key: int
+    :return: name of the local variable or "0"
+    :rtype: str
+    """
+    return f"x{key}" if key else "0"
+
+
+class BlockTranslator:
+    """
+    The BlockTranslator class is a dynamic binary translator: it splits the program into basic blocks, each one
+    ending at a branch, 'jal' or 'jalr', and compiles every block into a Python function (generated source using local
+    variables for the registers, compiled once with compile()). The blocks are cached by their start address, so
+    loops run entirely on compiled code.
+
+    Instructions that cannot be translated are executed by the datapath (fallback to the interpreter).
+
+    With a trace recorder, the generated code also records every instruction (see TraceRecorder), with the address,
+    the instruction word and the destination register as constants. Likewise, the calls of the hooks bound when the
+    translator is created (see HookRegistry) are generated after the instructions they observe, and only for them.
+
+    The direction of the branches at the end of the blocks is recorded in a branch profile. When a backward branch
+    has been taken trace_threshold times, the blocks of the loop are stitched into a single superblock trace following
+    the most frequent direction of each branch, with side exits on the cold directions. The trace runs the loop
+    without going back to the dispatcher and is kept in an LRU trace cache. A loop whose trace leaves the cache is
+    traced again, at most MAX_TRACE_BUILDS times.
+
+        blocks (dict) - compiled blocks keyed on their start address
+        block_ends (dict) - address after the last instruction of each block, keyed on the start address
+        block_lengths (dict) - number of instructions of each block, keyed on the start address
+        branch_sites (dict) - (branch address, branch target, address returned when the branch is taken) of the
+        blocks ending at a branch
+        sources (dict) - generated source of each block, keyed on the start address
+        blocks_compiled (int) - number of blocks compiled
+        block_executions (int) - number of blocks executed
+        fallbacks (int) - number of instructions executed by the interpreter
+        traces_compiled (int) - number of traces compiled
+        trace_executions (int) - number of times a trace was entered
+        trace_iterations (list) - number of loop iterations and of instructions run inside traces, and the number of
+        the block of the side exit taken by the last trace executed (0 if it was not left through a side exit)
+    """
+
+    MAX_BLOCK_SIZE = 64
+    MAX_TRACE_BLOCKS = 16
+    MAX_TRACE_BUILDS = 4
+
+    def __init__(
+        self, datapath, decode_cache=None, branch_profile=None, trace_cache=None, trace_threshold=50,
+        trace_recorder=None, hooks=None
+    ):
+        """
+        Constructor method
+
+        :param datapath: the datapath with the loaded program
+        :type datapath: Datapath
+        :param decode_cache: cache used to decode the instructions
+        :type decode_cache: DecodeCache, optional
+        :param branch_profile: profile of the branch directions, possibly already filled by previous runs
+        :type branch_profile: BranchProfile, optional
+        :param trace_cache: cache of the compiled traces (cleared, since it belongs to the loaded program)
+        :type trace_cache: TraceCache, optional
+        :param trace_threshold: times a backward branch must be taken before its loop is compiled into a trace,
+        None disables the traces (default: 50)
+        :type trace_threshold: int, optional
+        :param trace_recorder: recorder of the executed instructions (default: None, no recording)
+        :type trace_recorder: TraceRecorder, optional
+        :param hooks: callbacks keyed on the event (see HookRegistry.bind()) (default: None, no hooks)
+        :type hooks: dict, optional
+        """
+        self.datapath = datapath
+        self.decode_cache = decode_cache if decode_cache is not None else DecodeCache()
+        self.branch_profile = branch_profile if branch_profile is not None else BranchProfile()
+        self.trace_cache = trace_cache if trace_cache is not None else TraceCache()
+        self.trace_cache.clear()
+        self.trace_threshold = trace_threshold
+        self.trace_recorder = trace_recorder
+        self.hooks = hooks or {}
+        self.trace_failures = set()
+        self.trace_builds = {}
+        self.trace_exits = {}
+        self.shared_registers = isinstance(datapath.reg_files, FlatRegisterFiles)
+        self.registers = datapath.reg_files.values if self.shared_registers else [0] * 32
+        self.blocks = {}
+        self.block_ends = {}
+        self.block_lengths = {}
+        self.branch_sites = {}
+        self.sources = {}
+        self.generation = datapath.inst_mem.generation
+        self.blocks_compiled = 0
+        self.block_executions = 0
+        self.fallbacks = 0
+        self.traces_compiled = 0
+        self.trace_executions = 0
+        self.trace_iterations = [0, 0, 0]
+
+    def find_block(self, pc):
+        """
+        Finds the basic block starting at a given address. The block ends at a branch, 'jal' or 'jalr', before a zero
+        word, ecall, ebreak or an invalid instruction, at the end of the instruction memory or after MAX_BLOCK_SIZE
+        instructions.
+
+        :param pc: start address of the block
+        :type pc: int
+        :return: list of (address, decoded instruction) of the block
+        :rtype: list
+        """
+        instructions = self.datapath.inst_mem.instructions
+        block = []
+        while len(block) < BlockTranslator.MAX_BLOCK_SIZE:
+            index = pc >> 2
+            if index >= len(instructions) or not instructions[index]:
+                break
+            try:
+                decoded = self.decode_cache.decode(instructions[index])
+            except ValueError:
+                break
+            block.append((pc, decoded))
+            if decoded.comparison_type is not None or decoded.signals[3] == 2:
+                break
+            pc += 4
+        return block
+
+    def emit_instructions(self, block, used, written):
+        """
+        Emits the Python statements of the instructions of a basic block, except the control transfer at its end.
+        With a trace recorder or hooks, each instruction is followed by the statements recording it and calling the
+        hooks of its events.
+
+        :param block: list of (address, decoded instruction) of the block
+        :type block: list
+        :param used: set updated with the registers read or written
+        :type used: set
+        :param written: set updated with the registers written
+        :type written: set
+        :return: the statements and the exit of the block, one of ("fallthrough", next address),
+        ("branch", condition, target, next address), ("jal", target) or ("jalr",)
+        :rtype: tuple
+        """
+        body = []
+        block_exit = ("fallthrough", block[-1][0] + 4)
+        recording = self.trace_recorder is not None
+        hooks = self.hooks
+        for pc, decoded in block:
+            a_sel, _, b_sel, wb_sel, mem_rw, operation, _, _, reg_w_en, size, load_unsigned = decoded.signals
+            rd, rs1, rs2, imm = decoded.rd, decoded.rs1, decoded.rs2, decoded.imm
+            # destination register, value written and address accessed, as recorded
+            record = (0, 0, NO_ADDRESS)
+            # event of the instruction and the arguments of its hook
+            event = None
+            if decoded.comparison_type is not None:
+                used.update((rs1, rs2))
+                condition = f"{_reg(rs1)} {BRANCH_OPERATORS[decoded.comparison_type]} {_reg(rs2)}"
+                block_exit = ("branch", condition, (pc + imm) & MASK_32, pc + 4)
+                event = ("on_branch", (pc + imm) & MASK_32, condition)
+            elif wb_sel == 2:
+                if rd:
+                    written.add(rd)
+                    record = (rd, pc + 4, NO_ADDRESS)
+                link = [f"x{rd} = {pc + 4}"] if rd else []
+                if a_sel:
+                    body += link
+                    block_exit = ("jal", (pc + imm) & MASK_32)
+                    event = ("on_jump", (pc + imm) & MASK_32, rd)
+                else:
+                    used.add(rs1)
+                    body.append(f"target = ({_reg(rs1)} + {imm}) & 0xFFFFFFFF")
+                    body += link
+                    block_exit = ("jalr",)
+                    event = ("on_jump", "target", rd)
+            elif mem_rw:
+                used.update((rs1, rs2))
+                body.append(f"store(({_reg(rs1)} + {imm}) & 0xFFFFFFFF, {_reg(rs2)}, {size})")
+                record = (0, f"{_reg(rs2)} & {(1 << 8 * size) - 1}", f"({_reg(rs1)} + {imm}) & 0xFFFFFFFF")
+                event = ("on_store", record[2], size, record[1])
+            elif wb_sel == 0:
+                used.add(rs1)
+                address = f"({_reg(rs1)} + {imm}) & 0xFFFFFFFF"
+                if recording or "on_load" in hooks:
+                    body.append(f"address = {address}")
+                    address = "address"
+                    record = (rd, _reg(rd), address)
+                    event = ("on_load", address, size, _reg(rd))
+                load = f"load({address}, {size}, {load_unsigned})"
+                if rd:
+                    written.add(rd)
+                    body.append(f"x{rd} = {load}")
+                else:
+                    body.append(load)
+            elif reg_w_en and rd:
+                written.add(rd)
+                if a_sel:
+                    value = str(OPERATIONS[operation](pc, imm))
+                elif b_sel and operation == ALUOperation.ADD and imm == 0:
+                    used.add(rs1)
+                    value = _reg(rs1)
+                else:
+                    used.add(rs1)
+                    b = str(imm) if b_sel else _reg(rs2)
+                    if not b_sel:
+                        used.add(rs2)
+                    value = ALU_EXPRESSIONS[operation].format(a=_reg(rs1), b=b)
+                body.append(f"x{rd} = {value}")
+                record = (rd, f"x{rd}", NO_ADDRESS)
+            if recording:
+                body.append(f"record({pc}, {decoded.instruction}, {record[0]}, {record[1]}, {record[2]})")
+            if event is not None and event[0] in hooks:
+                body.append(f"{event[0]}({pc}, {', '.join(str(argument) for argument in event[1:])})")
+            if "on_retire" in hooks:
+                body.append(f"on_retire({pc}, {decoded.instruction})")
+        return body, block_exit
+
+    @staticmethod
+    def exit_lines(block_exit):
+        """
+        Emits the statements that leave the function at the exit of a block, returning the next address.
+
+        :param block_exit: the exit of the block (see emit_instructions())
+        :type block_exit: tuple
+        :return: the statements
+        :rtype: list
+        """
+        kind = block_exit[0]
+        if kind == "fallthrough":
+            return [f"return {block_exit[1]}"]
+        if kind == "branch":
+            _, condition, target, next_pc = block_exit
+            taken = "misaligned()" if target % 4 else f"return {BlockTranslator.taken_exit(target, next_pc)}"
+            return [f"if {condition}:", f"    {taken}", f"return {next_pc}"]
+        if kind == "jal":
+            return ["misaligned()" if block_exit[1] % 4 else f"return {block_exit[1]}"]
+        return ["if target & 3:", "    misaligned()", "return target"]
+
+    @staticmethod
+    def taken_exit(target, next_pc):
+        """
+        Returns the address returned by a block when the branch at its end is taken: the target, with bit 0 set if it
+        is also the next address (offset 4), so the direction of the branch is known from the address returned.
+
+        :param target: address of the branch target
+        :type target: int
+        :param next_pc: address after the branch
+        :type next_pc: int
+        :return: the address returned when the branch is taken
+        :rtype: int
+        """
+        return target | 1 if target == next_pc else target
+
+    @staticmethod
+    def function_source(header, used, written, body, prologue=(), epilogue=()):
+        """
+        Wraps generated statements into a function that keeps the registers in local variables and writes the
+        modified ones back when it returns.
+
+        :param header: the "def" line of the function
+        :type header: str
+        :param used: registers read or written by the statements
+        :type used: set
+        :param written: registers written by the statements
+        :type written: set
+        :param body: the statements
+        :type body: list
+        :param prologue: statements before the body
+        :type prologue: tuple, optional
+        :param epilogue: statements executed when the function returns
+        :type epilogue: tuple, optional
+        :return: the source of the function
+        :rtype: str
+        """
+        lines = [header]
+        lines += [f"    x{key} = x[{key}]" for key in sorted((used | written) - {0})]
+        lines += [f"    {line}" for line in prologue]
+        final = [f"x[{key}] = x{key}" for key in sorted(written)] + list(epilogue)
+        if final:
+            lines.append("    try:")
+            lines += [f"        {line}" for line in body]
+            lines.append("    finally:")
+            lines += [f"        {line}" for line in final]
+        else:
+            lines += [f"    {line}" for line in body]
+        return "\n".join(lines) + "\n"
+
+    def generate_source(self, block):
+        """
+        Generates the Python source of the function of a basic block. The function receives the list of registers,
+        keeps them in local variables, and returns the address of the next instruction.
+
+        :param block: list of (address, decoded instruction) of the block
+        :type block: list
+        :return: the source of the function
+        :rtype: str
+        """
+        used = set()
+        written = set()
+        body, block_exit = self.emit_instructions(block, used, written)
+        return self.function_source(
+            f"def block(x, load=load, store=store, misaligned=misaligned{self.instrumentation_parameters()}):",
+            used,
+            written,
+            body + self.exit_lines(block_exit),
+        )
+
+    def instrumentation_parameters(self):
+        """
+        Returns the parameters of the generated functions holding the method recording the instructions and the
+        bound hooks.
+
+        :return: the parameters, empty without a trace recorder and hooks
+        :rtype: str
+        """
+        names = [] if self.trace_recorder is None else ["record"]
+        names += sorted(self.hooks)
+        return "".join(f", {name}={name}" for name in names)
+
+    def compile_function(self, source, name):
+        """
+        Compiles generated source and returns the function defined in it.
+
+        :param source: the source of the function
+        :type source: str
+        :param name: name of the function in the source
+        :type name: str
+        :return: the compiled function
+        :rtype: function
+        """
+        namespace = {
+            "load": self.datapath.data_mem.load,
+            "store": self.datapath.data_mem.store,
+            "misaligned": raise_misaligned,
+            "record": None if self.trace_recorder is None else self.trace_recorder.record,
+            **self.hooks,
+        }
+        exec(compile(source, f"<{name}>", "exec"), namespace)
+        return namespace[name.split()[0]]
+
+    def translate(self, pc):
+        """
+        Translates and compiles the basic block starting at a given address, storing it in the cache.
+
+        :param pc: start address of the block
+        :type pc: int
+        :return: the compiled block or None if the instruction at the address cannot be translated
+        :rtype: function|NoneType
+        """
+        block = self.find_block(pc)
+        if not block:
+            return None
+        source = self.generate_source(block)
+        self.blocks[pc] = self.compile_function(source, f"block 0x{pc:08X}")
+        self.block_ends[pc] = block[-1][0] + 4
+        self.block_lengths[pc] = len(block)
+        if block[-1][1].comparison_type is not None:
+            target = (block[-1][0] + block[-1][1].imm) & MASK_32
+            self.branch_sites[pc] = (block[-1][0], target, self.taken_exit(target, block[-1][0] + 4))
+        self.sources[pc] = source
+        self.blocks_compiled += 1
+        return self.blocks[pc]
+
+    def build_trace(self, head):
+        """
+        Builds a superblock trace for the loop starting at a given address, following the most frequent direction of
+        each branch according to the branch profile, and stores it in the trace cache. Only paths that go back to the
+        head (loops) become traces. After MAX_TRACE_BUILDS builds, the loop is not traced again.
+
+        :param head: address of the first instruction of the loop
+        :type head: int
+        :return: the trace or None if no loop could be formed
+        :rtype: Trace|NoneType
+        """
+        builds = self.trace_builds.get(head, 0) + 1
+        self.trace_builds[head] = builds
+        if builds >= BlockTranslator.MAX_TRACE_BUILDS:
+            self.trace_failures.add(head)
+        used = set()
+        written = set()
+        body = []
+        blocks = []
+        ranges = []
+        branches = []
+        # Side exits: statements leaving the trace, completed once the length of an iteration is known
+        exits = []
+        length = 0
+        pc = head
+        loops = False
+        while len(blocks) < BlockTranslator.MAX_TRACE_BLOCKS and pc not in blocks:
+            block = self.find_block(pc)
+            if not block:
+                break
+            blocks.append(pc)
+            ranges.append((pc, block[-1][0] + 4))
+            length += len(block)
+            lines, block_exit = self.emit_instructions(block, used, written)
+            body += lines
+            kind = block_exit[0]
+            if kind == "branch":
+                _, condition, target, next_pc = block_exit
+                if not self.branch_profile.is_taken_bias(block[-1][0]):
+                    if target % 4:
+                        body += [f"if {condition}:", "    misaligned()"]
+                    else:
+                        exits.append((len(body) + 1, length, len(blocks), target))
+                        body += [f"if {condition}:", None, None, None]
+                    branches.append(False)
+                    pc = next_pc
+                elif target % 4:
+                    break
+                else:
+                    exits.append((len(body) + 1, length, len(blocks), next_pc))
+                    body += [f"if not ({condition}):", None, None, None]
+                    branches.append(True)
+                    pc = target
+            elif kind == "jal" and block_exit[1] % 4 == 0:
+                branches.append(None)
+                pc = block_exit[1]
+            elif kind == "fallthrough":
+                branches.append(None)
+                pc = block_exit[1]
+            else:
+                break
+            if pc == head:
+                loops = True
+                break
+        if not loops:
+            self.trace_failures.add(head)
+            return None
+        for index, executed, side, next_pc in exits:
+            # instructions of the iteration left unexecuted, subtracted from the count of the full iterations, and the
+            # number of the block left
+            body[index:index + 3] = [
+                f"    partial = {executed - length}", f"    side = {side}", f"    return {next_pc}"
+            ]
+        source = self.function_source(
+            "def trace(x, counter, limit, load=load, store=store, misaligned=misaligned"
+            f"{self.instrumentation_parameters()}):",
+            used,
+            written,
+            ["while True:", "    if iterations >= limit:", f"        return {head}", "    iterations += 1"]
+            + [f"    {line}" for line in body],
+            prologue=("iterations = 0", "partial = 0", "side = 0"),
+            epilogue=(
+                "counter[0] += iterations", f"counter[1] += iterations * {length} + partial", "counter[2] = side"
+            ),
+        )
+        trace = Trace(
+            head,
+            self.compile_function(source, f"trace 0x{head:08X}"),
+            tuple(blocks),
+            tuple(ranges),
+            tuple(branches),
+            source,
+        )
+        self.trace_cache.put(trace)
+        self.trace_exits.pop(head, None)
+        self.traces_compiled += 1
+        return trace
+
+    def leave_trace(self, trace, side, iterations):
+        """
+        Records a side exit of a trace: the branch of the block left is profiled in the direction leaving the trace.
+        When more than half of the iterations of a trace left it (after trace_threshold side exits), the trace is
+        removed, so the loop is traced again following the updated branch profile.
+
+        :param trace: the trace left
+        :type trace: Trace
+        :param side: number of the block left, from 1
+        :type side: int
+        :param iterations: number of iterations started in the trace before it was left
+        :type iterations: int
+        :return: None
+        :rtype: NoneType
+        """
+        self.branch_profile.record(trace.ranges[side - 1][1] - 4, not trace.branches[side - 1])
+        stats = self.trace_exits.get(trace.head)
+        if stats is None:
+            stats = self.trace_exits[trace.head] = [0, 0]
+        stats[0] += iterations
+        stats[1] += 1
+        if stats[1] >= self.trace_threshold and 2 * stats[1] > stats[0]:
+            self.trace_cache.remove(trace.head)
+            del self.trace_exits[trace.head]
+
+    def invalidate(self, start, end=None):
+        """
+        Removes the compiled blocks containing instructions in the given address range.
+
+        :param start: first address of the range
+        :type start: int
+        :param end: address after the range (default: start + 4)
+        :type end: int, optional
+        :return: number of blocks removed (traces containing the range are removed too)
+        :rtype: int
+        """
+        end = start + 4 if end is None else end
+        removed = [pc for pc, block_end in self.block_ends.items() if pc < end and start < block_end]
+        for pc in removed:
+            del self.blocks[pc]
+            del self.block_ends[pc]
+            del self.block_lengths[pc]
+            del self.sources[pc]
+            self.branch_sites.pop(pc, None)
+        for head in self.trace_cache.heads():
+            if any(pc < end and start < block_end for pc, block_end in self.trace_cache.traces[head].ranges):
+                self.trace_cache.remove(head)
+        self.trace_failures = set()
+        self.trace_builds = {}
+        self.trace_exits = {}
+        return len(removed)
+
+    def invalidate_all(self):
+        """
+        Removes all the compiled blocks and traces.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.blocks = {}
+        self.block_ends = {}
+        self.block_lengths = {}
+        self.branch_sites = {}
+        self.sources = {}
+        self.trace_cache.clear()
+        self.trace_failures = set()
+        self.trace_builds = {}
+        self.trace_exits = {}
+        self.generation = self.datapath.inst_mem.generation
+
+    def interpret(self, pc):
+        """
+        Executes a single instruction with the datapath (fallback to the interpreter).
+
+        :param pc: address of the instruction
+        :type pc: int
+        :return: address of the next instruction
+        :rtype: int
+        """
+        self.fallbacks += 1
+        datapath = self.datapath
+        self._write_back_registers()
+        datapath.prog_counter.set_value(pc)
+        decoded = self.decode_cache.decode(datapath.fetch_current_instruction())
+        if self.trace_recorder is None and not self.hooks:
+            datapath.run_decoded(decoded)
+        else:
+            address = TraceRecorder.get_address(decoded, datapath.reg_files.get_value)
+            datapath.run_decoded(decoded)
+            if self.trace_recorder is not None:
+                self.trace_recorder.record_decoded(pc, decoded, address, datapath.reg_files.get_value)
+            if self.hooks:
+                HookRegistry.call_decoded(self.hooks, datapath, pc, decoded, address)
+        self._read_registers()
+        datapath.data_mem.set_enable(write=True, read=True)
+        return datapath.get_pc()
+
+    def interpreted_taken(self, pc):
+        """
+        Returns the direction of the instruction executed by the interpreter (see interpret()), from the PC select of
+        the datapath.
+
+        :param pc: address of the instruction
+        :type pc: int
+        :return: True if the instruction is a branch that was taken
+        :rtype: bool
+        """
+        decoded = self.decode_cache.decode(self.datapath.inst_mem.instructions[pc >> 2])
+        return decoded.comparison_type is not None and bool(self.datapath.pc_sel)
+
+    def _read_registers(self):
+        """
+        Copies the register files into the registers used by the compiled blocks (nothing to do if they are the
+        values of a FlatRegisterFiles).
+
+        :return: None
+        :rtype: NoneType
+        """
+        if not self.shared_registers:
+            self.registers[:] = self.datapath.reg_files.snapshot()
+
+    def _write_back_registers(self):
+        """
+        Copies the registers used by the compiled blocks into the register files (nothing to do if they are the
+        values of a FlatRegisterFiles).
+
+        :return: None
+        :rtype: NoneType
+        """
+        if not self.shared_registers:
+            self.datapath.reg_files.restore(self.registers)
+
+    def run(self, max_instructions=None, deadline=None, perf_counters=None, profiler=None):
+        """
+        Runs the loaded program until it halts (see Processor.execute()), translating the blocks the first time they
+        are executed and entering the traces of the hot loops. Blocks and traces are invalidated if the instruction
+        memory was rewritten since they were compiled.
+
+        The budget is checked between blocks and traces. A block that does not fit in what is left of
+        max_instructions is executed by the interpreter instead, and a trace runs at most the number of iterations
+        that fit, so the count is exact; the deadline may be checked a block or a trace iteration late. The
+        performance counters, if given, are updated once per block and per trace execution. With a profiler, the
+        budget is checked (and the program counter sampled) every sampling period, at the end of the block or trace
+        iteration reaching it.
+
+        :param max_instructions: maximum number of instructions executed (default: None, no limit)
+        :type max_instructions: int, optional
+        :param deadline: time.perf_counter() value at which the execution stops (default: None, no limit)
+        :type deadline: float, optional
+        :param perf_counters: counters of the executed instructions (default: None, no counting)
+        :type perf_counters: PerfCounters, optional
+        :param profiler: profiler sampling the program counter at every check of the budget (default: None)
+        :type profiler: SamplingProfiler, optional
+        :return: why the execution stopped and the number of instructions executed
+        :rtype: tuple
+        """
+        datapath = self.datapath
+        instructions = datapath.inst_mem.instructions
+        if self.generation != datapath.inst_mem.generation:
+            self.invalidate_all()
+        blocks = self.blocks
+        block_lengths = self.block_lengths
+        branch_sites = self.branch_sites
+        traces = self.trace_cache
+        threshold = self.trace_threshold
+        record_branch = self.branch_profile.record
+        iterations = self.trace_iterations
+        registers = self.registers
+        self._read_registers()
+        datapath.data_mem.set_enable(write=True, read=True)
+        pc = datapath.get_pc()
+        limit = sys.maxsize if max_instructions is None else max_instructions
+        interval = DEADLINE_CHECK_INTERVAL if profiler is None else profiler.period
+        check = limit if deadline is None and profiler is None else 0
+        count = 0
+        executions = 0
+        trace_executions = 0
+        try:
+            while True:
+                if count >= check:
+                    if count >= limit:
+                        return HaltReason.MAX_INSTRUCTIONS, count
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        return HaltReason.DEADLINE, count
+                    if profiler is not None and count:
+                        profiler.sample(pc)
+                    check = min(limit, count + interval)
+                trace = traces.get(pc)
+                if trace is not None:
+                    length = trace.get_length()
+                    allowed = min((limit - count) // length, max(1, (check - count) // length))
+                    if allowed:
+                        trace_executions += 1
+                        started, executed, _ = iterations
+                        pc = trace.function(registers, iterations, allowed)
+                        count += iterations[1] - executed
+                        if perf_counters is not None:
+                            perf_counters.record_trace(
+                                trace.ranges, trace.branches, iterations[0] - started, iterations[2]
+                            )
+                        if iterations[2]:
+                            self.leave_trace(trace, iterations[2], iterations[0] - started)
+                        continue
+                block = blocks.get(pc)
+                if block is None:
+                    block = self.translate(pc)
+                    if block is None:
+                        if pc >> 2 >= len(instructions):
+                            return HaltReason.OUT_OF_BOUNDS, count
+                        reason = HALT_REASONS.get(instructions[pc >> 2])
+                        if reason is not None:
+                            return reason, count
+                        next_pc = self.interpret(pc)
+                        if perf_counters is not None:
+                            perf_counters.record(pc, self.interpreted_taken(pc))
+                        pc = next_pc
+                        count += 1
+                        continue
+                size = block_lengths[pc]
+                if limit - count < size:
+                    next_pc = self.interpret(pc)
+                    if perf_counters is not None:
+                        perf_counters.record(pc, self.interpreted_taken(pc))
+                    pc = next_pc
+                    count += 1
+                    continue
+                executions += 1
+                next_pc = block(registers)
+                count += size
+                site = branch_sites.get(pc)
+                if site is not None:
+                    branch_pc, target, taken_exit = site
+                    taken = next_pc == taken_exit
+                    if taken:
+                        next_pc = target
+                    counters = record_branch(branch_pc, taken)
+                    if (
+                        taken
+                        and threshold is not None
+                        and target <= branch_pc
+                        and counters[0] >= threshold
+                        and target not in traces
+                        and target not in self.trace_failures
+                    ):
+                        self.build_trace(target)
+                if perf_counters is not None:
+                    perf_counters.record_block(pc, pc + 4 * size, site is not None and taken)
+                pc = next_pc
+        finally:
+            self.block_executions += executions
+            self.trace_executions += trace_executions
+            datapath.prog_counter.set_value(pc)
+            self._write_back_registers()
+
+    def get_stats(self):
+        """
+        Returns the counters of the translator.
+
+        :return: number of blocks compiled, block executions, fallbacks to the interpreter, traces compiled, trace
+        executions, loop iterations inside traces and traces evicted from the trace cache
+        :rtype: dict
+        """
+        return {
+            "blocks_compiled": self.blocks_compiled,
+            "block_executions": self.block_executions,
+            "fallbacks": self.fallbacks,
+            "traces_compiled": self.traces_compiled,
+            "trace_executions": self.trace_executions,
+            "trace_iterations": self.trace_iterations[0],
+            "trace_evictions": self.trace_cache.evictions,
+        }
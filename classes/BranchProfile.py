@@ -0,0 +1,73 @@
+class BranchProfile:
+    """
+    The BranchProfile class counts, for every branch instruction, how many times it was taken and not taken.
+
+        counts (dict) - [taken, not taken] counters keyed on the address of the branch
+    """
+
+    def __init__(self):
+        """
+        Constructor method
+        """
+        self.counts = {}
+
+    def record(self, pc, taken):
+        """
+        Records the direction of a branch.
+
+        :param pc: address of the branch instruction
+        :type pc: int
+        :param taken: True if the branch was taken
+        :type taken: bool
+        :return: the [taken, not taken] counters of the branch
+        :rtype: list
+        """
+        counters = self.counts.get(pc)
+        if counters is None:
+            counters = self.counts[pc] = [0, 0]
+        counters[0 if taken else 1] += 1
+        return counters
+
+    def get_counts(self, pc):
+        """
+        Returns how many times a branch was taken and not taken.
+
+        :param pc: address of the branch instruction
+        :type pc: int
+        :return: number of times the branch was taken and not taken
+        :rtype: tuple
+        """
+        return tuple(self.counts.get(pc, (0, 0)))
+
+    def is_taken_bias(self, pc):
+        """
+        Returns the most frequent direction of a branch (taken if it was never executed).
+
+        :param pc: address of the branch instruction
+        :type pc: int
+        :return: True if the branch was taken at least as often as it was not taken
+        :rtype: bool
+        """
+        taken, not_taken = self.get_counts(pc)
+        return taken >= not_taken
+
+    def hottest(self, count=10):
+        """
+        Returns the most executed branches.
+
+        :param count: number of branches to return
+        :type count: int, optional
+        :return: list of (address, taken, not taken) sorted by number of executions
+        :rtype: list
+        """
+        branches = sorted(self.counts.items(), key=lambda item: item[1][0] + item[1][1], reverse=True)
+        return [(pc, taken, not_taken) for pc, (taken, not_taken) in branches[:count]]
+
+    def clear(self):
+        """
+        Removes all the counters.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.counts = {}
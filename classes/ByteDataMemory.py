@@ -0,0 +1,129 @@
+import struct
+
+from classes.DataMemory import DataMemory
+
+# Size -> struct used to read and write little-endian values (bytes are accessed directly)
+STRUCTS = {
+    DataMemory.HALF_WORD: struct.Struct("<H"),
+    DataMemory.WORD: struct.Struct("<I"),
+}
+
+# Size -> bits OR-ed into a negative value to sign extend it to 32 bits
+SIGN_EXTENSIONS = {
+    DataMemory.BYTE: 0xFFFFFF00,
+    DataMemory.HALF_WORD: 0xFFFF0000,
+    DataMemory.WORD: 0,
+}
+
+
+class ByteDataMemory(DataMemory):
+    """
+    This class represents a data memory backed by a bytearray, one byte of host memory per byte of the guest memory
+    (the list of the DataMemory class takes a pointer per byte). Halfwords and words are read and written with a single
+    struct call. The behaviour of load, store, get_value and print_data is the same as in the DataMemory class, so it
+    can be used in a Datapath in place of it, e.g. for a 64 MiB memory: Datapath(data_mem=ByteDataMemory(16 * 2**20)).
+    """
+
+    def __init__(self, words=32):
+        """
+        Initialize the data memory with a given number of words
+
+        :param words: The number of words the data memory has.
+        :type words: int
+        """
+        super().__init__(0)
+        self.words = words
+        self.data = bytearray(4 * words)
+
+    def load(self, address, size, uns):
+        """
+        Loads a value from memory at a given address and size.
+
+        :param uns: Zero-extends the output if set.
+        :type uns: bool
+        :param address: The address of the memory location to be loaded.
+        :type address: int
+        :param size: The size of the value to be loaded. Must be one of
+                     DataMemory.BYTE - 1, DataMemory.HALF_WORD - 2, or DataMemory.WORD - 4.
+        :type size: int
+        :return: The value stored at the given address and size, or a string
+                 'Read Enable is unset!' if read enable is not set.
+        :rtype: int
+        :raises: ValueError if the size is not one of the specified constants.
+                  IndexError if the address and size result in accessing memory
+                  out of bounds.
+        """
+        if not self.read_enable:
+            return "Read Enable is unset!"
+        elif size not in SIGN_EXTENSIONS:
+            raise ValueError(
+                f"Invalid size argument ({size}), must be DataMemory.BYTE, "
+                "DataMemory.HALF_WORD, or DataMemory.WORD!"
+            )
+        elif address + size - 1 >= len(self.data):
+            raise IndexError(
+                f"Accessing out of bounds address ({address + size - 1}) in data memory!"
+            )
+        elif address % 4 != 0:
+            raise IndexError(f"Invalid address ({address}). Must be a multiple of 4!")
+        if size == DataMemory.BYTE:
+            self.data_out = self.data[address]
+        else:
+            self.data_out = STRUCTS[size].unpack_from(self.data, address)[0]
+        if uns or not self.data_out >> (8 * size - 1):
+            return self.data_out
+        return self.data_out | SIGN_EXTENSIONS[size]
+
+    def store(self, address, value, size):
+        """
+        Stores a value to the data memory at a specified address.
+
+        :param address: The address in data memory to store the value.
+        :type address: int
+        :param value: The value to be stored in data memory.
+        :type value: int
+        :param size: The size of the value to be stored, must be DataMemory.BYTE,
+                     DataMemory.HALF_WORD, or DataMemory.WORD.
+        :type size: int
+        :return: The value stored in data memory, or a string "Write Enable is unset!"
+                 if the write enable is not set.
+        :rtype: int
+        :raises ValueError: If the size argument is invalid or the value is greater
+                           than the maximum value for the specified size.
+        :raises IndexError: If the address is out of bounds for the specified size.
+        """
+        if not self.write_enable:
+            return "Write Enable is unset!"
+        elif size not in SIGN_EXTENSIONS:
+            raise ValueError(
+                f"Invalid size argument {(size)}, must be DataMemory.BYTE, "
+                "DataMemory.HALF_WORD, or DataMemory.WORD!"
+            )
+        elif address % 4 != 0:
+            raise IndexError(f"Invalid address ({address}). Must be a multiple of 4!")
+        elif size == DataMemory.WORD and value > 0xFFFFFFFF:
+            raise ValueError(f"Value ({value}) is greater than 0xFFFFFFFF.")
+        if address + size - 1 >= len(self.data):
+            raise IndexError(
+                f"Accessing out of bounds address ({address}) in data memory!"
+            )
+        if size == DataMemory.BYTE:
+            self.data_in = value & 0xFF
+            self.data[address] = self.data_in
+            return self.data_in
+        elif size == DataMemory.HALF_WORD:
+            self.data_in = value & 0xFFFF
+            STRUCTS[size].pack_into(self.data, address, self.data_in)
+            return self.data_in
+        self.data_in = value
+        STRUCTS[size].pack_into(self.data, address, value & 0xFFFFFFFF)
+        return value & 0xFFFFFFFF
+
+    def clear_memory(self):
+        """
+        Clears the contents of data memory by setting all memory locations to 0.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.data = bytearray(4 * self.words)
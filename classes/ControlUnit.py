@@ -1,3 +1,4 @@
+from classes.Decoder import COMPARISONS, OPCODE_TYPES, SIZES, Decoder
 from classes.InstructionType import InstructionType
 from utils.mask_bits import mask_bits
 
@@ -6,6 +7,7 @@ class ControlUnit:
     """
     A ControlUnit class models the control unit of a RISC-V processor. It holds information about the control signals
     for various units in the processor, such as ALU operation, data memory operation, register file write enable, etc.
+    The signals are looked up in the decode tables of the Decoder.
 
     Signals:
         - comparison_type - declares the type of branch instruction (equal, less than, greater or equal, not equal)
@@ -139,7 +141,7 @@ class ControlUnit:
         print(f"BrUn: {self.branch_unsigned}")
         print(f"BSel: {self.b_sel}")
         print(f"ASel: {self.a_sel}")
-        print(f"ALUSel: {self.alu_sel}")
+        print(f"ALUSel: {self.alu_sel.name.lower() if self.alu_sel is not None else None}")
         print(f"MemRW: {self.mem_rw}")
         print(f"WBSel: {self.wb_sel}")
         print(f"Size: {self.size}")
@@ -147,24 +149,29 @@ class ControlUnit:
 
     def set_signals(self):
         """
-        Set the control signals based on the current instruction.
+        Set the control signals based on the current instruction, with a single lookup in the decode table.
 
         :return: None
         :rtype: NoneType
         """
         self.get_info_from_instruction()
-        self.get_type()
-        self.get_operation()
-        self.set_a_sel()
-        self.set_pc_sel()
-        self.set_b_sel()
-        self.set_wb_sel()
-        self.set_mem_rw()
-        self.set_alu_sel()
-        self.set_imm_sel()
-        self.set_branch_unsigned()
-        self.set_reg_w_enable()
-        self.set_size()
+        signals = Decoder.decode_fields(self.inst_opcode, self.funct3, self.funct7)
+        self.inst_type = signals.inst_type
+        self.inst_load = signals.inst_load
+        self.inst_jalr = signals.inst_jalr
+        self.operation = signals.operation
+        self.comparison_type = signals.comparison_type
+        self.a_sel = signals.a_sel
+        self.pc_sel = signals.pc_sel
+        self.b_sel = signals.b_sel
+        self.wb_sel = signals.wb_sel
+        self.mem_rw = signals.mem_rw
+        self.alu_sel = signals.operation
+        self.imm_sel = signals.imm_sel
+        self.branch_unsigned = signals.branch_unsigned
+        self.reg_w_enable = signals.reg_w_enable
+        self.size = signals.size
+        self.load_unsigned = signals.load_unsigned
 
     def set_size(self):
         """
@@ -173,21 +180,8 @@ class ControlUnit:
         :return: None
         :rtype: NoneType
         """
-        if self.funct3 == 0x0:
-            self.size = 1
-            self.load_unsigned = False
-        elif self.funct3 == 0x1:
-            self.size = 2
-            self.load_unsigned = False
-        elif self.funct3 == 0x2:
-            self.size = 4
-            self.load_unsigned = False
-        elif self.funct3 == 0x4:
-            self.size = 1
-            self.load_unsigned = True
-        elif self.funct3 == 0x5:
-            self.size = 2
-            self.load_unsigned = True
+        if self.funct3 in SIZES:
+            self.size, self.load_unsigned = SIZES[self.funct3]
 
     def set_comparison_type(self):
         """
@@ -197,16 +191,7 @@ class ControlUnit:
         :rtype: str
         """
         if self.inst_opcode == 0x63:
-            if self.funct3 == 0x0:
-                self.comparison_type = "beq"
-            elif self.funct3 == 0x1:
-                self.comparison_type = "bne"
-            elif self.funct3 in [0x4, 0x6]:
-                self.comparison_type = "blt"
-            elif self.funct3 in [0x5, 0x7]:
-                self.comparison_type = "bge"
-            else:
-                self.comparison_type = None
+            self.comparison_type = COMPARISONS.get(self.funct3)
         else:
             self.comparison_type = None
         return self.comparison_type
@@ -219,7 +204,7 @@ class ControlUnit:
         :rtype: NoneType
         """
         if (
-            self.inst_type in [InstructionType.UJ, InstructionType.SB]
+            self.inst_type in (InstructionType.UJ, InstructionType.SB)
             or self.inst_opcode == 0x17
         ):
             self.a_sel = 1
@@ -278,7 +263,7 @@ class ControlUnit:
         :return: None
         :rtype: NoneType
         """
-        if self.inst_type == InstructionType.R and self.funct3 in [0x6, 0x7]:
+        if self.inst_type == InstructionType.R and self.funct3 in (0x6, 0x7):
             self.branch_unsigned = True
         else:
             self.branch_unsigned = False
@@ -290,7 +275,7 @@ class ControlUnit:
         :return: None
         :rtype: NoneType
         """
-        if self.inst_type in [InstructionType.S, InstructionType.SB]:
+        if self.inst_type in (InstructionType.S, InstructionType.SB):
             self.reg_w_enable = False
         else:
             self.reg_w_enable = True
@@ -381,118 +366,26 @@ class ControlUnit:
         :return: None
         :rtype: NoneType
         """
-        if self.inst_opcode == 0x33:
-            self.inst_type = InstructionType.R
-        elif self.inst_opcode in [0x13, 0x03, 0x67]:
-            self.inst_type = InstructionType.I
-            if self.inst_opcode == 0x03:
-                # self.inst_load = True
-                self.set_size()
-            # else:
-            # self.inst_load = False
-            # if self.inst_opcode == 0x67:
-            # self.inst_jalr = True
-            # else:
-            # self.inst_jalr = False
-        elif self.inst_opcode == 0x23:
-            self.inst_type = InstructionType.S
-            self.set_size()
-        elif self.inst_opcode == 0x63:
-            self.inst_type = InstructionType.SB
-        elif self.inst_opcode == 0x6F:
-            self.inst_type = InstructionType.UJ
-        elif self.inst_opcode in [0x37, 0x17]:
-            self.inst_type = InstructionType.U
-        else:
+        if self.inst_opcode not in OPCODE_TYPES:
             raise ValueError(
                 f"Invalid instruction! Opcode ({self.inst_opcode}) not supported!"
             )
-        self.inst_load = False if self.inst_opcode != 0x03 else True
-        self.inst_jalr = False if self.inst_opcode != 0x67 else True
+        self.inst_type = OPCODE_TYPES[self.inst_opcode]
+        self.inst_load = self.inst_opcode == 0x03
+        self.inst_jalr = self.inst_opcode == 0x67
+        if self.inst_opcode in (0x03, 0x23):
+            self.set_size()
 
     def get_operation(self):
         """
-        Gets the operation to be performed by the ALU based on the current instruction type.
+        Gets the operation to be performed by the ALU based on the current instruction.
 
         :return: None
         :rtype: NoneType
         """
-        if self.inst_type == InstructionType.R:
-            if self.funct7 == 0x00:
-                if self.funct3 == 0x0:
-                    self.operation = "add"
-                elif self.funct3 == 0x4:
-                    self.operation = "xor"
-                elif self.funct3 == 0x6:
-                    self.operation = "or"
-                elif self.funct3 == 0x7:
-                    self.operation = "and"
-                elif self.funct3 == 0x1:
-                    self.operation = "sll"
-                elif self.funct3 == 0x5:
-                    self.operation = "srl"
-                elif self.funct3 == 0x2:
-                    self.operation = "slt"
-                elif self.funct3 == 0x3:
-                    self.operation = "sltu"
-                else:
-                    raise ValueError(
-                        "Invalid funct3 {} for funct7 = 0x00".format(self.funct3)
-                    )
-            elif self.funct7 == 0x20:
-                if self.funct3 == 0x0:
-                    self.operation = "sub"
-                elif self.funct3 == 0x5:
-                    self.operation = "sra"
-                else:
-                    raise ValueError(
-                        "Invalid funct3 for funct7 = 0x20".format(self.funct3)
-                    )
-            else:
-                raise ValueError("Invalid funct7 {}!".format(self.funct7))
-        elif (
-            self.inst_type == InstructionType.I
-            and not self.inst_load
-            and not self.inst_jalr
-        ):
-            if self.funct3 == 0x0:
-                self.operation = "add"
-            elif self.funct3 == 0x4:
-                self.operation = "xor"
-            elif self.funct3 == 0x6:
-                self.operation = "or"
-            elif self.funct3 == 0x7:
-                self.operation = "and"
-            elif self.funct3 == 0x1 and self.funct7 == 0x00:
-                self.operation = "sll"
-            elif self.funct3 == 0x5 and self.funct7 == 0x00:
-                self.operation = "srl"
-            elif self.funct3 == 0x5 and self.funct7 == 0x20:
-                self.operation = "sra"
-            elif self.funct3 == 0x2:
-                self.operation = "slt"
-            elif self.funct3 == 0x3:
-                self.operation = "sltu"
-            else:
-                raise ValueError(
-                    "Invalid combination of funct3 ({}) and funct7 ({})".format(
-                        self.funct3, self.funct7
-                    )
-                )
-        elif (
-            self.inst_type
-            in [
-                InstructionType.UJ,
-                InstructionType.U,
-                InstructionType.S,
-                InstructionType.SB,
-            ]
-            or self.inst_load
-            or self.inst_jalr
-        ):
-            self.operation = "add"
-        else:
-            raise ValueError("Invalid Instruction Type ({})!".format(self.inst_type))
+        self.operation = Decoder.decode_fields(
+            self.inst_opcode, self.funct3, self.funct7
+        ).operation
 
     # R-Type
     #   ALUSel
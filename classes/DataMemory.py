@@ -156,6 +156,25 @@ class DataMemory:
                 | (self.data[address + 3] << 24)
             )
 
+    def write_image(self, address, image):
+        """
+        Copies a block of bytes into the data memory starting at a given address (e.g. a segment of a program being
+        loaded). Unlike store(), the address does not need to be aligned and the write enable flag is not checked.
+
+        :param address: The address of the first byte.
+        :type address: int
+        :param image: The bytes to be copied.
+        :type image: bytes-like
+        :return: None
+        :rtype: NoneType
+        :raises IndexError: If the block does not fit in the data memory.
+        """
+        if address < 0 or address + len(image) > len(self.data):
+            raise IndexError(
+                f"Accessing out of bounds address ({address + len(image) - 1}) in data memory!"
+            )
+        self.data[address:address + len(image)] = image
+
     def print_data(self):
         """
         Prints the contents of data memory, with each line showing the address in hexadecimal and its value.
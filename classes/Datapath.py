@@ -1,6 +1,8 @@
 from classes.ALU import ALU
 from classes.BranchComparator import BranchComparator
 from classes.DataMemory import DataMemory
+from classes.ElfFile import PF_X, ElfFile
+from classes.FlatRegisterFiles import FlatRegisterFiles
 from classes.ImmediateGenerator import ImmediateGenerator
 from classes.InstructionMemory import InstructionMemory
 from classes.ProgramCounter import ProgramCounter
@@ -24,33 +26,37 @@ class Datapath:
 
     def __init__(
         self,
-        inst_mem: InstructionMemory = InstructionMemory(),
-        prog_counter: ProgramCounter = ProgramCounter(),
-        reg_files: RegisterFiles = RegisterFiles(),
-        alu: ALU = ALU(),
-        data_mem: DataMemory = DataMemory(),
-        branch_comparator: BranchComparator = BranchComparator(),
-        immediate_generator: ImmediateGenerator = ImmediateGenerator(),
+        inst_mem: InstructionMemory = None,
+        prog_counter: ProgramCounter = None,
+        reg_files: RegisterFiles = None,
+        alu: ALU = None,
+        data_mem: DataMemory = None,
+        branch_comparator: BranchComparator = None,
+        immediate_generator: ImmediateGenerator = None,
     ):
         """
-        Initialize the components of the datapath.
+        Initialize the components of the datapath. Components not given are created with their default values.
 
         :param inst_mem: An instance of the InstructionMemory class
         :param prog_counter: An instance of the ProgramCounter class
-        :param reg_files: An instance of the RegisterFiles class
+        :param reg_files: An instance of the RegisterFiles or FlatRegisterFiles class (default: FlatRegisterFiles)
         :param alu: An instance of the ALU class
         :param data_mem: An instance of the DataMemory class
         :param branch_comparator: An instance of the BranchComparator class
         :param immediate_generator: An instance of the ImmediateGenerator class
         """
         self.reg_w_en = None
-        self.inst_mem = inst_mem
-        self.prog_counter = prog_counter
-        self.reg_files = reg_files
-        self.alu = alu
-        self.data_mem = data_mem
-        self.branch_comparator = branch_comparator
-        self.immediate_generator = immediate_generator
+        self.inst_mem = inst_mem if inst_mem is not None else InstructionMemory()
+        self.prog_counter = prog_counter if prog_counter is not None else ProgramCounter()
+        self.reg_files = reg_files if reg_files is not None else FlatRegisterFiles()
+        self.alu = alu if alu is not None else ALU()
+        self.data_mem = data_mem if data_mem is not None else DataMemory()
+        self.branch_comparator = (
+            branch_comparator if branch_comparator is not None else BranchComparator()
+        )
+        self.immediate_generator = (
+            immediate_generator if immediate_generator is not None else ImmediateGenerator()
+        )
         self.current_instruction = None
         self.mem_rw = None
         self.pc_sel = 0
@@ -77,7 +83,7 @@ class Datapath:
         self.reg_w_en = None
         self.inst_mem = InstructionMemory()
         self.prog_counter = ProgramCounter()
-        self.reg_files = RegisterFiles()
+        self.reg_files = FlatRegisterFiles()
         self.alu = ALU()
         self.data_mem = DataMemory()
         self.branch_comparator = BranchComparator()
@@ -119,6 +125,49 @@ class Datapath:
         self.set_pc_sel(self.pc_sel)
         self.update_pc()
 
+    def run_decoded(self, decoded):
+        """
+        Runs datapath to perform an already decoded instruction, skipping the split of the instruction and the
+        immediate generator. Branches are resolved here with the result of the branch comparator.
+
+        :param decoded: the decoded current instruction
+        :type decoded: DecodedInstruction
+        :return: None
+        :rtype: NoneType
+        """
+        self.set_signals(*decoded.signals)
+        self.reg_files.set_addresses(decoded.rd, decoded.rs1, decoded.rs2)
+        self.set_reg_w_en(self.reg_w_en)
+        if decoded.comparison_type is not None:
+            self.compare(self.branch_unsigned)
+            self.set_pc_sel(int(self.branch_taken(decoded.comparison_type)))
+        self.pass_alu_inputs(self.a_sel, self.b_sel, decoded.imm)
+        self.set_alu_operation(self.alu_sel)
+        self.operate()
+        self.set_mem_rw(self.mem_rw)
+        self.store_into_memory(self.store_size)
+        self.write_back(self.load_size, self.load_unsigned)
+        self.update_pc()
+
+    def branch_taken(self, comparison_type):
+        """
+        Checks if a branch must be taken based on the last comparison of the branch comparator.
+
+        :param comparison_type: comparison type of the branch (beq, bne, blt, bge)
+        :type comparison_type: str
+        :return: True if the branch must be taken
+        :rtype: bool
+        """
+        if comparison_type == "beq":
+            return self.branch_eq
+        elif comparison_type == "bne":
+            return not self.branch_eq
+        elif comparison_type == "blt":
+            return self.branch_lt
+        elif comparison_type == "bge":
+            return not self.branch_lt
+        return False
+
     def first_run_branch(self):
         """
         Runs the first part of operation in branch instructions.
@@ -292,7 +341,7 @@ class Datapath:
         self.branch_eq, self.branch_lt = self.branch_comparator.compare()
         return self.branch_eq, self.branch_lt
 
-    def pass_alu_inputs(self, a_sel, b_sel):
+    def pass_alu_inputs(self, a_sel, b_sel, imm=None):
         """
         Pass the appropriate inputs to the ALU depending on the current instruction.
 
@@ -300,11 +349,16 @@ class Datapath:
         :type a_sel: int
         :param b_sel: selects the second input of the ALU (0 - rs2, 1 - imm[31:0])
         :type b_sel: int
+        :param imm: already generated immediate, if None the immediate generator is used
+        :type imm: int, optional
         :return: None
         :rtype: NoneType
         """
         a = self.get_pc() if a_sel else self.get_value_rs1()
-        b = self.get_immediate() if b_sel else self.get_value_rs2()
+        if b_sel:
+            b = self.get_immediate() if imm is None else imm
+        else:
+            b = self.get_value_rs2()
         self.alu.pass_inputs(a, b)
 
     def set_alu_operation(self, operation):
@@ -312,7 +366,7 @@ class Datapath:
         Sets ALU operation based on current instruction.
 
         :param operation: operation to be performed by ALU
-        :type operation: str
+        :type operation: ALUOperation|str
         :return: None
         :rtype: NoneType
         """
@@ -440,15 +494,103 @@ class Datapath:
         """
         return self.inst_mem.load_instructions_from_file(file)
 
-    def load_instructions_from_asm_file(self, file):
+    def load_instructions_from_binary_file(self, file):
+        """
+        Load a binary program (raw little-endian words, see utils.binary_program) into the instruction memory and set
+        the program counter to its entry address.
+        :param file: binary file containing the program
+        :type file: file
+        :return: the program read from the file
+        :rtype: BinaryProgram
+        """
+        program = self.inst_mem.load_instructions_from_binary_file(file)
+        self.prog_counter.set_value(program.entry)
+        return program
+
+    def load_elf_file(self, file):
+        """
+        Load an ELF32 RISC-V executable: every loadable segment is copied into the data memory (with its .bss
+        zero-filled), the executable ones also into the instruction memory, and the program counter is set to the
+        entry address.
+        :param file: ELF file
+        :type file: str
+        :return: the ELF file, with its symbol table (the mapping of the file is already closed)
+        :rtype: ElfFile
+        :raises: ValueError if a segment does not fit in the data memory or an executable one in the instruction
+        memory (see InstructionMemory.fill_memory_image())
+        """
+        with ElfFile(file) as elf:
+            for segment in elf.get_load_segments():
+                image = elf.get_segment_data(segment)
+                if segment.flags & PF_X:
+                    self.inst_mem.fill_memory_image(image + bytes(-len(image) % 4), segment.address)
+                try:
+                    self.data_mem.write_image(segment.address, image)
+                except IndexError:
+                    raise ValueError(
+                        f"The segment at 0x{segment.address:08X} of {file} does not fit in the data memory! Load the "
+                        "executable into a PagedDataMemory (-memory paged), which covers the whole address space."
+                    )
+        self.inst_mem.symbols = {symbol.name: symbol.address for symbol in elf.symbols if symbol.name}
+        self.prog_counter.set_value(elf.entry)
+        return elf
+
+    def load_instructions_from_asm_file(self, file, write_artifact=False, cache=None, workers=1):
         """
         Load instructions from RISC-V Assembly file into the instruction memory.
         :param file: asm file containing instructions
         :type file: file
+        :param write_artifact: also write the file with the encoded instructions (default: False)
+        :type write_artifact: bool, optional
+        :param cache: assembly cache used to skip the assembler for programs already encoded (default: None)
+        :type cache: AssemblyCache, optional
+        :param workers: number of processes assembling the program (see utils.encode_instruction.assemble())
+        :type workers: int, optional
+        :return: list of instructions
+        :rtype: list
+        """
+        return self.inst_mem.load_instructions_from_asm_file(file, write_artifact, cache, workers)
+
+    def load_instructions_from_asm(self, text, cache=None, workers=1):
+        """
+        Load instructions from RISC-V Assembly source (string) into the instruction memory.
+        :param text: Assembly source
+        :type text: str
+        :param cache: assembly cache used to skip the assembler for programs already encoded (default: None)
+        :type cache: AssemblyCache, optional
+        :param workers: number of processes assembling the program (see utils.encode_instruction.assemble())
+        :type workers: int, optional
         :return: list of instructions
         :rtype: list
         """
-        return self.inst_mem.load_instructions_from_asm_file(file)
+        return self.inst_mem.load_instructions_from_asm(text, cache, workers)
+
+    def load_instructions_from_asm_stream(self, file):
+        """
+        Load instructions from a RISC-V Assembly file of any size into the instruction memory, assembling it as a
+        stream (see InstructionMemory.load_instructions_from_asm_stream()).
+        :param file: asm file containing instructions
+        :type file: str
+        :return: number of instructions
+        :rtype: int
+        """
+        return self.inst_mem.load_instructions_from_asm_stream(file)
+
+    def get_evaluation_stats(self):
+        """
+        Returns how many times the ALU and the immediate generator computed their outputs and how many evaluations
+        were avoided by reusing the output of the current cycle (e.g. the ALU output is used by operate(),
+        store_into_memory() and write_back() in the same cycle, but only computed once).
+
+        :return: evaluations and evaluations avoided of the ALU and the immediate generator
+        :rtype: dict
+        """
+        return {
+            "alu_evaluations": self.alu.evaluations,
+            "alu_evaluations_avoided": self.alu.evaluations_avoided,
+            "imm_evaluations": self.immediate_generator.evaluations,
+            "imm_evaluations_avoided": self.immediate_generator.evaluations_avoided,
+        }
 
     def print_registers(self):
         """
@@ -506,7 +648,7 @@ class Datapath:
         :param mem_rw: enable signal to write or read data into/of data memory (0 - read, 1 - write)
         :type mem_rw: int
         :param alu_sel: stores the operation to be performed in the ALU
-        :type alu_sel: str
+        :type alu_sel: ALUOperation
         :param imm_sel: stores the mode of operation for the immediate generator
         :type imm_sel: str
         :param branch_unsigned: signal to branch comparator if the comparison must be done between unsigned numbers
@@ -0,0 +1,144 @@
+from collections import namedtuple
+
+from classes.Decoder import Decoder
+from classes.ImmediateGenerator import ImmediateGenerator
+from utils.mask_bits import mask_bits
+
+
+class DecodedInstruction(
+    namedtuple(
+        "DecodedInstruction",
+        [
+            "instruction",
+            "rd",
+            "rs1",
+            "rs2",
+            "imm",
+            "operation",
+            "signals",
+            "comparison_type",
+        ],
+    )
+):
+    """
+    The DecodedInstruction class holds everything the datapath needs to execute an instruction without going through
+    the control unit and the immediate generator again.
+
+        instruction (int) - the 32-bit instruction word
+        rd (int) - destination register address
+        rs1 (int) - source register 1 address
+        rs2 (int) - source register 2 address
+        imm (int) - final immediate (already generated and sign extended)
+        operation (ALUOperation) - operation to be performed by the ALU
+        signals (tuple) - control signals, in the same order as ControlUnit.get_signals()
+        comparison_type (str) - comparison type of a branch (beq, bne, blt, bge) or None if it is not a branch
+    """
+
+    __slots__ = ()
+
+
+def decode_instruction(instruction):
+    """
+    Fully decodes an instruction: register addresses, immediate, ALU operation and control signals.
+
+    :param instruction: 32-bit instruction word
+    :type instruction: int
+    :return: the decoded instruction
+    :rtype: DecodedInstruction
+    :raises: ValueError if the instruction is not a valid RV32I instruction
+    """
+    signals = Decoder.decode(instruction)
+    immediate_generator = ImmediateGenerator()
+    immediate_generator.set_selection(signals.imm_sel.value)
+    immediate_generator.pass_immediate(mask_bits(instruction, 7, 31))
+    return DecodedInstruction(
+        instruction,
+        mask_bits(instruction, 7, 11),
+        mask_bits(instruction, 15, 19),
+        mask_bits(instruction, 20, 24),
+        immediate_generator.get_immediate(),
+        signals.operation,
+        signals.get_signals(),
+        signals.comparison_type,
+    )
+
+
+class DecodeCache:
+    """
+    The DecodeCache class stores fully decoded instructions keyed on the 32-bit instruction word, so an instruction
+    executed many times is decoded only once.
+
+        entries (dict) - decoded instructions keyed on the instruction word
+        hits (int) - number of lookups that found a decoded instruction
+        misses (int) - number of lookups that did not find a decoded instruction
+    """
+
+    def __init__(self):
+        """
+        Constructor method
+        """
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, instruction):
+        """
+        Looks up a decoded instruction, updating the hit/miss counters.
+
+        :param instruction: 32-bit instruction word
+        :type instruction: int
+        :return: the decoded instruction or None if it is not in the cache
+        :rtype: DecodedInstruction|NoneType
+        """
+        decoded = self.entries.get(instruction)
+        if decoded is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return decoded
+
+    def decode(self, instruction):
+        """
+        Returns the decoded instruction from the cache, decoding and storing it if it is not there yet.
+
+        :param instruction: 32-bit instruction word
+        :type instruction: int
+        :return: the decoded instruction
+        :rtype: DecodedInstruction
+        """
+        decoded = self.lookup(instruction)
+        if decoded is None:
+            decoded = self.insert(decode_instruction(instruction))
+        return decoded
+
+    def insert(self, decoded):
+        """
+        Stores a decoded instruction in the cache.
+
+        :param decoded: the decoded instruction
+        :type decoded: DecodedInstruction
+        :return: the decoded instruction
+        :rtype: DecodedInstruction
+        """
+        self.entries[decoded.instruction] = decoded
+        return decoded
+
+    def clear(self):
+        """
+        Removes all the entries of the cache and resets the counters.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self):
+        """
+        Returns the counters of the cache.
+
+        :return: number of hits, misses and entries
+        :rtype: dict
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
@@ -0,0 +1,302 @@
+from collections import namedtuple
+
+from classes.ALUOperation import ALUOperation
+from classes.InstructionType import InstructionType
+
+
+class SignalBundle(
+    namedtuple(
+        "SignalBundle",
+        [
+            "inst_type",
+            "operation",
+            "a_sel",
+            "pc_sel",
+            "b_sel",
+            "wb_sel",
+            "mem_rw",
+            "imm_sel",
+            "branch_unsigned",
+            "reg_w_enable",
+            "size",
+            "load_unsigned",
+            "comparison_type",
+            "inst_load",
+            "inst_jalr",
+        ],
+    )
+):
+    """
+    The SignalBundle class holds all the control signals of an instruction, as set by the control unit.
+
+    The PCSel of a branch is 0, since it depends on the result of the branch comparator (see comparison_type).
+    """
+
+    __slots__ = ()
+
+    def get_signals(self):
+        """
+        Returns the control signals in the same order as ControlUnit.get_signals().
+
+        :return: a tuple with the control signals
+        :rtype: tuple
+        """
+        return (
+            self.a_sel,
+            self.pc_sel,
+            self.b_sel,
+            self.wb_sel,
+            self.mem_rw,
+            self.operation,
+            self.imm_sel,
+            self.branch_unsigned,
+            self.reg_w_enable,
+            self.size,
+            self.load_unsigned,
+        )
+
+
+OPCODE_TYPES = {
+    0x33: InstructionType.R,
+    0x13: InstructionType.I,
+    0x03: InstructionType.I,
+    0x67: InstructionType.I,
+    0x23: InstructionType.S,
+    0x63: InstructionType.SB,
+    0x6F: InstructionType.UJ,
+    0x37: InstructionType.U,
+    0x17: InstructionType.U,
+}
+
+# (funct3, funct7) -> operation
+R_OPERATIONS = {
+    (0x0, 0x00): ALUOperation.ADD,
+    (0x4, 0x00): ALUOperation.XOR,
+    (0x6, 0x00): ALUOperation.OR,
+    (0x7, 0x00): ALUOperation.AND,
+    (0x1, 0x00): ALUOperation.SLL,
+    (0x5, 0x00): ALUOperation.SRL,
+    (0x2, 0x00): ALUOperation.SLT,
+    (0x3, 0x00): ALUOperation.SLTU,
+    (0x0, 0x20): ALUOperation.SUB,
+    (0x5, 0x20): ALUOperation.SRA,
+}
+
+# funct3 -> operation (funct7 is part of the immediate)
+I_OPERATIONS = {
+    0x0: ALUOperation.ADD,
+    0x4: ALUOperation.XOR,
+    0x6: ALUOperation.OR,
+    0x7: ALUOperation.AND,
+    0x2: ALUOperation.SLT,
+    0x3: ALUOperation.SLTU,
+}
+
+# (funct3, funct7) -> operation (shamt in imm[4:0], funct7 in imm[11:5])
+I_SHIFT_OPERATIONS = {
+    (0x1, 0x00): ALUOperation.SLL,
+    (0x5, 0x00): ALUOperation.SRL,
+    (0x5, 0x20): ALUOperation.SRA,
+}
+
+# funct3 -> (size, load_unsigned)
+SIZES = {
+    0x0: (1, False),
+    0x1: (2, False),
+    0x2: (4, False),
+    0x4: (1, True),
+    0x5: (2, True),
+}
+
+STORE_SIZES = {
+    0x0: 1,
+    0x1: 2,
+    0x2: 4,
+}
+
+# funct3 -> comparison type
+COMPARISONS = {
+    0x0: "beq",
+    0x1: "bne",
+    0x4: "blt",
+    0x5: "bge",
+    0x6: "blt",
+    0x7: "bge",
+}
+
+# Bits of the instruction used as key (opcode, funct3, funct7)
+KEY_MASK = 0xFE00707F
+
+# Environment call and breakpoint: not executed by the datapath, they halt the processor
+ECALL = 0x00000073
+EBREAK = 0x00100073
+SYSTEM_INSTRUCTIONS = {
+    ECALL: "ecall",
+    EBREAK: "ebreak",
+}
+
+
+def _key(opcode, funct3, funct7):
+    """
+    Packs opcode, funct3 and funct7 in their positions of the instruction.
+
+    :param opcode: instruction opcode
+    :type opcode: int
+    :param funct3: instruction funct3 field
+    :type funct3: int
+    :param funct7: instruction funct7 field
+    :type funct7: int
+    :return: the key of the decode table
+    :rtype: int
+    """
+    return opcode | (funct3 << 12) | (funct7 << 25)
+
+
+def _bundle(opcode, operation, size=0, load_unsigned=False, comparison_type=None, branch_unsigned=False):
+    """
+    Builds the signal bundle of an instruction.
+
+    :param opcode: instruction opcode
+    :type opcode: int
+    :param operation: operation to be performed by the ALU
+    :type operation: ALUOperation
+    :param size: size of a load or store (1 - BYTE, 2 - HALFWORD, 4 - WORD)
+    :type size: int, optional
+    :param load_unsigned: True if the load is unsigned
+    :type load_unsigned: bool, optional
+    :param comparison_type: comparison type of a branch
+    :type comparison_type: str, optional
+    :param branch_unsigned: BrUn signal
+    :type branch_unsigned: bool, optional
+    :return: the signal bundle
+    :rtype: SignalBundle
+    """
+    inst_type = OPCODE_TYPES[opcode]
+    inst_load = opcode == 0x03
+    inst_jalr = opcode == 0x67
+    if inst_load:
+        wb_sel = 0
+    elif inst_jalr or inst_type == InstructionType.UJ:
+        wb_sel = 2
+    else:
+        wb_sel = 1
+    return SignalBundle(
+        inst_type=inst_type,
+        operation=operation,
+        a_sel=1 if inst_type in (InstructionType.UJ, InstructionType.SB) or opcode == 0x17 else 0,
+        pc_sel=1 if inst_jalr or inst_type == InstructionType.UJ else 0,
+        b_sel=0 if inst_type is InstructionType.R else 1,
+        wb_sel=wb_sel,
+        mem_rw=1 if inst_type == InstructionType.S else 0,
+        imm_sel=inst_type,
+        branch_unsigned=branch_unsigned,
+        reg_w_enable=inst_type not in (InstructionType.S, InstructionType.SB),
+        size=size,
+        load_unsigned=load_unsigned,
+        comparison_type=comparison_type,
+        inst_load=inst_load,
+        inst_jalr=inst_jalr,
+    )
+
+
+def _build_table():
+    """
+    Builds the decode table with an entry for every valid RV32I combination of opcode, funct3 and funct7.
+
+    :return: signal bundles keyed on the instruction bits of opcode, funct3 and funct7
+    :rtype: dict
+    """
+    table = {}
+
+    def add_all_funct7(opcode, funct3, bundle):
+        for funct7 in range(0x80):
+            table[_key(opcode, funct3, funct7)] = bundle
+
+    for (funct3, funct7), operation in R_OPERATIONS.items():
+        table[_key(0x33, funct3, funct7)] = _bundle(
+            0x33, operation, branch_unsigned=funct3 in (0x6, 0x7)
+        )
+    for funct3, operation in I_OPERATIONS.items():
+        add_all_funct7(0x13, funct3, _bundle(0x13, operation))
+    for (funct3, funct7), operation in I_SHIFT_OPERATIONS.items():
+        table[_key(0x13, funct3, funct7)] = _bundle(0x13, operation)
+    for funct3, (size, load_unsigned) in SIZES.items():
+        add_all_funct7(0x03, funct3, _bundle(0x03, ALUOperation.ADD, size, load_unsigned))
+    add_all_funct7(0x67, 0x0, _bundle(0x67, ALUOperation.ADD))
+    for funct3, size in STORE_SIZES.items():
+        add_all_funct7(0x23, funct3, _bundle(0x23, ALUOperation.ADD, size))
+    for funct3, comparison_type in COMPARISONS.items():
+        add_all_funct7(0x63, funct3, _bundle(0x63, ALUOperation.ADD, comparison_type=comparison_type))
+    for opcode in (0x6F, 0x37, 0x17):
+        bundle = _bundle(opcode, ALUOperation.ADD)
+        for funct3 in range(0x8):
+            add_all_funct7(opcode, funct3, bundle)
+    return table
+
+
+class Decoder:
+    """
+    The Decoder class decodes RV32I instructions with a single lookup in a precomputed table indexed by opcode,
+    funct3 and funct7, returning the complete bundle of control signals.
+    """
+
+    TABLE = _build_table()
+
+    @staticmethod
+    def decode(instruction):
+        """
+        Decodes an instruction.
+
+        :param instruction: 32-bit instruction word
+        :type instruction: int
+        :return: the control signals of the instruction
+        :rtype: SignalBundle
+        :raises: ValueError if the instruction is not a valid RV32I instruction
+        """
+        try:
+            return Decoder.TABLE[instruction & KEY_MASK]
+        except KeyError:
+            Decoder.raise_invalid(instruction & 0x7F, (instruction >> 12) & 0x7, instruction >> 25)
+
+    @staticmethod
+    def decode_fields(opcode, funct3, funct7):
+        """
+        Decodes an instruction given its opcode, funct3 and funct7.
+
+        :param opcode: instruction opcode
+        :type opcode: int
+        :param funct3: instruction funct3 field
+        :type funct3: int
+        :param funct7: instruction funct7 field
+        :type funct7: int
+        :return: the control signals of the instruction
+        :rtype: SignalBundle
+        :raises: ValueError if the combination is not a valid RV32I instruction
+        """
+        try:
+            return Decoder.TABLE[_key(opcode, funct3, funct7)]
+        except KeyError:
+            Decoder.raise_invalid(opcode, funct3, funct7)
+
+    @staticmethod
+    def raise_invalid(opcode, funct3, funct7):
+        """
+        Raises the error for an instruction that is not in the decode table.
+
+        :param opcode: instruction opcode
+        :type opcode: int
+        :param funct3: instruction funct3 field
+        :type funct3: int
+        :param funct7: instruction funct7 field
+        :type funct7: int
+        :return: None
+        :rtype: NoneType
+        :raises: ValueError always
+        """
+        if opcode not in OPCODE_TYPES:
+            raise ValueError(f"Invalid instruction! Opcode ({opcode}) not supported!")
+        raise ValueError(
+            "Invalid combination of opcode ({}), funct3 ({}) and funct7 ({})".format(
+                opcode, funct3, funct7
+            )
+        )
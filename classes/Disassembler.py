@@ -0,0 +1,117 @@
+from classes.DecodeCache import DecodeCache
+from classes.Decoder import KEY_MASK, SYSTEM_INSTRUCTIONS, Decoder
+from classes.InstructionType import InstructionType
+from utils.encode_instruction import MNEMONICS
+
+# Opcode -> format of the operands (rd, rs1, rs2, imm - signed immediate, shamt - shift amount, upper - imm[31:12])
+OPERAND_FORMATS = {
+    0x33: "x{rd}, x{rs1}, x{rs2}",
+    0x13: "x{rd}, x{rs1}, {imm}",
+    0x03: "x{rd}, {imm}(x{rs1})",
+    0x67: "x{rd}, {imm}(x{rs1})",
+    0x23: "x{rs2}, {imm}(x{rs1})",
+    0x63: "x{rs1}, x{rs2}, {imm}",
+    0x37: "x{rd}, 0x{upper:X}",
+    0x17: "x{rd}, 0x{upper:X}",
+    0x6F: "x{rd}, {imm}",
+}
+
+# Format of the shifts with an immediate (slli, srli, srai), whose immediate also holds funct7
+SHIFT_FORMAT = "x{rd}, x{rs1}, {shamt}"
+
+
+def _build_table():
+    """
+    Builds the disassembly table: the format of the Assembly text of every entry of the decode table (Decoder.TABLE),
+    with the same keys (the instruction bits of opcode, funct3 and funct7). The mnemonics are the ones of the
+    assembler (utils.encode_instruction.MNEMONICS), so the text can be assembled again.
+
+    :return: format of the Assembly text keyed on the instruction bits of opcode, funct3 and funct7
+    :rtype: dict
+    """
+    names = {
+        (mnemonic.opcode, mnemonic.funct3, mnemonic.funct7): name
+        for name, mnemonic in MNEMONICS.items()
+        if mnemonic.type not in (InstructionType.PSEUDO, InstructionType.SYSTEM)
+    }
+    table = {}
+    for key in Decoder.TABLE:
+        opcode, funct3, funct7 = key & 0x7F, (key >> 12) & 0x7, key >> 25
+        # funct7 (and funct3 for U and UJ types) is only part of the key of R-types and shifts
+        name = names.get((opcode, funct3, funct7)) or names.get((opcode, funct3, 0)) or names[(opcode, 0, 0)]
+        operands = SHIFT_FORMAT if opcode == 0x13 and funct3 in (0x1, 0x5) else OPERAND_FORMATS[opcode]
+        table[key] = f"{name} {operands}"
+    return table
+
+
+class Disassembler:
+    """
+    The Disassembler class turns instruction words back into Assembly text. The mnemonic and the format of the
+    operands come from a table with the same keys as the decode table of the simulator, the fields from the decoded
+    instruction (DecodeCache), and the text of each distinct instruction word is formatted once and cached, so
+    annotating an execution trace costs a dictionary lookup per instruction.
+
+    Immediates are the ones the simulator executes (branch and jump offsets are relative to the instruction), and
+    words that are not valid RV32I instructions are shown as ".word 0x...".
+
+        decode_cache (DecodeCache) - cache used to decode the instructions (e.g. the one of the processor)
+        entries (dict) - Assembly text keyed on the instruction word
+    """
+
+    TABLE = _build_table()
+
+    def __init__(self, decode_cache=None):
+        """
+        Constructor method
+
+        :param decode_cache: cache used to decode the instructions (default: a new one)
+        :type decode_cache: DecodeCache, optional
+        """
+        self.decode_cache = decode_cache if decode_cache is not None else DecodeCache()
+        self.entries = {}
+
+    def disassemble(self, instruction):
+        """
+        Returns the Assembly text of an instruction.
+
+        :param instruction: 32-bit instruction word
+        :type instruction: int
+        :return: the Assembly text
+        :rtype: str
+        """
+        text = self.entries.get(instruction)
+        if text is None:
+            text = self.entries[instruction] = self._format(instruction)
+        return text
+
+    def disassemble_all(self, instructions):
+        """
+        Returns the Assembly text of a sequence of instructions, e.g. the instruction words of an execution trace.
+
+        :param instructions: 32-bit instruction words
+        :type instructions: iterable
+        :return: the Assembly text of each instruction
+        :rtype: list
+        """
+        lookup = self.entries.get
+        disassemble = self.disassemble
+        return [lookup(instruction) or disassemble(instruction) for instruction in instructions]
+
+    def clear(self):
+        """
+        Removes all the entries of the cache.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.entries = {}
+
+    def _format(self, instruction):
+        template = self.TABLE.get(instruction & KEY_MASK)
+        if template is None:
+            return SYSTEM_INSTRUCTIONS.get(instruction) or f".word 0x{instruction:08X}"
+        decoded = self.decode_cache.decode(instruction)
+        imm = decoded.imm - (1 << 32) if decoded.imm & 0x80000000 else decoded.imm
+        return template.format(
+            rd=decoded.rd, rs1=decoded.rs1, rs2=decoded.rs2, imm=imm, shamt=imm & 0x1F, upper=decoded.imm >> 12
+        )
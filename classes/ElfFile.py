@@ -0,0 +1,201 @@
+import mmap
+import struct
+from bisect import bisect_right
+from collections import namedtuple
+
+ELF_MAGIC = b"\x7fELF"
+ELFCLASS32 = 1
+ELFDATA2LSB = 1
+EM_RISCV = 243
+
+PT_LOAD = 1
+PF_X = 1
+PF_W = 2
+PF_R = 4
+
+SHT_SYMTAB = 2
+SHN_UNDEF = 0
+
+STT_NOTYPE = 0
+STT_OBJECT = 1
+STT_FUNC = 2
+
+HEADER = struct.Struct("<16sHHIIIIIHHHHHH")
+PROGRAM_HEADER = struct.Struct("<IIIIIIII")
+SECTION_HEADER = struct.Struct("<IIIIIIIIII")
+SYMBOL = struct.Struct("<IIIBBH")
+
+
+class Segment(namedtuple("Segment", ["type", "offset", "address", "file_size", "memory_size", "flags"])):
+    """
+    The Segment class holds a program header of an ELF file.
+
+        type (int) - type of the segment (PT_LOAD for the segments loaded into memory)
+        offset (int) - offset of the contents of the segment in the file
+        address (int) - virtual address of the segment
+        file_size (int) - number of bytes of the segment in the file
+        memory_size (int) - number of bytes of the segment in memory (the bytes after file_size are zeros, e.g. .bss)
+        flags (int) - permissions of the segment (PF_X, PF_W, PF_R)
+    """
+
+    __slots__ = ()
+
+
+class Symbol(namedtuple("Symbol", ["name", "address", "size", "type", "binding"])):
+    """
+    The Symbol class holds an entry of the symbol table of an ELF file.
+
+        name (str) - name of the symbol
+        address (int) - value of the symbol (its address for functions and objects)
+        size (int) - size of the symbol in bytes (0 if unknown, e.g. labels)
+        type (int) - type of the symbol (STT_NOTYPE, STT_OBJECT, STT_FUNC...)
+        binding (int) - binding of the symbol (0 - local, 1 - global, 2 - weak)
+    """
+
+    __slots__ = ()
+
+
+class ElfFile:
+    """
+    The ElfFile class reads a statically linked ELF32 little-endian RISC-V executable. The file is memory-mapped
+    (mmap), so only the headers, the symbol table and the contents of the segments actually used are read.
+
+        file (str) - path of the file
+        mapping (mmap) - the mapped file
+        entry (int) - address of the first instruction to be executed (e_entry)
+        segments (list) - program headers of the file (Segment)
+        symbols (list) - symbol table of the file (Symbol), empty if the file is stripped
+    """
+
+    def __init__(self, file):
+        """
+        Constructor method
+
+        :param file: path of the ELF file
+        :type file: str
+        :raises: ValueError if the file is not an ELF32 little-endian RISC-V file or its headers are truncated
+        """
+        self.file = file
+        with open(file, "rb") as f:
+            try:
+                self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Invalid ELF file ({file}). The file is empty!")
+        try:
+            self._read_headers()
+        except struct.error:
+            self.close()
+            raise ValueError(f"Invalid ELF file ({file}). The headers are truncated!")
+        except ValueError:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _read_headers(self):
+        (
+            ident, _, machine, _, self.entry, phoff, shoff, _, _, phentsize, phnum, shentsize, shnum, _
+        ) = HEADER.unpack_from(self.mapping)
+        if ident[:4] != ELF_MAGIC:
+            raise ValueError(f"Invalid ELF file ({self.file}). Wrong magic number!")
+        if ident[4] != ELFCLASS32 or ident[5] != ELFDATA2LSB:
+            raise ValueError(f"Invalid ELF file ({self.file}). Only ELF32 little-endian files are supported!")
+        if machine != EM_RISCV:
+            raise ValueError(f"Invalid ELF file ({self.file}). Machine ({machine}) is not RISC-V!")
+        self.segments = []
+        for i in range(phnum):
+            segment_type, offset, address, _, file_size, memory_size, flags, _ = PROGRAM_HEADER.unpack_from(
+                self.mapping, phoff + i * phentsize
+            )
+            self.segments.append(Segment(segment_type, offset, address, file_size, memory_size, flags))
+        sections = [SECTION_HEADER.unpack_from(self.mapping, shoff + i * shentsize) for i in range(shnum)]
+        self.symbols = []
+        for _, section_type, _, _, offset, size, link, _, _, entsize in sections:
+            if section_type == SHT_SYMTAB:
+                strings = sections[link][4]
+                for i in range(1, size // (entsize or SYMBOL.size)):
+                    name, value, symbol_size, info, _, shndx = SYMBOL.unpack_from(
+                        self.mapping, offset + i * (entsize or SYMBOL.size)
+                    )
+                    if shndx != SHN_UNDEF:
+                        self.symbols.append(
+                            Symbol(self._read_string(strings + name), value, symbol_size, info & 0xF, info >> 4)
+                        )
+        self._symbols_by_name = {symbol.name: symbol for symbol in self.symbols if symbol.name}
+        self._locations = sorted(
+            (symbol.address, symbol.name, symbol.size)
+            for symbol in self.symbols
+            if symbol.name and symbol.type in (STT_NOTYPE, STT_OBJECT, STT_FUNC)
+        )
+        self._location_addresses = [address for address, _, _ in self._locations]
+
+    def _read_string(self, offset):
+        end = self.mapping.find(b"\x00", offset)
+        return self.mapping[offset:end].decode()
+
+    def close(self):
+        """
+        Closes the mapping of the file (the headers and the symbol table remain available).
+
+        :return: None
+        :rtype: NoneType
+        """
+        if not self.mapping.closed:
+            self.mapping.close()
+
+    def get_load_segments(self):
+        """
+        Returns the segments loaded into memory (PT_LOAD).
+
+        :return: the loadable segments
+        :rtype: list
+        """
+        return [segment for segment in self.segments if segment.type == PT_LOAD]
+
+    def get_segment_data(self, segment):
+        """
+        Returns the contents of a segment as in memory: the bytes in the file followed by zeros up to the size of the
+        segment in memory (.bss).
+
+        :param segment: the segment
+        :type segment: Segment
+        :return: the contents of the segment
+        :rtype: bytes
+        :raises: ValueError if the segment is not entirely inside the file
+        """
+        if segment.offset + segment.file_size > len(self.mapping):
+            raise ValueError(f"Invalid ELF file ({self.file}). Segment at 0x{segment.address:08X} is truncated!")
+        data = self.mapping[segment.offset:segment.offset + segment.file_size]
+        return data + bytes(max(0, segment.memory_size - segment.file_size))
+
+    def get_symbol(self, name):
+        """
+        Returns a symbol given its name.
+
+        :param name: name of the symbol
+        :type name: str
+        :return: the symbol or None if there is no symbol with that name
+        :rtype: Symbol|NoneType
+        """
+        return self._symbols_by_name.get(name)
+
+    def symbolize(self, address):
+        """
+        Returns the symbol (function, object or label) containing an address and the offset of the address from it.
+
+        :param address: the address
+        :type address: int
+        :return: name of the symbol and offset or None if no symbol contains the address
+        :rtype: tuple|NoneType
+        """
+        index = bisect_right(self._location_addresses, address) - 1
+        if index < 0:
+            return None
+        start, name, size = self._locations[index]
+        if size and address >= start + size:
+            return None
+        return name, address - start
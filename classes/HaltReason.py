@@ -0,0 +1,24 @@
+from enum import Enum
+
+from classes.Decoder import EBREAK, ECALL
+
+
+class HaltReason(Enum):
+    """
+    The HaltReason Enum class defines why the execution of a program stopped.
+    """
+
+    ZERO_WORD = "zero word"
+    ECALL = "ecall"
+    EBREAK = "ebreak"
+    MAX_INSTRUCTIONS = "max instructions"
+    DEADLINE = "deadline"
+    OUT_OF_BOUNDS = "out of bounds"
+
+
+# Instruction word -> reason of the halt when it is fetched
+HALT_REASONS = {
+    0: HaltReason.ZERO_WORD,
+    ECALL: HaltReason.ECALL,
+    EBREAK: HaltReason.EBREAK,
+}
@@ -0,0 +1,137 @@
+from classes.ALU import MASK_32
+
+
+class HookRegistry:
+    """
+    The HookRegistry class holds the callbacks of the plugins observing the execution of a processor, by event:
+        - on_retire(pc, instruction) - after every instruction
+        - on_load(pc, address, size, value) - after a load (value as written to rd, 0 if rd is x0)
+        - on_store(pc, address, size, value) - after a store (value written to the data memory)
+        - on_branch(pc, target, taken) - after a branch
+        - on_jump(pc, target, rd) - after 'jal' or 'jalr' (rd is the link register, e.g. 1 for a call)
+    The events of an instruction come before its on_retire.
+
+    The engines bind the callbacks when a run starts (bind()) and only generate the calls of the bound events, so a
+    processor without callbacks runs exactly the loops it runs without the registry. Callbacks registered or removed
+    during a run are used from the next run.
+
+        callbacks (dict) - list of callbacks keyed on the event
+        bound (dict) - functions returned by bind() (None if the callbacks changed since)
+    """
+
+    EVENTS = ("on_retire", "on_load", "on_store", "on_branch", "on_jump")
+
+    def __init__(self):
+        """
+        Constructor method
+        """
+        self.callbacks = {event: [] for event in HookRegistry.EVENTS}
+        self.bound = None
+
+    def register(self, event, callback):
+        """
+        Registers a callback for an event.
+
+        :param event: the event (one of EVENTS)
+        :type event: str
+        :param callback: the function called on the event
+        :type callback: function
+        :return: the callback
+        :rtype: function
+        :raises: ValueError if the event is not supported
+        """
+        if event not in self.callbacks:
+            raise ValueError(f"Invalid event ({event}). Allowed values are: {', '.join(HookRegistry.EVENTS)}.")
+        self.callbacks[event].append(callback)
+        self.bound = None
+        return callback
+
+    def unregister(self, event, callback):
+        """
+        Removes a callback of an event.
+
+        :param event: the event (one of EVENTS)
+        :type event: str
+        :param callback: the function called on the event
+        :type callback: function
+        :return: None
+        :rtype: NoneType
+        :raises: ValueError if the callback is not registered for the event
+        """
+        if callback not in self.callbacks.get(event, ()):
+            raise ValueError(f"The callback is not registered for {event}!")
+        self.callbacks[event].remove(callback)
+        self.bound = None
+
+    def clear(self):
+        """
+        Removes all the callbacks.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.callbacks = {event: [] for event in HookRegistry.EVENTS}
+        self.bound = None
+
+    def bind(self):
+        """
+        Returns a single function per event with callbacks: the callback itself, or a function calling all of them
+        in the order they were registered. The same functions are returned until the callbacks change.
+
+        :return: the functions keyed on the event, empty if there are no callbacks
+        :rtype: dict
+        """
+        if self.bound is not None:
+            return self.bound
+        hooks = {}
+        for event, callbacks in self.callbacks.items():
+            if len(callbacks) == 1:
+                hooks[event] = callbacks[0]
+            elif callbacks:
+                hooks[event] = self._chain(tuple(callbacks))
+        self.bound = hooks
+        return hooks
+
+    @staticmethod
+    def call_decoded(hooks, datapath, pc, decoded, address):
+        """
+        Calls the bound hooks of an instruction executed by the datapath, after its execution.
+
+        :param hooks: callbacks keyed on the event (see bind())
+        :type hooks: dict
+        :param datapath: the datapath that executed the instruction
+        :type datapath: Datapath
+        :param pc: address of the instruction
+        :type pc: int
+        :param decoded: the decoded instruction
+        :type decoded: DecodedInstruction
+        :param address: address of the data memory accessed (see TraceRecorder.get_address(), computed before the
+            execution)
+        :type address: int
+        :return: None
+        :rtype: NoneType
+        """
+        _, _, _, wb_sel, mem_rw, _, _, _, reg_w_en, size, _ = decoded.signals
+        if decoded.comparison_type is not None:
+            if "on_branch" in hooks:
+                hooks["on_branch"](pc, (pc + decoded.imm) & MASK_32, bool(datapath.pc_sel))
+        elif wb_sel == 2:
+            if "on_jump" in hooks:
+                hooks["on_jump"](pc, datapath.get_pc(), decoded.rd)
+        elif mem_rw:
+            if "on_store" in hooks:
+                value = datapath.reg_files.get_value(decoded.rs2) & ((1 << 8 * size) - 1)
+                hooks["on_store"](pc, address, size, value)
+        elif wb_sel == 0 and reg_w_en:
+            if "on_load" in hooks:
+                hooks["on_load"](pc, address, size, datapath.reg_files.get_value(decoded.rd) & MASK_32)
+        if "on_retire" in hooks:
+            hooks["on_retire"](pc, decoded.instruction)
+
+    @staticmethod
+    def _chain(callbacks):
+        def hook(*args):
+            for callback in callbacks:
+                callback(*args)
+
+        return hook
@@ -7,6 +7,11 @@ class ImmediateGenerator:
     The ImmediateGenerator class represents a RISC-V processor block that gets two inputs: a 25-bit value from an
     instruction, and a selection value (type of instruction) and generates an output immediate, sign extending it
     appropriately.
+
+    The immediate is generated once and kept until the selection or the input change.
+
+        evaluations (int) - number of times the immediate was generated
+        evaluations_avoided (int) - number of calls to get_immediate() that returned the immediate already generated
     """
 
     def __init__(self):
@@ -17,6 +22,9 @@ class ImmediateGenerator:
         self.imm_in = None
         self.imm_out = None
         self.sign = None
+        self.changed = True
+        self.evaluations = 0
+        self.evaluations_avoided = 0
 
     def set_selection(self, select_value):
         """
@@ -28,6 +36,7 @@ class ImmediateGenerator:
         :rtype: NoneType
         """
         self.imm_sel = select_value
+        self.changed = True
 
     def pass_immediate(self, inst_imm):
         """
@@ -40,15 +49,20 @@ class ImmediateGenerator:
         """
         self.sign = mask_bits(inst_imm, 24, 24)
         self.imm_in = inst_imm
+        self.changed = True
 
     def get_immediate(self):
         """
-        Returns the immediate generated based on the instruction.
+        Returns the immediate generated based on the instruction, generating it only if the selection or the input
+        changed since it was last generated.
 
         :return: immediate generated based on the instruction.
         :rtype: int
         """
-        self.generate()
+        if self.changed:
+            self.generate()
+        else:
+            self.evaluations_avoided += 1
         return self.imm_out
 
     def generate(self):
@@ -73,6 +87,8 @@ class ImmediateGenerator:
         :return: None
         :rtype: NoneType
         """
+        self.changed = False
+        self.evaluations += 1
         num = 0
         if self.imm_sel == "I":
             num |= mask_bits(self.imm_in, 13, 24)
@@ -1,8 +1,16 @@
-from utils.encode_instructions import encode_instructions
-from utils.get_instructions_asm_file import get_instructions_asm_file
+import sys
+from array import array
+
+from classes.Disassembler import Disassembler
+from utils.binary_program import read_binary_program
+from utils.encode_instructions import assemble_file, assemble_text, stream_assemble_file
 from utils.mask_bits import mask_bits
 from utils.write_file_encoded_instructions import write_file_encoded_instructions
 
+# Address after the last instruction an image can be loaded up to: the memory holds every word from address 0, so an
+# image linked higher (e.g. at 0x80000000) would allocate gigabytes before loading a single word
+MAX_IMAGE_END = 0x1000000
+
 
 class InstructionMemory:
     """
@@ -10,6 +18,8 @@ class InstructionMemory:
 
         instructions (list) - list of instructions encoded (32 bits)
         instructions_bytes (list) - list of instructions encoded (8 bits)
+        generation (int) - incremented every time the contents of the memory change
+        symbols (dict) - symbol table of the loaded program, the address of each label keyed on its name
     """
 
     def __init__(self, words=32, encoded_instructions=None):
@@ -22,6 +32,8 @@ class InstructionMemory:
         :type encoded_instructions: list, optional
         """
         self.inst_out = None
+        self.generation = 0
+        self.symbols = {}
         if not encoded_instructions:
             self.instructions = [0] * words
             self.instructions_bytes = [0] * words * 4
@@ -52,16 +64,51 @@ class InstructionMemory:
 
     def fill_memory(self, encoded_instructions):
         """
-        Fills the instruction memory (list) with the given encoded instructions (copies the list).
+        Fills the instruction memory (list) with the given encoded instructions (copies the list). If the instructions
+        do not fit, the memory is extended so that a zero word follows them.
 
         :param encoded_instructions: encoded instructions
         :type encoded_instructions: list
         :return: None
         :rtype: NoneType
         """
+        if len(encoded_instructions) > len(self.instructions):
+            self.instructions.extend([0] * (len(encoded_instructions) + 1 - len(self.instructions)))
+            self.instructions_bytes.extend([0] * (4 * len(self.instructions) - len(self.instructions_bytes)))
         for i in range(len(encoded_instructions)):
             self.instructions[i] = encoded_instructions[i]
         self.fill_memory_bytes(encoded_instructions)
+        self.generation += 1
+
+    def fill_memory_stream(self, encoded_instructions):
+        """
+        Fills the instruction memory with encoded instructions given one at a time (e.g. by a generator), without a
+        list of all of them. The memory is extended as needed so that a zero word follows the instructions.
+
+        :param encoded_instructions: encoded instructions
+        :type encoded_instructions: iterable
+        :return: number of instructions
+        :rtype: int
+        """
+        instructions = self.instructions
+        instructions_bytes = self.instructions_bytes
+        count = 0
+        for inst in encoded_instructions:
+            if count < len(instructions):
+                instructions[count] = inst
+            else:
+                instructions.append(inst)
+            if 4 * count < len(instructions_bytes):
+                instructions_bytes[4 * count:4 * count + 4] = inst.to_bytes(4, "little")
+            else:
+                instructions_bytes.extend(inst.to_bytes(4, "little"))
+            count += 1
+        if count >= len(instructions):
+            instructions.append(0)
+        if 4 * len(instructions) > len(instructions_bytes):
+            instructions_bytes.extend([0] * (4 * len(instructions) - len(instructions_bytes)))
+        self.generation += 1
+        return count
 
     def fill_memory_bytes(self, encoded_instructions):
         """
@@ -102,29 +149,130 @@ class InstructionMemory:
             print(f"Error: An error occurred while trying to read {file}")
             return
         self.fill_memory(encoded_instructions)
+        self.symbols = {}
+        return encoded_instructions
+
+    def fill_memory_image(self, image, address=0):
+        """
+        Fills the instruction memory with instructions given as 32-bit little-endian words, starting at a given
+        address. The memory is extended if needed so that at least one zero word follows the instructions, up to
+        MAX_IMAGE_END.
+
+        :param image: encoded instructions (little-endian words)
+        :type image: bytes-like
+        :param address: address of the first instruction (default: 0)
+        :type address: int, optional
+        :return: encoded instructions
+        :rtype: list
+        :raises: ValueError if the address is not a multiple of 4 or the image ends above MAX_IMAGE_END.
+        """
+        if address % 4 != 0:
+            raise ValueError(f"Invalid address ({address}). Must be a multiple of 4!")
+        if address + len(image) > MAX_IMAGE_END:
+            raise ValueError(
+                f"The image at 0x{address:08X} ends above 0x{MAX_IMAGE_END:08X}, the end of the instruction memory!"
+            )
+        words = array("I")
+        words.frombytes(image)
+        if sys.byteorder == "big":
+            words.byteswap()
+        encoded_instructions = words.tolist()
+        start = address // 4
+        end = start + len(encoded_instructions)
+        if end >= len(self.instructions):
+            self.instructions.extend([0] * (end + 1 - len(self.instructions)))
+        if 4 * end >= len(self.instructions_bytes):
+            self.instructions_bytes.extend([0] * (4 * (end + 1) - len(self.instructions_bytes)))
+        self.instructions[start:end] = encoded_instructions
+        self.instructions_bytes[4 * start:4 * end] = image
+        self.generation += 1
         return encoded_instructions
 
-    def load_instructions_from_asm_file(self, file):
+    def load_instructions_from_binary_file(self, file):
         """
-        Loads instructions from RISC-V Assembly file.
+        Loads instructions from a binary program (raw 32-bit little-endian words with an optional header, see
+        utils.binary_program), without any parsing.
+
+        :param file: binary file containing the program
+        :type file: file
+        :return: the program read from the file
+        :rtype: BinaryProgram
+        """
+        program = read_binary_program(file)
+        self.fill_memory_image(program.image, program.load_address)
+        self.symbols = {}
+        return program
+
+    def load_instructions_from_asm_file(self, file, write_artifact=False, cache=None, workers=1):
+        """
+        Loads instructions from RISC-V Assembly file. The instructions are encoded in memory; the file with the
+        encoded instructions (the path of the asm file without the extension) is only written if requested.
 
         :param file: asm file containing instructions
         :type file: file
+        :param write_artifact: also write the file with the encoded instructions (default: False)
+        :type write_artifact: bool, optional
+        :param cache: assembly cache used to skip the assembler for programs already encoded (default: None)
+        :type cache: AssemblyCache, optional
+        :param workers: number of processes assembling the program (see utils.encode_instruction.assemble())
+        :type workers: int, optional
         :return: encoded instructions
         :rtype: list
         """
-        encoded_instructions_file = write_file_encoded_instructions(file)
-        return self.load_instructions_from_file(encoded_instructions_file)
+        program = cache.encode_file(file, workers) if cache is not None else assemble_file(file, workers)
+        encoded_instructions = program.instructions
+        self.symbols = program.symbols
+        if write_artifact:
+            write_file_encoded_instructions(file, encoded_instructions)
+        self.fill_memory(encoded_instructions)
+        return encoded_instructions
+
+    def load_instructions_from_asm(self, text, cache=None, workers=1):
+        """
+        Loads instructions from RISC-V Assembly source given as a string.
+
+        :param text: Assembly source
+        :type text: str
+        :param cache: assembly cache used to skip the assembler for programs already encoded (default: None)
+        :type cache: AssemblyCache, optional
+        :param workers: number of processes assembling the program (see utils.encode_instruction.assemble())
+        :type workers: int, optional
+        :return: encoded instructions
+        :rtype: list
+        """
+        program = cache.encode(text, workers) if cache is not None else assemble_text(text, workers)
+        encoded_instructions = program.instructions
+        self.symbols = program.symbols
+        self.fill_memory(encoded_instructions)
+        return encoded_instructions
+
+    def load_instructions_from_asm_stream(self, file):
+        """
+        Loads instructions from a RISC-V Assembly file of any size: the file is assembled as a stream (see
+        utils.encode_instructions.stream_assemble_file()) straight into the memory, without the source or a list of
+        the encoded instructions in memory.
+
+        :param file: asm file containing instructions
+        :type file: str
+        :return: number of instructions
+        :rtype: int
+        """
+        symbols = {}
+        count = self.fill_memory_stream(stream_assemble_file(file, symbols))
+        self.symbols = symbols
+        return count
 
     def print_instructions(self):
         """
-        Prints all the instructions.
+        Prints all the instructions, with their Assembly text.
 
         :return: None
         :rtype: NoneType
         """
+        disassembler = Disassembler()
         for i in range(len(self.instructions)):
-            print("Inst {:04X}: 0x{:08X}".format(i, self.fetch_instruction(i * 4)))
+            instruction = self.fetch_instruction(i * 4)
+            print("Inst {:04X}: 0x{:08X}  {}".format(i, instruction, disassembler.disassemble(instruction)))
 
     def extend_memory(self, num_of_new_instructions):
         """
@@ -136,3 +284,4 @@ class InstructionMemory:
         :rtype: NoneType
         """
         self.instructions.extend([0] * num_of_new_instructions)
+        self.generation += 1
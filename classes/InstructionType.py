@@ -13,3 +13,4 @@ class InstructionType(Enum):
     SB = "SB"
     UJ = "UJ"
     PSEUDO = "PSEUDO"
+    SYSTEM = "SYSTEM"
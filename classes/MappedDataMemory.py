@@ -0,0 +1,256 @@
+import mmap
+
+from classes.ByteDataMemory import SIGN_EXTENSIONS, STRUCTS
+from classes.DataMemory import DataMemory
+from classes.PagedDataMemory import PagedDataMemory
+
+
+class MappedDataMemory(DataMemory):
+    """
+    This class represents a data memory with a host file mapped (mmap) as a region of the address space, starting at
+    a base address. Loads and stores inside the region go straight to the mapping, so even a file of hundreds of
+    megabytes is available without being read; addresses outside the region go to an underlying data memory (a
+    PagedDataMemory covering the address space by default).
+
+    The mapping is copy-on-write by default: the program sees its own stores but the file is never modified, and the
+    final memory image can be written to another file with save(). A shared mapping writes the stores back to the
+    file itself.
+
+        file (str) - path of the mapped file
+        base (int) - address of the first byte of the region
+        end (int) - address after the last byte of the region
+        shared (bool) - True if the stores are written to the file
+        mapping (mmap) - the mapped file
+        memory (DataMemory) - data memory holding the addresses outside the region
+    """
+
+    def __init__(self, file, base=0, shared=False, memory=None):
+        """
+        Initialize the data memory mapping a file.
+
+        :param file: The path of the file to map (it must not be empty).
+        :type file: str
+        :param base: The address where the file is mapped, a multiple of 4 (default: 0).
+        :type base: int, optional
+        :param shared: Writes the stores back to the file instead of keeping a private copy (default: False).
+        :type shared: bool, optional
+        :param memory: The data memory for the addresses outside the region (default: new PagedDataMemory).
+        :type memory: DataMemory, optional
+        :raises: ValueError if the base address is not a multiple of 4 or the file is empty.
+        """
+        if base % 4 != 0:
+            raise ValueError(f"Invalid base address ({base}). Must be a multiple of 4!")
+        super().__init__(0)
+        self.memory = memory if memory is not None else PagedDataMemory()
+        self.words = self.memory.words
+        self.file = file
+        self.base = base
+        self.shared = shared
+        with open(file, "r+b" if shared else "rb") as f:
+            self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_WRITE if shared else mmap.ACCESS_COPY)
+        self.end = base + len(self.mapping)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def set_enable(self, write=True, read=True):
+        """
+        Set the write and read enable flags for the data memory (and the underlying data memory).
+
+        :param write: Value indicating whether writing to the memory should be enabled.
+        :type write: int
+        :param read: Value indicating whether reading from the memory should be enabled.
+        :type read: int
+        :return: None
+        :rtype: NoneType
+        """
+        self.write_enable = write
+        self.read_enable = read
+        self.memory.set_enable(write, read)
+
+    def get_value(self, address):
+        """
+        Get the value stored in a specific memory address.
+
+        :param address: The memory address to retrieve the value from.
+        :type address: int
+        :return: The value stored in the given memory address.
+        :rtype: int
+        """
+        if self.base <= address < self.end:
+            return self.mapping[address - self.base]
+        return self.memory.get_value(address)
+
+    def load(self, address, size, uns):
+        """
+        Loads a value from memory at a given address and size.
+
+        :param uns: Zero-extends the output if set.
+        :type uns: bool
+        :param address: The address of the memory location to be loaded.
+        :type address: int
+        :param size: The size of the value to be loaded. Must be one of
+                     DataMemory.BYTE - 1, DataMemory.HALF_WORD - 2, or DataMemory.WORD - 4.
+        :type size: int
+        :return: The value stored at the given address and size, or a string
+                 'Read Enable is unset!' if read enable is not set.
+        :rtype: int
+        :raises: ValueError if the size is not one of the specified constants.
+                  IndexError if the address and size result in accessing memory
+                  out of bounds.
+        """
+        if not (self.base <= address < self.end):
+            self.data_out = self.memory.load(address, size, uns)
+            return self.data_out
+        if not self.read_enable:
+            return "Read Enable is unset!"
+        elif size not in SIGN_EXTENSIONS:
+            raise ValueError(
+                f"Invalid size argument ({size}), must be DataMemory.BYTE, "
+                "DataMemory.HALF_WORD, or DataMemory.WORD!"
+            )
+        elif address + size - 1 >= self.end:
+            raise IndexError(
+                f"Accessing out of bounds address ({address + size - 1}) in data memory!"
+            )
+        elif address % 4 != 0:
+            raise IndexError(f"Invalid address ({address}). Must be a multiple of 4!")
+        if size == DataMemory.BYTE:
+            self.data_out = self.mapping[address - self.base]
+        else:
+            self.data_out = STRUCTS[size].unpack_from(self.mapping, address - self.base)[0]
+        if uns or not self.data_out >> (8 * size - 1):
+            return self.data_out
+        return self.data_out | SIGN_EXTENSIONS[size]
+
+    def store(self, address, value, size):
+        """
+        Stores a value to the data memory at a specified address.
+
+        :param address: The address in data memory to store the value.
+        :type address: int
+        :param value: The value to be stored in data memory.
+        :type value: int
+        :param size: The size of the value to be stored, must be DataMemory.BYTE,
+                     DataMemory.HALF_WORD, or DataMemory.WORD.
+        :type size: int
+        :return: The value stored in data memory, or a string "Write Enable is unset!"
+                 if the write enable is not set.
+        :rtype: int
+        :raises ValueError: If the size argument is invalid or the value is greater
+                           than the maximum value for the specified size.
+        :raises IndexError: If the address is out of bounds for the specified size.
+        """
+        if not (self.base <= address < self.end):
+            self.data_in = value
+            return self.memory.store(address, value, size)
+        if not self.write_enable:
+            return "Write Enable is unset!"
+        elif size not in SIGN_EXTENSIONS:
+            raise ValueError(
+                f"Invalid size argument {(size)}, must be DataMemory.BYTE, "
+                "DataMemory.HALF_WORD, or DataMemory.WORD!"
+            )
+        elif address % 4 != 0:
+            raise IndexError(f"Invalid address ({address}). Must be a multiple of 4!")
+        elif size == DataMemory.WORD and value > 0xFFFFFFFF:
+            raise ValueError(f"Value ({value}) is greater than 0xFFFFFFFF.")
+        if address + size - 1 >= self.end:
+            raise IndexError(
+                f"Accessing out of bounds address ({address}) in data memory!"
+            )
+        if size == DataMemory.BYTE:
+            self.data_in = value & 0xFF
+            self.mapping[address - self.base] = self.data_in
+            return self.data_in
+        elif size == DataMemory.HALF_WORD:
+            self.data_in = value & 0xFFFF
+            STRUCTS[size].pack_into(self.mapping, address - self.base, self.data_in)
+            return self.data_in
+        self.data_in = value
+        STRUCTS[size].pack_into(self.mapping, address - self.base, value & 0xFFFFFFFF)
+        return value & 0xFFFFFFFF
+
+    def write_image(self, address, image):
+        """
+        Copies a block of bytes into the data memory starting at a given address (e.g. a segment of a program being
+        loaded), splitting it between the mapped region and the underlying data memory.
+
+        :param address: The address of the first byte.
+        :type address: int
+        :param image: The bytes to be copied.
+        :type image: bytes-like
+        :return: None
+        :rtype: NoneType
+        :raises IndexError: If the block does not fit in the data memory.
+        """
+        image = memoryview(image).cast("B")
+        end = address + len(image)
+        start = max(address, self.base)
+        stop = min(end, self.end)
+        if start >= stop:
+            self.memory.write_image(address, image)
+            return
+        if address < start:
+            self.memory.write_image(address, image[:start - address])
+        self.mapping[start - self.base:stop - self.base] = image[start - address:stop - address]
+        if stop < end:
+            self.memory.write_image(stop, image[stop - address:])
+
+    def print_data(self):
+        """
+        Prints the contents of the mapped region and of the underlying data memory, with each line showing the
+        address in hexadecimal and its value.
+
+        :return: None
+        :rtype: NoneType
+        """
+        for i in range(len(self.mapping)):
+            print("Pos {:0X}: 0x{:02X}".format(self.base + i, self.mapping[i]))
+        self.memory.print_data()
+
+    def clear_memory(self):
+        """
+        Clears the contents of data memory by setting all memory locations to 0 (including the mapped region).
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.mapping[:] = bytes(len(self.mapping))
+        self.memory.clear_memory()
+
+    def save(self, file):
+        """
+        Writes the current image of the mapped region to a file.
+
+        :param file: The path of the file to write.
+        :type file: str
+        :return: None
+        :rtype: NoneType
+        """
+        with open(file, "wb") as f:
+            f.write(self.mapping)
+
+    def flush(self):
+        """
+        Writes the stores of a shared mapping to the file (a copy-on-write mapping is never written to the file).
+
+        :return: None
+        :rtype: NoneType
+        """
+        if self.shared:
+            self.mapping.flush()
+
+    def close(self):
+        """
+        Flushes and closes the mapping.
+
+        :return: None
+        :rtype: NoneType
+        """
+        if not self.mapping.closed:
+            self.flush()
+            self.mapping.close()
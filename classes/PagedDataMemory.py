@@ -0,0 +1,228 @@
+from classes.ByteDataMemory import SIGN_EXTENSIONS, STRUCTS
+from classes.DataMemory import DataMemory
+
+PAGE_BITS = 12
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_OFFSET_MASK = PAGE_SIZE - 1
+
+# Content of the pages never written
+ZERO_PAGE = bytes(PAGE_SIZE)
+
+
+class PagedDataMemory(DataMemory):
+    """
+    This class represents a sparse data memory covering a large address space (the whole 32-bit address space by
+    default). The memory is split into 4 KiB pages, allocated as bytearrays the first time they are written (reads of
+    pages never written return zeros). The pages are kept in a dictionary keyed on the page number, with a small
+    direct-mapped page lookup cache in front of it, so accesses to recently used pages skip the dictionary.
+
+    The load and store interface is the same as in the DataMemory class.
+
+        pages (dict) - allocated pages keyed on the page number (address >> 12)
+        cache_hits (int) - number of accesses that found their page in the page lookup cache
+        cache_misses (int) - number of accesses that went to the page dictionary
+    """
+
+    def __init__(self, words=2**30, cache_size=64):
+        """
+        Initialize the data memory with a given number of words
+
+        :param words: The number of words of the address space (default: 2**30, 4 GiB).
+        :type words: int, optional
+        :param cache_size: The number of entries of the page lookup cache, a power of 2 (default: 64).
+        :type cache_size: int, optional
+        :raises: ValueError if the cache size is not a power of 2.
+        """
+        if cache_size < 1 or cache_size & (cache_size - 1):
+            raise ValueError(f"Invalid cache size ({cache_size}), must be a power of 2!")
+        super().__init__(0)
+        self.words = words
+        self.size = 4 * words
+        self.data = None
+        self.cache_size = cache_size
+        self.clear_memory()
+
+    def get_page(self, address, allocate=True):
+        """
+        Returns the page containing an address, looking it up in the page lookup cache first.
+
+        :param address: An address inside the page.
+        :type address: int
+        :param allocate: Allocates the page if it was never written, otherwise returns a read-only page of zeros.
+        :type allocate: bool, optional
+        :return: The page.
+        :rtype: bytearray|bytes
+        """
+        number = address >> PAGE_BITS
+        index = number & (self.cache_size - 1)
+        if self.cache_tags[index] == number:
+            self.cache_hits += 1
+            return self.cache_pages[index]
+        self.cache_misses += 1
+        page = self.pages.get(number)
+        if page is None:
+            if not allocate:
+                return ZERO_PAGE
+            page = self.pages[number] = bytearray(PAGE_SIZE)
+        self.cache_tags[index] = number
+        self.cache_pages[index] = page
+        return page
+
+    def get_value(self, address):
+        """
+        Get the value stored in a specific memory address.
+
+        :param address: The memory address to retrieve the value from.
+        :type address: int
+        :return: The value stored in the given memory address.
+        :rtype: int
+        """
+        return self.get_page(address, False)[address & PAGE_OFFSET_MASK]
+
+    def load(self, address, size, uns):
+        """
+        Loads a value from memory at a given address and size.
+
+        :param uns: Zero-extends the output if set.
+        :type uns: bool
+        :param address: The address of the memory location to be loaded.
+        :type address: int
+        :param size: The size of the value to be loaded. Must be one of
+                     DataMemory.BYTE - 1, DataMemory.HALF_WORD - 2, or DataMemory.WORD - 4.
+        :type size: int
+        :return: The value stored at the given address and size, or a string
+                 'Read Enable is unset!' if read enable is not set.
+        :rtype: int
+        :raises: ValueError if the size is not one of the specified constants.
+                  IndexError if the address and size result in accessing memory
+                  out of bounds.
+        """
+        if not self.read_enable:
+            return "Read Enable is unset!"
+        elif size not in SIGN_EXTENSIONS:
+            raise ValueError(
+                f"Invalid size argument ({size}), must be DataMemory.BYTE, "
+                "DataMemory.HALF_WORD, or DataMemory.WORD!"
+            )
+        elif address + size - 1 >= self.size:
+            raise IndexError(
+                f"Accessing out of bounds address ({address + size - 1}) in data memory!"
+            )
+        elif address % 4 != 0:
+            raise IndexError(f"Invalid address ({address}). Must be a multiple of 4!")
+        page = self.get_page(address, False)
+        if size == DataMemory.BYTE:
+            self.data_out = page[address & PAGE_OFFSET_MASK]
+        else:
+            self.data_out = STRUCTS[size].unpack_from(page, address & PAGE_OFFSET_MASK)[0]
+        if uns or not self.data_out >> (8 * size - 1):
+            return self.data_out
+        return self.data_out | SIGN_EXTENSIONS[size]
+
+    def store(self, address, value, size):
+        """
+        Stores a value to the data memory at a specified address, allocating its page if needed.
+
+        :param address: The address in data memory to store the value.
+        :type address: int
+        :param value: The value to be stored in data memory.
+        :type value: int
+        :param size: The size of the value to be stored, must be DataMemory.BYTE,
+                     DataMemory.HALF_WORD, or DataMemory.WORD.
+        :type size: int
+        :return: The value stored in data memory, or a string "Write Enable is unset!"
+                 if the write enable is not set.
+        :rtype: int
+        :raises ValueError: If the size argument is invalid or the value is greater
+                           than the maximum value for the specified size.
+        :raises IndexError: If the address is out of bounds for the specified size.
+        """
+        if not self.write_enable:
+            return "Write Enable is unset!"
+        elif size not in SIGN_EXTENSIONS:
+            raise ValueError(
+                f"Invalid size argument {(size)}, must be DataMemory.BYTE, "
+                "DataMemory.HALF_WORD, or DataMemory.WORD!"
+            )
+        elif address % 4 != 0:
+            raise IndexError(f"Invalid address ({address}). Must be a multiple of 4!")
+        elif size == DataMemory.WORD and value > 0xFFFFFFFF:
+            raise ValueError(f"Value ({value}) is greater than 0xFFFFFFFF.")
+        if address + size - 1 >= self.size:
+            raise IndexError(
+                f"Accessing out of bounds address ({address}) in data memory!"
+            )
+        page = self.get_page(address)
+        if size == DataMemory.BYTE:
+            self.data_in = value & 0xFF
+            page[address & PAGE_OFFSET_MASK] = self.data_in
+            return self.data_in
+        elif size == DataMemory.HALF_WORD:
+            self.data_in = value & 0xFFFF
+            STRUCTS[size].pack_into(page, address & PAGE_OFFSET_MASK, self.data_in)
+            return self.data_in
+        self.data_in = value
+        STRUCTS[size].pack_into(page, address & PAGE_OFFSET_MASK, value & 0xFFFFFFFF)
+        return value & 0xFFFFFFFF
+
+    def write_image(self, address, image):
+        """
+        Copies a block of bytes into the data memory starting at a given address (e.g. a segment of a program being
+        loaded). Unlike store(), the address does not need to be aligned and the write enable flag is not checked.
+        Pages only written with zeros (e.g. .bss) are not allocated.
+
+        :param address: The address of the first byte.
+        :type address: int
+        :param image: The bytes to be copied.
+        :type image: bytes-like
+        :return: None
+        :rtype: NoneType
+        :raises IndexError: If the block does not fit in the data memory.
+        """
+        if address < 0 or address + len(image) > self.size:
+            raise IndexError(
+                f"Accessing out of bounds address ({address + len(image) - 1}) in data memory!"
+            )
+        image = memoryview(image).cast("B")
+        position = 0
+        while position < len(image):
+            offset = (address + position) & PAGE_OFFSET_MASK
+            chunk = image[position:position + PAGE_SIZE - offset]
+            if self.get_page(address + position, False) is not ZERO_PAGE or chunk != ZERO_PAGE[:len(chunk)]:
+                self.get_page(address + position)[offset:offset + len(chunk)] = chunk
+            position += len(chunk)
+
+    def print_data(self):
+        """
+        Prints the contents of the allocated pages of data memory, with each line showing the address in hexadecimal
+        and its value.
+
+        :return: None
+        :rtype: NoneType
+        """
+        for number in sorted(self.pages):
+            page = self.pages[number]
+            for i in range(PAGE_SIZE):
+                print("Pos {:0X}: 0x{:02X}".format((number << PAGE_BITS) + i, page[i]))
+
+    def clear_memory(self):
+        """
+        Clears the contents of data memory, releasing all the pages.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.pages = {}
+        self.cache_tags = [None] * self.cache_size
+        self.cache_pages = [None] * self.cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def get_stats(self):
+        """
+        Returns the counters of the memory.
+
+        :return: number of allocated pages, hits and misses of the page lookup cache
+        :rtype: dict
+        """
+        return {"pages": len(self.pages), "cache_hits": self.cache_hits, "cache_misses": self.cache_misses}
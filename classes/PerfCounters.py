@@ -0,0 +1,222 @@
+from classes.Disassembler import Disassembler
+
+# Size of a load or store (control signal) -> name used in the stats
+ACCESS_SIZES = {1: "byte", 2: "half", 4: "word"}
+
+
+class PerfCounters:
+    """
+    The PerfCounters class counts what the processor executes. During a run the engines only keep two counters per
+    instruction, indexed by its address divided by 4: how many times it was executed and how many times it was a
+    taken branch, as reported by the engine (a branch to the next instruction goes there either way, so the direction
+    cannot be told from the next address). At the end of the run they are turned into the instruction mix, the
+    branches and the loads and stores by size, using the instruction words.
+
+    The counters are only updated when the processor has them (Processor(perf_counters=True)): otherwise the engines
+    run their loops without any counting.
+
+        executions (list) - number of executions of each instruction in the current run
+        taken (list) - number of times each branch was taken in the current run
+        instructions (int) - number of instructions retired by the runs
+        branches_taken (int) - number of taken branches
+        branches_not_taken (int) - number of branches not taken
+        jumps (int) - number of 'jal' and 'jalr' executed
+        loads (dict) - number of loads keyed on their size ("byte", "half", "word")
+        stores (dict) - number of stores keyed on their size ("byte", "half", "word")
+        mnemonics (dict) - number of executions keyed on the mnemonic
+        elapsed (float) - wall-clock time of the runs, in seconds
+        runs (int) - number of runs
+    """
+
+    def __init__(self):
+        """
+        Constructor method
+        """
+        self.clear()
+
+    def resize(self, size):
+        """
+        Extends the per-instruction counters to a number of instructions (e.g. after a bigger program was loaded).
+
+        :param size: number of instructions of the instruction memory
+        :type size: int
+        :return: None
+        :rtype: NoneType
+        """
+        if len(self.executions) < size:
+            self.executions += [0] * (size - len(self.executions))
+            self.taken += [0] * (size - len(self.taken))
+
+    def record(self, pc, taken):
+        """
+        Records the execution of an instruction.
+
+        :param pc: address of the instruction
+        :type pc: int
+        :param taken: True if the instruction is a branch that was taken
+        :type taken: bool
+        :return: None
+        :rtype: NoneType
+        """
+        self.executions[pc >> 2] += 1
+        if taken:
+            self.taken[pc >> 2] += 1
+
+    def record_block(self, start, end, taken):
+        """
+        Records the execution of a sequence of instructions where only the last one can be a branch.
+
+        :param start: address of the first instruction
+        :type start: int
+        :param end: address after the last instruction
+        :type end: int
+        :param taken: True if the last instruction is a branch that was taken
+        :type taken: bool
+        :return: None
+        :rtype: NoneType
+        """
+        executions = self.executions
+        for index in range(start >> 2, end >> 2):
+            executions[index] += 1
+        if taken:
+            self.taken[(end >> 2) - 1] += 1
+
+    def record_trace(self, ranges, branches, iterations, side):
+        """
+        Records the execution of a loop trace (see BlockTranslator.build_trace()): every iteration follows the blocks
+        of the trace and the direction of their branches, except the last one when the trace was left through a side
+        exit, which stops at the block left, its branch going the other way.
+
+        :param ranges: (start, end) address ranges of the blocks of the trace, in the order they are executed
+        :type ranges: tuple
+        :param branches: direction followed by the branch ending each block (True if taken, None if no branch)
+        :type branches: tuple
+        :param iterations: number of iterations started
+        :type iterations: int
+        :param side: number of the block of the side exit, from 1 (0 if the trace was not left through a side exit)
+        :type side: int
+        :return: None
+        :rtype: NoneType
+        """
+        full = iterations - 1 if side else iterations
+        executions = self.executions
+        taken = self.taken
+        for i, ((start, end), branch) in enumerate(zip(ranges, branches), 1):
+            times = full + 1 if i <= side else full
+            for index in range(start >> 2, end >> 2):
+                executions[index] += times
+            if branch:
+                # the branch of the block left went the other way in the last iteration
+                taken[(end >> 2) - 1] += full if i == side else times
+            elif i == side:
+                taken[(end >> 2) - 1] += 1
+
+    def record_run(self, result, instructions, decode_cache=None):
+        """
+        Records the outcome of a run, adding the counters of its instructions to the totals and resetting them.
+
+        :param result: the outcome of the run (see Processor.execute())
+        :type result: RunResult
+        :param instructions: the instruction words of the instruction memory during the run
+        :type instructions: list
+        :param decode_cache: cache used to decode the instructions (default: a new one)
+        :type decode_cache: DecodeCache, optional
+        :return: None
+        :rtype: NoneType
+        """
+        disassembler = Disassembler(decode_cache)
+        decode = disassembler.decode_cache.decode
+        mnemonics = self.mnemonics
+        for index, executions in enumerate(self.executions):
+            if not executions:
+                continue
+            decoded = decode(instructions[index])
+            _, _, _, wb_sel, mem_rw, _, _, _, _, size, _ = decoded.signals
+            if decoded.comparison_type is not None:
+                self.branches_taken += self.taken[index]
+                self.branches_not_taken += executions - self.taken[index]
+            elif wb_sel == 2:
+                self.jumps += executions
+            elif mem_rw:
+                self.stores[ACCESS_SIZES[size]] += executions
+            elif wb_sel == 0:
+                self.loads[ACCESS_SIZES[size]] += executions
+            name = disassembler.disassemble(decoded.instruction).split()[0]
+            mnemonics[name] = mnemonics.get(name, 0) + executions
+        self.executions = [0] * len(self.executions)
+        self.taken = [0] * len(self.taken)
+        self.instructions += result.instructions
+        self.elapsed += result.elapsed
+        self.runs += 1
+
+    def clear(self):
+        """
+        Resets all the counters.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.executions = []
+        self.taken = []
+        self.instructions = 0
+        self.branches_taken = 0
+        self.branches_not_taken = 0
+        self.jumps = 0
+        self.loads = dict.fromkeys(ACCESS_SIZES.values(), 0)
+        self.stores = dict.fromkeys(ACCESS_SIZES.values(), 0)
+        self.mnemonics = {}
+        self.elapsed = 0.0
+        self.runs = 0
+
+    def get_stats(self):
+        """
+        Returns the counters: retired instructions and cycles (one per instruction in the single cycle processor),
+        taken and not taken branches, jumps, loads and stores by size, executions of each mnemonic (from the most to
+        the least executed), number of runs, host wall-clock time and simulated MIPS.
+
+        :return: the counters
+        :rtype: dict
+        """
+        return {
+            "instructions": self.instructions,
+            "cycles": self.instructions,
+            "branches_taken": self.branches_taken,
+            "branches_not_taken": self.branches_not_taken,
+            "jumps": self.jumps,
+            "loads": dict(self.loads),
+            "stores": dict(self.stores),
+            "mnemonics": dict(sorted(self.mnemonics.items(), key=lambda item: (-item[1], item[0]))),
+            "runs": self.runs,
+            "wall_time": self.elapsed,
+            "mips": self.instructions / self.elapsed / 1e6 if self.elapsed else 0.0,
+        }
+
+    @staticmethod
+    def format_table(stats):
+        """
+        Formats the counters (see get_stats()) as a table.
+
+        :param stats: the counters
+        :type stats: dict
+        :return: the table, one counter per line
+        :rtype: str
+        """
+        total = stats["instructions"] or 1
+        lines = [
+            f"{'instructions':<24}{stats['instructions']:>14}",
+            f"{'cycles':<24}{stats['cycles']:>14}",
+            f"{'branches taken':<24}{stats['branches_taken']:>14}",
+            f"{'branches not taken':<24}{stats['branches_not_taken']:>14}",
+            f"{'jumps':<24}{stats['jumps']:>14}",
+        ]
+        lines += [f"{'loads (' + size + ')':<24}{count:>14}" for size, count in stats["loads"].items()]
+        lines += [f"{'stores (' + size + ')':<24}{count:>14}" for size, count in stats["stores"].items()]
+        lines += [
+            f"{'wall time (s)':<24}{stats['wall_time']:>14.6f}",
+            f"{'MIPS':<24}{stats['mips']:>14.3f}",
+            "instruction mix",
+        ]
+        lines += [
+            f"  {name:<22}{count:>14}{100 * count / total:>9.2f}%" for name, count in stats["mnemonics"].items()
+        ]
+        return "\n".join(lines)
@@ -1,7 +1,22 @@
+import sys
+import time
+from bisect import bisect_right
+
 from classes.Datapath import Datapath
+from classes.AssemblyCache import AssemblyCache
+from classes.BlockTranslator import BlockTranslator
+from classes.BranchProfile import BranchProfile
 from classes.ControlUnit import ControlUnit
-
-from utils.encode_instructions import encode_instructions_from_file
+from classes.DecodeCache import DecodeCache
+from classes.HaltReason import HALT_REASONS, HaltReason
+from classes.HookRegistry import HookRegistry
+from classes.PerfCounters import PerfCounters
+from classes.RunResult import DEADLINE_CHECK_INTERVAL, RunResult
+from classes.SamplingProfiler import SamplingProfiler
+from classes.ThreadedEngine import ThreadedEngine
+from classes.TraceCache import TraceCache
+from classes.TraceRecorder import TraceRecorder
+from utils.binary_program import get_program_format
 
 
 # 1. Instruction Fetch
@@ -18,20 +33,80 @@ class Processor:
     memory, program counter, register files.
     """
 
+    ENGINES = ("interpreter", "threaded", "translated")
+
     def __init__(
-        self, datapath: Datapath = Datapath(), control: ControlUnit = ControlUnit()
+        self,
+        datapath: Datapath = None,
+        control: ControlUnit = None,
+        engine: str = "interpreter",
+        trace_threshold: int = 50,
+        trace_cache_size: int = 64,
+        assembly_cache: AssemblyCache = None,
+        assembly_workers: int = 1,
+        perf_counters: bool = False,
+        trace_recorder: TraceRecorder = None,
+        profiler: SamplingProfiler = None,
     ):
         """
         Constructor method
-        :param datapath: the datapath of the processor
-        :type datapath: Datapath
-        :param control: the control unit of the processor
-        :type control: ControlUnit
+        :param datapath: the datapath of the processor (default: new Datapath)
+        :type datapath: Datapath, optional
+        :param control: the control unit of the processor (default: new ControlUnit)
+        :type control: ControlUnit, optional
+        :param engine: execution engine used by run() ("interpreter" - datapath and decode cache, "threaded" -
+        instructions compiled into closures, "translated" - basic blocks compiled into Python functions)
+        :type engine: str
+        :param trace_threshold: times a backward branch must be taken before the "translated" engine compiles its loop
+        into a superblock trace, None disables the traces (default: 50)
+        :type trace_threshold: int, optional
+        :param trace_cache_size: maximum number of traces kept in the trace cache (default: 64)
+        :type trace_cache_size: int, optional
+        :param assembly_cache: on-disk cache of encoded programs used when loading Assembly, so a program already
+        encoded skips the assembler (default: None, always assemble)
+        :type assembly_cache: AssemblyCache, optional
+        :param assembly_workers: number of processes assembling the programs loaded from Assembly, None for one per CPU
+        (default: 1, no processes)
+        :type assembly_workers: int, optional
+        :param perf_counters: count the executed instructions, branches, loads and stores (see get_perf_stats()),
+        the engines do not count anything without them (default: False)
+        :type perf_counters: bool, optional
+        :param trace_recorder: recorder of the executed instructions (pc, instruction, rd, value written and address
+        accessed), flushed at the end of every run (default: None, no recording)
+        :type trace_recorder: TraceRecorder, optional
+        :param profiler: profiler sampling the program counter, tracking the calls through the hooks if it has call
+        stacks (default: None, no profiling)
+        :type profiler: SamplingProfiler, optional
+        :raises: ValueError if the engine is not supported or the trace threshold is smaller than 1
         """
-        self.datapath = datapath
-        self.control = control
+        if engine not in Processor.ENGINES:
+            raise ValueError(
+                f"Invalid engine ({engine}). Allowed values are: {', '.join(Processor.ENGINES)}."
+            )
+        if trace_threshold is not None and trace_threshold < 1:
+            raise ValueError("The trace threshold must be at least 1!")
+        self.datapath = datapath if datapath is not None else Datapath()
+        self.control = control if control is not None else ControlUnit()
+        self.engine = engine
+        self.execution_engine = None
         self.instructions = None
         self.current_instruction = None
+        self.decode_cache = DecodeCache()
+        self.trace_threshold = trace_threshold
+        self.trace_cache = TraceCache(trace_cache_size)
+        self.branch_profile = BranchProfile()
+        self.assembly_cache = assembly_cache
+        self.assembly_workers = assembly_workers
+        self.perf_counters = PerfCounters() if perf_counters else None
+        self.trace_recorder = trace_recorder
+        self.hooks = HookRegistry()
+        self.trace_hooks = {}
+        self.profiler = profiler
+        if profiler is not None and profiler.call_stacks:
+            self.hooks.register("on_jump", profiler.on_jump)
+        self.elf = None
+        # label symbols sorted by address (see symbolize())
+        self._labels = None
 
     def load_instructions_from_file(self, file):
         """
@@ -43,15 +118,54 @@ class Processor:
         """
         self.datapath.load_instructions_from_file(file)
 
-    def load_instructions_from_asm_file(self, file):
+    def load_instructions_from_binary_file(self, file):
+        """
+        Load a binary program (raw little-endian words, see utils.binary_program) into the instruction memory, setting
+        the program counter to its entry address.
+        :param file: binary file containing the program
+        :type file: file
+        :return: None
+        :rtype: NoneType
+        """
+        self.datapath.load_instructions_from_binary_file(file)
+
+    def load_elf_file(self, file):
+        """
+        Load an ELF32 RISC-V executable into the instruction and data memories, setting the program counter to its
+        entry address. The ELF file (e.g. its symbol table) is kept in the elf attribute.
+        :param file: ELF file
+        :type file: str
+        :return: None
+        :rtype: NoneType
+        """
+        self.elf = self.datapath.load_elf_file(file)
+
+    def load_instructions_from_asm_file(self, file, write_artifact=False):
         """
-        Load instructions from RISC-V Assembly file into the instruction memory.
+        Load instructions from RISC-V Assembly file into the instruction memory. The instructions are encoded in
+        memory, without intermediate files, or taken from the assembly cache of the processor.
         :param file: asm file containing instructions
         :type file: file
+        :param write_artifact: also write the file with the encoded instructions (default: False)
+        :type write_artifact: bool, optional
+        :return: list of instructions
+        :rtype: list
+        """
+        self.instructions = self.datapath.load_instructions_from_asm_file(
+            file, write_artifact, self.assembly_cache, self.assembly_workers
+        )
+
+    def load_instructions_from_asm(self, text):
+        """
+        Load instructions from RISC-V Assembly source (string) into the instruction memory.
+        :param text: Assembly source
+        :type text: str
         :return: list of instructions
         :rtype: list
         """
-        self.instructions = self.datapath.load_instructions_from_asm_file(file)
+        self.instructions = self.datapath.load_instructions_from_asm(
+            text, self.assembly_cache, self.assembly_workers
+        )
 
     def fetch_current_instruction(self):
         """
@@ -100,7 +214,7 @@ class Processor:
         """
         self.datapath.print_instructions()
 
-    def run(self, file):
+    def run(self, file, write_artifact=False, max_instructions=None, timeout=None):
         """
         Performs the actions of the Processor.
             1. Instruction Fetch
@@ -108,22 +222,322 @@ class Processor:
             3. Execute
             4. Memory
             5. Write Back
-        The auxiliary method is different if the instruction is a branch.
+        Instructions are decoded once and kept in the decode cache, so the control unit and the immediate generator
+        are skipped when the same instruction word is executed again. With the "threaded" and "translated" engines
+        the program is compiled instead (see run_threaded() and run_translated()).
 
-        :param file: file with the instructions
+        :param file: file with the instructions, in any format detected by utils.binary_program.get_program_format()
+        (Assembly, ELF executable, binary program or text with one decimal instruction per line)
         :type file: file
-        :return: None
-        :rtype: NoneType
+        :param write_artifact: write the file with the encoded instructions of an Assembly file (default: False)
+        :type write_artifact: bool, optional
+        :param max_instructions: maximum number of instructions executed (default: None, no limit)
+        :type max_instructions: int, optional
+        :param timeout: maximum wall-clock time of the execution, in seconds (default: None, no limit)
+        :type timeout: float, optional
+        :return: why and after how many instructions the execution stopped (see execute())
+        :rtype: RunResult
         """
-        if file[-2:] == '.s':
-            self.load_instructions_from_asm_file(file)
+        program_format = get_program_format(file)
+        if program_format == "asm":
+            self.load_instructions_from_asm_file(file, write_artifact)
+        elif program_format == "binary":
+            self.load_instructions_from_binary_file(file)
+        elif program_format == "elf":
+            self.load_elf_file(file)
         else:
             self.load_instructions_from_file(file)
-        while self.fetch_current_instruction():
-            if self.current_instruction & 0x7F == 0x63:
-                self.run_branch()
-            else:
-                self.run_regular()
+        return self.execute(max_instructions, timeout)
+
+    def run_asm(self, text, max_instructions=None, timeout=None):
+        """
+        Assembles RISC-V Assembly source given as a string and runs it (see run()).
+
+        :param text: Assembly source
+        :type text: str
+        :param max_instructions: maximum number of instructions executed (default: None, no limit)
+        :type max_instructions: int, optional
+        :param timeout: maximum wall-clock time of the execution, in seconds (default: None, no limit)
+        :type timeout: float, optional
+        :return: why and after how many instructions the execution stopped (see execute())
+        :rtype: RunResult
+        """
+        self.load_instructions_from_asm(text)
+        return self.execute(max_instructions, timeout)
+
+    def execute(self, max_instructions=None, timeout=None):
+        """
+        Runs the program loaded in the instruction memory with the engine of the processor, from the current value of
+        the program counter until it halts:
+            - a zero word, ecall or ebreak is fetched (not executed, the program counter stays at its address)
+            - max_instructions instructions were executed
+            - the timeout expired (checked every DEADLINE_CHECK_INTERVAL instructions, or every sampling period of the
+            profiler)
+            - the program counter left the instruction memory
+        In every case the program counter is left at the address of the next instruction to be executed. The callbacks
+        of the hook registry (hooks) are bound when the run starts.
+
+        :param max_instructions: maximum number of instructions executed (default: None, no limit)
+        :type max_instructions: int, optional
+        :param timeout: maximum wall-clock time of the execution, in seconds (default: None, no limit)
+        :type timeout: float, optional
+        :return: why and after how many instructions the execution stopped and the elapsed time
+        :rtype: RunResult
+        """
+        if self.perf_counters is not None:
+            self.perf_counters.resize(len(self.datapath.inst_mem.instructions))
+        if self.profiler is not None:
+            self.profiler.resize(len(self.datapath.inst_mem.instructions))
+        hooks = self.hooks.bind()
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        if self.engine == "threaded":
+            reason, count = self.run_threaded(max_instructions, deadline, hooks)
+        elif self.engine == "translated":
+            reason, count = self.run_translated(max_instructions, deadline, hooks)
+        else:
+            reason, count = self.run_interpreter(max_instructions, deadline, hooks)
+        result = RunResult(reason, count, time.perf_counter() - start)
+        if self.perf_counters is not None:
+            self.perf_counters.record_run(result, self.datapath.inst_mem.instructions, self.decode_cache)
+        if self.trace_recorder is not None:
+            self.trace_recorder.flush()
+        return result
+
+    def run_interpreter(self, max_instructions=None, deadline=None, hooks=None):
+        """
+        Runs the loaded program with the interpreter: the datapath executes the instructions from the decode cache.
+        With performance counters, a trace recorder or hooks the instrumented loop is used instead (see
+        run_instrumented()).
+
+        :param max_instructions: maximum number of instructions executed (default: None, no limit)
+        :type max_instructions: int, optional
+        :param deadline: time.perf_counter() value at which the execution stops (default: None, no limit)
+        :type deadline: float, optional
+        :param hooks: callbacks keyed on the event (see HookRegistry.bind()) (default: None, no hooks)
+        :type hooks: dict, optional
+        :return: why the execution stopped and the number of instructions executed
+        :rtype: tuple
+        """
+        if hooks or self.perf_counters is not None or self.trace_recorder is not None:
+            return self.run_instrumented(max_instructions, deadline, hooks or {})
+        datapath = self.datapath
+        profiler = self.profiler
+        limit = sys.maxsize if max_instructions is None else max_instructions
+        interval = DEADLINE_CHECK_INTERVAL if profiler is None else profiler.period
+        check = limit if deadline is None and profiler is None else 0
+        count = 0
+        while True:
+            if count >= check:
+                if count >= limit:
+                    return HaltReason.MAX_INSTRUCTIONS, count
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return HaltReason.DEADLINE, count
+                if profiler is not None and count:
+                    profiler.sample(datapath.get_pc())
+                check = min(limit, count + interval)
+            try:
+                instruction = datapath.fetch_current_instruction()
+            except IndexError:
+                return HaltReason.OUT_OF_BOUNDS, count
+            if not instruction:
+                return HaltReason.ZERO_WORD, count
+            self.current_instruction = instruction
+            try:
+                self.run_decoded()
+            except ValueError:
+                # ecall and ebreak are not in the decode table
+                if instruction not in HALT_REASONS:
+                    raise
+                return HALT_REASONS[instruction], count
+            count += 1
+
+    def run_instrumented(self, max_instructions=None, deadline=None, hooks=None):
+        """
+        Runs the loaded program with the interpreter, updating the performance counters, recording the trace and
+        calling the hooks after every instruction.
+
+        :param max_instructions: maximum number of instructions executed (default: None, no limit)
+        :type max_instructions: int, optional
+        :param deadline: time.perf_counter() value at which the execution stops (default: None, no limit)
+        :type deadline: float, optional
+        :param hooks: callbacks keyed on the event (see HookRegistry.bind()) (default: None, no hooks)
+        :type hooks: dict, optional
+        :return: why the execution stopped and the number of instructions executed
+        :rtype: tuple
+        """
+        datapath = self.datapath
+        perf_counters = self.perf_counters
+        trace_recorder = self.trace_recorder
+        profiler = self.profiler
+        read_register = datapath.reg_files.get_value
+        limit = sys.maxsize if max_instructions is None else max_instructions
+        interval = DEADLINE_CHECK_INTERVAL if profiler is None else profiler.period
+        check = limit if deadline is None and profiler is None else 0
+        count = 0
+        while True:
+            if count >= check:
+                if count >= limit:
+                    return HaltReason.MAX_INSTRUCTIONS, count
+                if deadline is not None and time.perf_counter() >= deadline:
+                    return HaltReason.DEADLINE, count
+                if profiler is not None and count:
+                    profiler.sample(datapath.get_pc())
+                check = min(limit, count + interval)
+            try:
+                instruction = datapath.fetch_current_instruction()
+            except IndexError:
+                return HaltReason.OUT_OF_BOUNDS, count
+            reason = HALT_REASONS.get(instruction)
+            if reason is not None:
+                return reason, count
+            self.current_instruction = instruction
+            pc = datapath.get_pc()
+            decoded = self.decode_cache.decode(instruction)
+            address = TraceRecorder.get_address(decoded, read_register)
+            self.run_decoded()
+            if perf_counters is not None:
+                perf_counters.record(pc, decoded.comparison_type is not None and datapath.pc_sel)
+            if trace_recorder is not None:
+                trace_recorder.record_decoded(pc, decoded, address, read_register)
+            if hooks:
+                HookRegistry.call_decoded(hooks, datapath, pc, decoded, address)
+            count += 1
+
+    def run_threaded(self, max_instructions=None, deadline=None, hooks=None):
+        """
+        Runs the loaded program with the threaded engine: every instruction is compiled into a closure and the
+        execution dispatches through them.
+
+        :param max_instructions: maximum number of instructions executed (default: None, no limit)
+        :type max_instructions: int, optional
+        :param deadline: time.perf_counter() value at which the execution stops (default: None, no limit)
+        :type deadline: float, optional
+        :param hooks: callbacks keyed on the event (see HookRegistry.bind()) (default: None, no hooks)
+        :type hooks: dict, optional
+        :return: why the execution stopped and the number of instructions executed
+        :rtype: tuple
+        """
+        self.execution_engine = ThreadedEngine(self.datapath, self.decode_cache, self.trace_recorder, hooks)
+        self.execution_engine.load()
+        return self.execution_engine.run(max_instructions, deadline, self.perf_counters, self.profiler)
+
+    def run_translated(self, max_instructions=None, deadline=None, hooks=None):
+        """
+        Runs the loaded program with the block translator: basic blocks are compiled into Python functions the first
+        time they are executed and cached by their start address. Hot loops are compiled into superblock traces guided
+        by the branch profile. The traces compiled with other hooks than the ones of the run are discarded.
+
+        :param max_instructions: maximum number of instructions executed (default: None, no limit)
+        :type max_instructions: int, optional
+        :param deadline: time.perf_counter() value at which the execution stops (default: None, no limit)
+        :type deadline: float, optional
+        :param hooks: callbacks keyed on the event (see HookRegistry.bind()) (default: None, no hooks)
+        :type hooks: dict, optional
+        :return: why the execution stopped and the number of instructions executed
+        :rtype: tuple
+        """
+        hooks = hooks or {}
+        if hooks != self.trace_hooks:
+            self.trace_cache.clear()
+            self.trace_hooks = hooks
+        self.execution_engine = BlockTranslator(
+            self.datapath,
+            self.decode_cache,
+            self.branch_profile,
+            self.trace_cache,
+            self.trace_threshold,
+            self.trace_recorder,
+            hooks,
+        )
+        return self.execution_engine.run(max_instructions, deadline, self.perf_counters, self.profiler)
+
+    def run_decoded(self):
+        """
+        Performs operation of the processor based on the current instruction, using the decode cache. Instructions are
+        only decoded the first time an instruction word is found. The direction of branches is recorded in the branch
+        profile.
+
+        :return: None
+        :rtype: NoneType
+        """
+        decoded = self.decode_cache.decode(self.current_instruction)
+        pc = self.datapath.get_pc()
+        self.datapath.run_decoded(decoded)
+        if decoded.comparison_type is not None:
+            self.branch_profile.record(pc, bool(self.datapath.pc_sel))
+
+    def get_engine_stats(self):
+        """
+        Returns the counters of the engine used in the last run ("threaded" or "translated").
+
+        :return: counters of the engine, empty if the last run used the interpreter
+        :rtype: dict
+        """
+        return self.execution_engine.get_stats() if self.execution_engine else {}
+
+    def get_perf_stats(self):
+        """
+        Returns the performance counters of the runs since the processor was created or reset (see
+        PerfCounters.get_stats()).
+
+        :return: the counters, empty if the processor has no performance counters
+        :rtype: dict
+        """
+        if self.perf_counters is None:
+            return {}
+        return self.perf_counters.get_stats()
+
+    def symbolize(self, address):
+        """
+        Returns the symbol containing an address and the offset of the address from it: from the symbol table of the
+        ELF file loaded, otherwise from the labels of the Assembly program loaded.
+
+        :param address: the address
+        :type address: int
+        :return: name of the symbol and offset or None if no symbol contains the address
+        :rtype: tuple|NoneType
+        """
+        if self.elf is not None:
+            return self.elf.symbolize(address)
+        symbols = self.datapath.inst_mem.symbols
+        if self._labels is None or self._labels[0] is not symbols:
+            labels = sorted((label_address, name) for name, label_address in symbols.items())
+            self._labels = (symbols, [label_address for label_address, _ in labels], labels)
+        _, addresses, labels = self._labels
+        index = bisect_right(addresses, address) - 1
+        if index < 0:
+            return None
+        label_address, name = labels[index]
+        return name, address - label_address
+
+    def get_branch_profile(self):
+        """
+        Returns the branch profile: how many times each branch was taken and not taken.
+
+        :return: the branch profile
+        :rtype: BranchProfile
+        """
+        return self.branch_profile
+
+    def get_evaluation_stats(self):
+        """
+        Returns the evaluations of the ALU and the immediate generator of the datapath (see
+        Datapath.get_evaluation_stats()).
+
+        :return: evaluations and evaluations avoided of the ALU and the immediate generator
+        :rtype: dict
+        """
+        return self.datapath.get_evaluation_stats()
+
+    def get_decode_cache_stats(self):
+        """
+        Returns the hit/miss counters of the decode cache.
+
+        :return: number of hits, misses and entries of the decode cache
+        :rtype: dict
+        """
+        return self.decode_cache.get_stats()
 
     def run_regular(self):
         """
@@ -163,6 +577,7 @@ class Processor:
         self.control.branch(self.datapath.branch_eq, self.datapath.branch_lt)
         self.control.set_pc_sel()
         self.datapath.set_pc_sel(self.control.pc_sel)
+        self.branch_profile.record(self.datapath.get_pc(), bool(self.control.pc_sel))
         self.datapath.second_run_branch()
         # self.print_registers()
 
@@ -179,6 +594,17 @@ class Processor:
         self.control.reset()
         self.instructions = None
         self.current_instruction = None
+        self.decode_cache = DecodeCache()
+        self.trace_cache.clear()
+        self.branch_profile.clear()
+        if self.perf_counters is not None:
+            self.perf_counters.clear()
+        if self.profiler is not None:
+            self.profiler.clear()
+        self.execution_engine = None
+        self.trace_hooks = {}
+        self.elf = None
+        self._labels = None
 
     def print_reg(self, key):
         """
@@ -140,6 +140,27 @@ class RegisterFiles:
         """
         self.write_enable = en
 
+    def snapshot(self):
+        """
+        Returns a copy of the values of all the registers.
+
+        :return: the values of the registers, indexed by the register key
+        :rtype: list
+        """
+        return [reg.value for reg in self.regs]
+
+    def restore(self, values):
+        """
+        Restores the values of all the registers from a snapshot (x0 stays 0).
+
+        :param values: the values of the registers, indexed by the register key
+        :type values: list
+        :return: None
+        :rtype: NoneType
+        """
+        for reg, value in zip(self.regs, values):
+            reg.write(value)
+
     def print_all(self):
         """
         Prints the contents of all the registers.
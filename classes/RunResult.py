@@ -0,0 +1,17 @@
+from collections import namedtuple
+
+# Number of instructions executed between two checks of the deadline of a run
+DEADLINE_CHECK_INTERVAL = 1024
+
+
+class RunResult(namedtuple("RunResult", ["reason", "instructions", "elapsed"])):
+    """
+    The RunResult class holds the outcome of the execution of a program.
+
+        reason (HaltReason) - why the execution stopped
+        instructions (int) - number of instructions executed (the zero word, ecall or ebreak that halted the
+        processor is not executed)
+        elapsed (float) - wall-clock time of the execution, in seconds
+    """
+
+    __slots__ = ()
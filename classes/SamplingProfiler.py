@@ -0,0 +1,206 @@
+# Number of retired instructions between two samples by default
+SAMPLING_PERIOD = 1024
+
+# Maximum depth of the call stack tracked (the outermost calls are dropped beyond it)
+MAX_STACK_DEPTH = 256
+
+# Link register of the calls ('jal ra, function' and 'jalr ra, ...')
+RA = 1
+
+
+class SamplingProfiler:
+    """
+    The SamplingProfiler class samples the program counter of the guest every period retired instructions: the
+    engines take the samples where they check the budget of the run, which happens every period instructions while
+    profiling (at the end of the block or trace iteration that reaches it with the translated engine), so the profiler
+    costs nothing between two samples. The samples are counted per instruction, indexed by its address divided by 4.
+
+    With call stacks, calls ('jal'/'jalr' writing ra) and returns (jumps to the return address of the last call
+    without link) are tracked through the on_jump hook (see HookRegistry), and each sample is also counted for the
+    stack of call sites it was taken in, for the collapsed-stack format of flame graphs.
+
+    The profile is symbolized with a function returning the symbol containing an address and the offset from it (see
+    Processor.symbolize()): ELF symbols or Assembly labels.
+
+        period (int) - number of retired instructions between two samples
+        call_stacks (bool) - track the calls and count the samples per call stack
+        samples (list) - number of samples of each instruction
+        stacks (dict) - number of samples keyed on the call sites of the stack and the index of the instruction
+        sites (list) - addresses of the calls of the current call stack, from the outermost
+        returns (list) - return addresses of the calls of the current call stack
+    """
+
+    def __init__(self, period=SAMPLING_PERIOD, call_stacks=True):
+        """
+        Constructor method
+
+        :param period: number of retired instructions between two samples (default: SAMPLING_PERIOD)
+        :type period: int, optional
+        :param call_stacks: track the calls and count the samples per call stack (default: True)
+        :type call_stacks: bool, optional
+        :raises: ValueError if the period is smaller than 1
+        """
+        if period < 1:
+            raise ValueError("The sampling period must be at least 1!")
+        self.period = period
+        self.call_stacks = call_stacks
+        self.clear()
+
+    def resize(self, size):
+        """
+        Extends the sample counters to a number of instructions (e.g. after a bigger program was loaded).
+
+        :param size: number of instructions of the instruction memory
+        :type size: int
+        :return: None
+        :rtype: NoneType
+        """
+        if len(self.samples) < size:
+            self.samples += [0] * (size - len(self.samples))
+
+    def sample(self, pc):
+        """
+        Records a sample of the program counter.
+
+        :param pc: address of the next instruction to be executed
+        :type pc: int
+        :return: None
+        :rtype: NoneType
+        """
+        index = pc >> 2
+        if index < len(self.samples):
+            self.samples[index] += 1
+            if self.call_stacks:
+                key = (tuple(self.sites), index)
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def on_jump(self, pc, target, rd):
+        """
+        Tracks the calls and returns (see HookRegistry).
+
+        :param pc: address of the jump
+        :type pc: int
+        :param target: address jumped to
+        :type target: int
+        :param rd: link register of the jump
+        :type rd: int
+        :return: None
+        :rtype: NoneType
+        """
+        if rd == RA:
+            if len(self.sites) == MAX_STACK_DEPTH:
+                del self.sites[0], self.returns[0]
+            self.sites.append(pc)
+            self.returns.append(pc + 4)
+        elif not rd and self.returns and target == self.returns[-1]:
+            self.sites.pop()
+            self.returns.pop()
+
+    def clear(self):
+        """
+        Removes the samples and the call stack.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.samples = []
+        self.stacks = {}
+        self.sites = []
+        self.returns = []
+
+    def get_total(self):
+        """
+        Returns the number of samples.
+
+        :return: the number of samples
+        :rtype: int
+        """
+        return sum(self.samples)
+
+    def get_hot_spots(self, symbolize=None):
+        """
+        Returns the sampled instructions, from the most to the least sampled.
+
+        :param symbolize: returns the symbol containing an address and the offset or None (default: None, no symbols)
+        :type symbolize: function, optional
+        :return: (address, location, samples) of each sampled instruction
+        :rtype: list
+        """
+        spots = [(samples, index << 2) for index, samples in enumerate(self.samples) if samples]
+        spots.sort(key=lambda spot: (-spot[0], spot[1]))
+        return [(pc, self._locate(pc, symbolize), samples) for samples, pc in spots]
+
+    def get_functions(self, symbolize=None):
+        """
+        Returns the samples of each symbol (function or label), from the most to the least sampled.
+
+        :param symbolize: returns the symbol containing an address and the offset or None (default: None, no symbols)
+        :type symbolize: function, optional
+        :return: number of samples keyed on the name of the symbol (the address if no symbol contains it)
+        :rtype: dict
+        """
+        functions = {}
+        for index, samples in enumerate(self.samples):
+            if samples:
+                name = self._name(index << 2, symbolize)
+                functions[name] = functions.get(name, 0) + samples
+        return dict(sorted(functions.items(), key=lambda item: (-item[1], item[0])))
+
+    def format_flat(self, symbolize=None, top=20):
+        """
+        Formats the flat profile: the samples of each symbol, then the most sampled instructions.
+
+        :param symbolize: returns the symbol containing an address and the offset or None (default: None, no symbols)
+        :type symbolize: function, optional
+        :param top: maximum number of instructions listed (default: 20)
+        :type top: int, optional
+        :return: the profile, one symbol or instruction per line
+        :rtype: str
+        """
+        total = self.get_total() or 1
+        lines = [f"{'samples':<24}{self.get_total():>14}", f"{'period':<24}{self.period:>14}", "functions"]
+        lines += [
+            f"  {name:<22}{samples:>14}{100 * samples / total:>9.2f}%"
+            for name, samples in self.get_functions(symbolize).items()
+        ]
+        lines.append("hot spots")
+        lines += [
+            f"  0x{pc:08X} {location:<22}{samples:>14}{100 * samples / total:>9.2f}%"
+            for pc, location, samples in self.get_hot_spots(symbolize)[:top]
+        ]
+        return "\n".join(lines)
+
+    def format_collapsed(self, symbolize=None):
+        """
+        Formats the samples in the collapsed-stack format of flame graph tools (e.g. flamegraph.pl): one line per
+        stack, its frames separated by ';' from the outermost, then the number of samples. Each frame is the symbol of
+        a call site, and the last one the symbol of the sampled instruction. Without call stacks, the stacks only
+        have the last frame.
+
+        :param symbolize: returns the symbol containing an address and the offset or None (default: None, no symbols)
+        :type symbolize: function, optional
+        :return: the stacks, one per line
+        :rtype: str
+        """
+        if self.call_stacks:
+            stacks = self.stacks.items()
+        else:
+            stacks = ((((), index), samples) for index, samples in enumerate(self.samples) if samples)
+        collapsed = {}
+        for (sites, index), samples in stacks:
+            frames = ";".join(self._name(pc, symbolize) for pc in sites + (index << 2,))
+            collapsed[frames] = collapsed.get(frames, 0) + samples
+        return "\n".join(f"{frames} {samples}" for frames, samples in sorted(collapsed.items()))
+
+    @staticmethod
+    def _name(pc, symbolize):
+        symbol = None if symbolize is None else symbolize(pc)
+        return f"0x{pc:08X}" if symbol is None else symbol[0]
+
+    @staticmethod
+    def _locate(pc, symbolize):
+        symbol = None if symbolize is None else symbolize(pc)
+        if symbol is None:
+            return ""
+        name, offset = symbol
+        return f"{name}+0x{offset:X}" if offset else name
@@ -0,0 +1,455 @@
+import sys
+import time
+
+from classes.ALU import MASK_32, OPERATIONS
+from classes.ALUOperation import ALUOperation
+from classes.DecodeCache import DecodeCache
+from classes.FlatRegisterFiles import FlatRegisterFiles
+from classes.HaltReason import HALT_REASONS, HaltReason
+from classes.RunResult import DEADLINE_CHECK_INTERVAL
+from classes.TraceRecorder import NO_ADDRESS
+
+# Comparison type -> condition for the branch to be taken
+BRANCH_CONDITIONS = {
+    "beq": lambda a, b: a == b,
+    "bne": lambda a, b: a != b,
+    "blt": lambda a, b: a < b,
+    "bge": lambda a, b: a >= b,
+}
+
+
+def raise_misaligned():
+    """
+    Handler for a jump or a taken branch to an address that is not a multiple of 4.
+
+    :raises: ValueError always, as the program counter does.
+    """
+    raise ValueError("Offset must be multiple of 4!")
+
+
+class ThreadedEngine:
+    """
+    The ThreadedEngine class executes a program with "threaded code": when the program is loaded, each instruction of
+    the instruction memory is turned into a Python closure specialized for it (e.g. x5 = (x6 + 40) & 0xFFFFFFFF),
+    and the execution just dispatches through the list of closures. Each closure performs the instruction and returns
+    the address of the next one.
+
+    The closures work directly on the list of values of a FlatRegisterFiles. Other register files are copied into a
+    flat list when the execution starts and written back when it stops.
+
+    With a trace recorder or hooks (see HookRegistry), each closure is wrapped when the program is loaded by another
+    one recording the instruction or calling the hooks of its events, so the dispatch loop is the same with or without
+    instrumentation, and the closures are the plain ones without it.
+    """
+
+    def __init__(self, datapath, decode_cache=None, trace_recorder=None, hooks=None):
+        """
+        Constructor method
+
+        :param datapath: the datapath with the loaded program
+        :type datapath: Datapath
+        :param decode_cache: cache used to decode the instructions
+        :type decode_cache: DecodeCache, optional
+        :param trace_recorder: recorder of the executed instructions (default: None, no recording)
+        :type trace_recorder: TraceRecorder, optional
+        :param hooks: callbacks keyed on the event (see HookRegistry.bind()) (default: None, no hooks)
+        :type hooks: dict, optional
+        """
+        self.datapath = datapath
+        self.decode_cache = decode_cache if decode_cache is not None else DecodeCache()
+        self.trace_recorder = trace_recorder
+        self.hooks = hooks or {}
+        self.shared_registers = isinstance(datapath.reg_files, FlatRegisterFiles)
+        self.registers = datapath.reg_files.values if self.shared_registers else [0] * 32
+        self.handlers = []
+
+    def load(self):
+        """
+        Compiles every instruction of the instruction memory into a closure. Zero words (end of program), ecall and
+        ebreak halt the processor and have no handler.
+
+        :return: list of handlers indexed by the instruction address divided by 4
+        :rtype: list
+        """
+        self.handlers = [
+            None if inst in HALT_REASONS else self.compile_instruction(inst, 4 * i)
+            for i, inst in enumerate(self.datapath.inst_mem.instructions)
+        ]
+        if self.trace_recorder is not None:
+            self.handlers = [
+                None if handler is None else self._compile_recording(handler, inst, 4 * i)
+                for i, (handler, inst) in enumerate(zip(self.handlers, self.datapath.inst_mem.instructions))
+            ]
+        if self.hooks:
+            self.handlers = [
+                None if handler is None else self._compile_hooks(handler, inst, 4 * i)
+                for i, (handler, inst) in enumerate(zip(self.handlers, self.datapath.inst_mem.instructions))
+            ]
+        return self.handlers
+
+    def compile_instruction(self, instruction, pc):
+        """
+        Compiles an instruction into a closure that performs it and returns the address of the next instruction.
+
+        :param instruction: 32-bit instruction word
+        :type instruction: int
+        :param pc: address of the instruction
+        :type pc: int
+        :return: the handler of the instruction
+        :rtype: function
+        """
+        decoded = self.decode_cache.decode(instruction)
+        a_sel, _, b_sel, wb_sel, mem_rw, operation, _, _, reg_w_en, size, load_unsigned = decoded.signals
+        x = self.registers
+        rd, rs1, rs2, imm = decoded.rd, decoded.rs1, decoded.rs2, decoded.imm
+        next_pc = pc + 4
+        if decoded.comparison_type is not None:
+            return self._compile_branch(decoded, pc)
+        if wb_sel == 2:
+            return self._compile_jump(decoded, pc)
+        if mem_rw:
+            store = self.datapath.data_mem.store
+
+            def handler():
+                store((x[rs1] + imm) & MASK_32, x[rs2], size)
+                return next_pc
+
+            return handler
+        if wb_sel == 0:
+            load = self.datapath.data_mem.load
+
+            if rd:
+                def handler():
+                    x[rd] = load((x[rs1] + imm) & MASK_32, size, load_unsigned)
+                    return next_pc
+            else:
+                def handler():
+                    load((x[rs1] + imm) & MASK_32, size, load_unsigned)
+                    return next_pc
+
+            return handler
+        if not reg_w_en or not rd:
+            return lambda: next_pc
+        function = OPERATIONS[operation]
+        if a_sel:
+            # auipc: the result only depends on the address of the instruction
+            value = function(pc, imm)
+
+            def handler():
+                x[rd] = value
+                return next_pc
+        elif b_sel and operation == ALUOperation.ADD:
+            def handler():
+                x[rd] = (x[rs1] + imm) & MASK_32
+                return next_pc
+        elif b_sel:
+            def handler():
+                x[rd] = function(x[rs1], imm)
+                return next_pc
+        elif operation == ALUOperation.ADD:
+            def handler():
+                x[rd] = (x[rs1] + x[rs2]) & MASK_32
+                return next_pc
+        else:
+            def handler():
+                x[rd] = function(x[rs1], x[rs2])
+                return next_pc
+        return handler
+
+    def _compile_branch(self, decoded, pc):
+        """
+        Compiles a branch instruction.
+
+        :param decoded: the decoded instruction
+        :type decoded: DecodedInstruction
+        :param pc: address of the instruction
+        :type pc: int
+        :return: the handler of the instruction
+        :rtype: function
+        """
+        x = self.registers
+        rs1, rs2 = decoded.rs1, decoded.rs2
+        condition = BRANCH_CONDITIONS[decoded.comparison_type]
+        target = (pc + decoded.imm) & MASK_32
+        next_pc = pc + 4
+        if target % 4:
+            def handler():
+                if condition(x[rs1], x[rs2]):
+                    raise_misaligned()
+                return next_pc
+        else:
+            def handler():
+                if condition(x[rs1], x[rs2]):
+                    return target
+                return next_pc
+        return handler
+
+    def _compile_jump(self, decoded, pc):
+        """
+        Compiles a jump instruction (jal or jalr).
+
+        :param decoded: the decoded instruction
+        :type decoded: DecodedInstruction
+        :param pc: address of the instruction
+        :type pc: int
+        :return: the handler of the instruction
+        :rtype: function
+        """
+        x = self.registers
+        rd, rs1, imm = decoded.rd, decoded.rs1, decoded.imm
+        link = pc + 4
+        if decoded.signals[0]:
+            # jal: the target only depends on the address of the instruction
+            target = (pc + imm) & MASK_32
+            if target % 4:
+                return raise_misaligned
+
+            def handler():
+                if rd:
+                    x[rd] = link
+                return target
+        else:
+            def handler():
+                target = (x[rs1] + imm) & MASK_32
+                if rd:
+                    x[rd] = link
+                if target % 4:
+                    raise_misaligned()
+                return target
+        return handler
+
+    def _compile_recording(self, handler, instruction, pc):
+        """
+        Wraps the handler of an instruction into one that also records it in the trace recorder.
+
+        :param handler: the handler of the instruction
+        :type handler: function
+        :param instruction: 32-bit instruction word
+        :type instruction: int
+        :param pc: address of the instruction
+        :type pc: int
+        :return: the recording handler
+        :rtype: function
+        """
+        decoded = self.decode_cache.decode(instruction)
+        _, _, _, wb_sel, mem_rw, _, _, _, reg_w_en, size, _ = decoded.signals
+        x = self.registers
+        record = self.trace_recorder.record
+        rd, rs1, rs2, imm = decoded.rd, decoded.rs1, decoded.rs2, decoded.imm
+        if mem_rw:
+            mask = (1 << 8 * size) - 1
+
+            def recording():
+                next_pc = handler()
+                record(pc, instruction, 0, x[rs2] & mask, (x[rs1] + imm) & MASK_32)
+                return next_pc
+        elif wb_sel == 0 and reg_w_en:
+            def recording():
+                address = (x[rs1] + imm) & MASK_32
+                next_pc = handler()
+                record(pc, instruction, rd, x[rd], address)
+                return next_pc
+        elif reg_w_en and rd:
+            def recording():
+                next_pc = handler()
+                record(pc, instruction, rd, x[rd], NO_ADDRESS)
+                return next_pc
+        else:
+            def recording():
+                next_pc = handler()
+                record(pc, instruction, 0, 0, NO_ADDRESS)
+                return next_pc
+        return recording
+
+    def _compile_hooks(self, handler, instruction, pc):
+        """
+        Wraps the handler of an instruction into one that also calls the hooks of its events (the handler itself if
+        no hook observes the instruction).
+
+        :param handler: the handler of the instruction
+        :type handler: function
+        :param instruction: 32-bit instruction word
+        :type instruction: int
+        :param pc: address of the instruction
+        :type pc: int
+        :return: the handler calling the hooks
+        :rtype: function
+        """
+        decoded = self.decode_cache.decode(instruction)
+        _, _, _, wb_sel, mem_rw, _, _, _, reg_w_en, size, _ = decoded.signals
+        x = self.registers
+        rd, rs1, rs2, imm = decoded.rd, decoded.rs1, decoded.rs2, decoded.imm
+        on_retire = self.hooks.get("on_retire")
+        if decoded.comparison_type is not None:
+            on_event = self.hooks.get("on_branch")
+            condition = BRANCH_CONDITIONS[decoded.comparison_type]
+            target = (pc + imm) & MASK_32
+            if on_event is not None:
+                def event():
+                    next_pc = handler()
+                    on_event(pc, target, condition(x[rs1], x[rs2]))
+                    return next_pc
+            else:
+                event = handler
+        elif wb_sel == 2:
+            on_event = self.hooks.get("on_jump")
+            if on_event is not None:
+                def event():
+                    next_pc = handler()
+                    on_event(pc, next_pc, rd)
+                    return next_pc
+            else:
+                event = handler
+        elif mem_rw:
+            on_event = self.hooks.get("on_store")
+            mask = (1 << 8 * size) - 1
+            if on_event is not None:
+                def event():
+                    next_pc = handler()
+                    on_event(pc, (x[rs1] + imm) & MASK_32, size, x[rs2] & mask)
+                    return next_pc
+            else:
+                event = handler
+        elif wb_sel == 0 and reg_w_en:
+            on_event = self.hooks.get("on_load")
+            if on_event is not None:
+                def event():
+                    address = (x[rs1] + imm) & MASK_32
+                    next_pc = handler()
+                    on_event(pc, address, size, x[rd])
+                    return next_pc
+            else:
+                event = handler
+        else:
+            event = handler
+        if on_retire is None:
+            return event
+
+        def retire():
+            next_pc = event()
+            on_retire(pc, instruction)
+            return next_pc
+
+        return retire
+
+    def counting_handlers(self, taken):
+        """
+        Returns the handlers with the branches wrapped into handlers that also count how many times they are taken,
+        for the dispatch loop updating the performance counters.
+
+        :param taken: number of times each branch was taken, indexed by its address divided by 4 (see PerfCounters)
+        :type taken: list
+        :return: list of handlers indexed by the instruction address divided by 4
+        :rtype: list
+        """
+        handlers = list(self.handlers)
+        for index, (handler, instruction) in enumerate(zip(self.handlers, self.datapath.inst_mem.instructions)):
+            if handler is not None:
+                decoded = self.decode_cache.decode(instruction)
+                if decoded.comparison_type is not None:
+                    handlers[index] = self._compile_counting(handler, decoded, index, taken)
+        return handlers
+
+    def _compile_counting(self, handler, decoded, index, taken):
+        """
+        Wraps the handler of a branch into one that also counts how many times it is taken.
+
+        :param handler: the handler of the branch
+        :type handler: function
+        :param decoded: the decoded branch
+        :type decoded: DecodedInstruction
+        :param index: address of the branch divided by 4
+        :type index: int
+        :param taken: number of times each branch was taken, indexed by its address divided by 4
+        :type taken: list
+        :return: the counting handler
+        :rtype: function
+        """
+        x = self.registers
+        rs1, rs2 = decoded.rs1, decoded.rs2
+        condition = BRANCH_CONDITIONS[decoded.comparison_type]
+
+        def counting():
+            next_pc = handler()
+            if condition(x[rs1], x[rs2]):
+                taken[index] += 1
+            return next_pc
+
+        return counting
+
+    def get_stats(self):
+        """
+        Returns the counters of the engine.
+
+        :return: number of instructions compiled into closures
+        :rtype: dict
+        """
+        return {"instructions_compiled": sum(1 for handler in self.handlers if handler is not None)}
+
+    def run(self, max_instructions=None, deadline=None, perf_counters=None, profiler=None):
+        """
+        Runs the loaded program until it halts (see Processor.execute()). The instructions are dispatched in a for
+        loop over the range of instructions left before the next check of the budget, so the count costs nothing.
+        The performance counters are updated by a separate dispatch loop, over handlers counting the taken branches
+        (see counting_handlers()), so they cost nothing when not given. With a profiler, the budget is checked (and
+        the program counter sampled) every sampling period.
+
+        :param max_instructions: maximum number of instructions executed (default: None, no limit)
+        :type max_instructions: int, optional
+        :param deadline: time.perf_counter() value at which the execution stops (default: None, no limit)
+        :type deadline: float, optional
+        :param perf_counters: counters of the executed instructions (default: None, no counting)
+        :type perf_counters: PerfCounters, optional
+        :param profiler: profiler sampling the program counter at every check of the budget (default: None)
+        :type profiler: SamplingProfiler, optional
+        :return: why the execution stopped and the number of instructions executed
+        :rtype: tuple
+        """
+        datapath = self.datapath
+        handlers = self.handlers
+        registers = self.registers
+        if not self.shared_registers:
+            registers[:] = datapath.reg_files.snapshot()
+        datapath.data_mem.set_enable(write=True, read=True)
+        pc = datapath.get_pc()
+        limit = sys.maxsize if max_instructions is None else max_instructions
+        interval = DEADLINE_CHECK_INTERVAL if profiler is None else profiler.period
+        check = limit if deadline is None and profiler is None else 0
+        count = 0
+        counting = None if perf_counters is None else self.counting_handlers(perf_counters.taken)
+        try:
+            while True:
+                if count >= check:
+                    if count >= limit:
+                        return HaltReason.MAX_INSTRUCTIONS, count
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        return HaltReason.DEADLINE, count
+                    if profiler is not None and count:
+                        profiler.sample(pc)
+                    check = min(limit, count + interval)
+                if perf_counters is None:
+                    for count in range(count, check):
+                        try:
+                            handler = handlers[pc >> 2]
+                        except IndexError:
+                            return HaltReason.OUT_OF_BOUNDS, count
+                        if handler is None:
+                            return HALT_REASONS[datapath.inst_mem.instructions[pc >> 2]], count
+                        pc = handler()
+                else:
+                    executions = perf_counters.executions
+                    for count in range(count, check):
+                        index = pc >> 2
+                        try:
+                            handler = counting[index]
+                        except IndexError:
+                            return HaltReason.OUT_OF_BOUNDS, count
+                        if handler is None:
+                            return HALT_REASONS[datapath.inst_mem.instructions[index]], count
+                        pc = handler()
+                        executions[index] += 1
+                count = check
+        finally:
+            datapath.prog_counter.set_value(pc)
+            if not self.shared_registers:
+                datapath.reg_files.restore(registers)
@@ -0,0 +1,142 @@
+from collections import OrderedDict, namedtuple
+
+
+class Trace(namedtuple("Trace", ["head", "function", "blocks", "ranges", "branches", "source"])):
+    """
+    The Trace class holds a compiled superblock trace.
+
+        head (int) - address of the first instruction of the trace
+        function (function) - compiled trace, receives the registers, a counter of iterations and instructions (and
+        the side exit taken) and the maximum number of iterations, and returns the address of the next instruction
+        blocks (tuple) - start addresses of the basic blocks stitched into the trace
+        ranges (tuple) - (start, end) address ranges of the instructions in the trace
+        branches (tuple) - direction followed by the branch ending each block (True if taken, None if the block does
+        not end at a branch)
+        source (str) - generated Python source of the trace
+    """
+
+    __slots__ = ()
+
+    def get_length(self):
+        """
+        Returns the number of instructions of an iteration of the trace.
+
+        :return: number of instructions
+        :rtype: int
+        """
+        return sum((end - start) >> 2 for start, end in self.ranges)
+
+
+class TraceCache:
+    """
+    The TraceCache class stores compiled traces keyed on their head address, with a size limit and a least recently
+    used (LRU) eviction policy: when the cache is full, the trace executed the longest time ago is removed.
+
+        max_size (int) - maximum number of traces in the cache
+        traces (OrderedDict) - traces keyed on their head address, from the least to the most recently used
+        evictions (int) - number of traces removed to respect the size limit
+    """
+
+    def __init__(self, max_size=64):
+        """
+        Constructor method
+
+        :param max_size: maximum number of traces in the cache (default: 64)
+        :type max_size: int, optional
+        :raises: ValueError if max_size is smaller than 1
+        """
+        if max_size < 1:
+            raise ValueError("The size limit of the trace cache must be at least 1!")
+        self.max_size = max_size
+        self.traces = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.traces)
+
+    def __contains__(self, head):
+        return head in self.traces
+
+    def get(self, head):
+        """
+        Returns the trace starting at a given address, marking it as the most recently used.
+
+        :param head: address of the first instruction of the trace
+        :type head: int
+        :return: the trace or None if it is not in the cache
+        :rtype: Trace|NoneType
+        """
+        trace = self.traces.get(head)
+        if trace is not None:
+            self.traces.move_to_end(head)
+        return trace
+
+    def put(self, trace):
+        """
+        Stores a trace, evicting the least recently used traces if the cache is full.
+
+        :param trace: the trace to store
+        :type trace: Trace
+        :return: the traces evicted
+        :rtype: list
+        """
+        self.traces[trace.head] = trace
+        self.traces.move_to_end(trace.head)
+        return self._evict()
+
+    def remove(self, head):
+        """
+        Removes the trace starting at a given address.
+
+        :param head: address of the first instruction of the trace
+        :type head: int
+        :return: the trace removed or None if it was not in the cache
+        :rtype: Trace|NoneType
+        """
+        return self.traces.pop(head, None)
+
+    def resize(self, max_size):
+        """
+        Changes the size limit of the cache, evicting the least recently used traces if needed.
+
+        :param max_size: maximum number of traces in the cache
+        :type max_size: int
+        :return: the traces evicted
+        :rtype: list
+        :raises: ValueError if max_size is smaller than 1
+        """
+        if max_size < 1:
+            raise ValueError("The size limit of the trace cache must be at least 1!")
+        self.max_size = max_size
+        return self._evict()
+
+    def heads(self):
+        """
+        Returns the head addresses of the traces, from the least to the most recently used.
+
+        :return: list of head addresses
+        :rtype: list
+        """
+        return list(self.traces)
+
+    def clear(self):
+        """
+        Removes all the traces.
+
+        :return: None
+        :rtype: NoneType
+        """
+        self.traces.clear()
+
+    def _evict(self):
+        """
+        Removes the least recently used traces until the size limit is respected.
+
+        :return: the traces evicted
+        :rtype: list
+        """
+        evicted = []
+        while len(self.traces) > self.max_size:
+            evicted.append(self.traces.popitem(last=False)[1])
+        self.evictions += len(evicted)
+        return evicted
@@ -0,0 +1,158 @@
+import mmap
+import sys
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+from classes.TraceRecorder import CHUNK_HEADER, TRACE_HEADER, TRACE_MAGIC, WORD_COLUMNS
+
+
+class TraceEntry(namedtuple("TraceEntry", ["pc", "instruction", "rd", "value", "address"])):
+    """
+    The TraceEntry class holds an entry of an execution trace (see TraceRecorder).
+
+        pc (int) - address of the instruction
+        instruction (int) - 32-bit instruction word
+        rd (int) - destination register (0 if no register is written)
+        value (int) - value written to rd or to the data memory by a store
+        address (int) - address of the data memory accessed (NO_ADDRESS if none)
+    """
+
+    __slots__ = ()
+
+
+class TraceReader:
+    """
+    The TraceReader class reads an execution trace written by TraceRecorder. The file is memory-mapped (mmap) and
+    only the chunk headers are read when it is opened, so entries and slices of traces of hundreds of millions of
+    entries are read straight from the mapping (through memoryview) without loading the file.
+
+        file (str) - path of the file
+        mapping (mmap) - the mapped file
+        chunk_size (int) - number of entries of a full chunk
+        chunks (list) - (offset, number of entries) of each chunk
+        starts (list) - index of the first entry of each chunk
+    """
+
+    def __init__(self, file):
+        """
+        Constructor method
+
+        :param file: path of the trace file
+        :type file: str
+        :raises: ValueError if the file is not a trace file or a chunk is truncated
+        """
+        self.file = file
+        with open(file, "rb") as f:
+            try:
+                self.mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Invalid trace file ({file}). The file is empty!")
+        if len(self.mapping) < TRACE_HEADER.size or self.mapping[:len(TRACE_MAGIC)] != TRACE_MAGIC:
+            self.close()
+            raise ValueError(f"Invalid trace file ({file}). Wrong magic number!")
+        _, self.chunk_size = TRACE_HEADER.unpack_from(self.mapping)
+        self.chunks = []
+        self.starts = []
+        offset = TRACE_HEADER.size
+        entries = 0
+        while offset < len(self.mapping):
+            (count,) = CHUNK_HEADER.unpack_from(self.mapping, offset)
+            end = offset + CHUNK_HEADER.size + 17 * count + (-count % 4)
+            if end > len(self.mapping):
+                self.close()
+                raise ValueError(f"Invalid trace file ({file}). Chunk at offset {offset} is truncated!")
+            self.chunks.append((offset + CHUNK_HEADER.size, count))
+            self.starts.append(entries)
+            entries += count
+            offset = end
+        self.entries = entries
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self.entries
+
+    def __iter__(self):
+        for chunk in range(len(self.chunks)):
+            yield from map(TraceEntry._make, zip(*self._chunk_columns(chunk)))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.entries)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            return [TraceEntry._make(entry) for entry in zip(*self.get_columns(start, stop))]
+        if index < 0:
+            index += self.entries
+        if not 0 <= index < self.entries:
+            raise IndexError("Trace index out of range!")
+        chunk = bisect_right(self.starts, index) - 1
+        position = index - self.starts[chunk]
+        return TraceEntry._make(column[position] for column in self._chunk_columns(chunk))
+
+    def close(self):
+        """
+        Closes the mapping of the file.
+
+        :return: None
+        :rtype: NoneType
+        """
+        if not self.mapping.closed:
+            self.mapping.close()
+
+    def get_column(self, name, start=0, stop=None):
+        """
+        Returns a range of a column of the trace.
+
+        :param name: name of the column ("pc", "instruction", "rd", "value" or "address")
+        :type name: str
+        :param start: index of the first entry (default: 0)
+        :type start: int, optional
+        :param stop: index after the last entry (default: end of the trace)
+        :type stop: int, optional
+        :return: the values of the column
+        :rtype: array
+        """
+        position = TraceEntry._fields.index(name)
+        stop = self.entries if stop is None else min(stop, self.entries)
+        values = array("B" if name == "rd" else "I")
+        if start >= stop:
+            return values
+        first = bisect_right(self.starts, start) - 1
+        last = bisect_right(self.starts, stop - 1) - 1
+        for chunk in range(first, last + 1):
+            column = self._chunk_columns(chunk)[position]
+            values.frombytes(column[max(start - self.starts[chunk], 0):stop - self.starts[chunk]].tobytes())
+        return values
+
+    def get_columns(self, start=0, stop=None):
+        """
+        Returns a range of all the columns of the trace.
+
+        :param start: index of the first entry (default: 0)
+        :type start: int, optional
+        :param stop: index after the last entry (default: end of the trace)
+        :type stop: int, optional
+        :return: the values of the columns pc, instruction, rd, value and address
+        :rtype: tuple
+        """
+        return tuple(self.get_column(name, start, stop) for name in TraceEntry._fields)
+
+    def _chunk_columns(self, chunk):
+        offset, count = self.chunks[chunk]
+        view = memoryview(self.mapping)
+        columns = {}
+        for name in WORD_COLUMNS:
+            words = view[offset:offset + 4 * count].cast("I")
+            if sys.byteorder == "big":
+                words = array("I", words)
+                words.byteswap()
+            columns[name] = words
+            offset += 4 * count
+        columns["rd"] = view[offset:offset + count]
+        return tuple(columns[name] for name in TraceEntry._fields)
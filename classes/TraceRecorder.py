@@ -0,0 +1,164 @@
+import struct
+import sys
+from array import array
+
+from classes.ALU import MASK_32
+
+# First bytes of a trace file, followed by the number of entries of a full chunk (32-bit little-endian). Each chunk
+# is its number of entries (32-bit little-endian) followed by the columns, one after the other: pc, instruction,
+# value and address (32-bit little-endian words) and rd (bytes, padded to a multiple of 4)
+TRACE_MAGIC = b"RVET"
+TRACE_HEADER = struct.Struct("<4sI")
+CHUNK_HEADER = struct.Struct("<I")
+
+# Address column of the instructions that do not access the data memory
+NO_ADDRESS = 0xFFFFFFFF
+
+# Columns of 32-bit words, in the order they are written in a chunk
+WORD_COLUMNS = ("pc", "instruction", "value", "address")
+
+
+class TraceRecorder:
+    """
+    The TraceRecorder class records an entry per retired instruction: its address, the instruction word, the
+    destination register, the value written (to rd, or to the data memory by a store) and the address of the data
+    memory accessed (NO_ADDRESS if none). The entries go to preallocated columns (array) of chunk_size entries, and
+    full columns are written to a binary file as a chunk, so recording costs a few item assignments per instruction
+    and the memory used does not grow with the trace. The file is read with TraceReader.
+
+        file (file) - the binary file the chunks are written to
+        chunk_size (int) - number of entries of a full chunk
+        pc, instruction, rd, value, address (array) - the columns of the chunk being recorded
+        size (int) - number of entries in the columns
+        entries (int) - number of entries written to the file
+    """
+
+    def __init__(self, file, chunk_size=65536):
+        """
+        Constructor method
+
+        :param file: path of the trace file (overwritten)
+        :type file: str
+        :param chunk_size: number of entries of a full chunk (default: 65536)
+        :type chunk_size: int, optional
+        :raises: ValueError if the chunk size is smaller than 1
+        """
+        if chunk_size < 1:
+            raise ValueError("The chunk size of the trace must be at least 1!")
+        self.chunk_size = chunk_size
+        self.pc = array("I", bytes(4 * chunk_size))
+        self.instruction = array("I", bytes(4 * chunk_size))
+        self.rd = array("B", bytes(chunk_size))
+        self.value = array("I", bytes(4 * chunk_size))
+        self.address = array("I", bytes(4 * chunk_size))
+        self.size = 0
+        self.entries = 0
+        self.file = open(file, "wb")
+        self.file.write(TRACE_HEADER.pack(TRACE_MAGIC, chunk_size))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def record(self, pc, instruction, rd, value, address=NO_ADDRESS):
+        """
+        Records a retired instruction, writing the chunk to the file if the columns are full.
+
+        :param pc: address of the instruction
+        :type pc: int
+        :param instruction: 32-bit instruction word
+        :type instruction: int
+        :param rd: destination register (0 if no register is written)
+        :type rd: int
+        :param value: value written to rd or to the data memory (32 bits)
+        :type value: int
+        :param address: address of the data memory accessed (default: NO_ADDRESS)
+        :type address: int, optional
+        :return: None
+        :rtype: NoneType
+        """
+        size = self.size
+        self.pc[size] = pc
+        self.instruction[size] = instruction
+        self.rd[size] = rd
+        self.value[size] = value
+        self.address[size] = address
+        self.size = size + 1
+        if size + 1 == self.chunk_size:
+            self.flush()
+
+    def record_decoded(self, pc, decoded, address, read_register):
+        """
+        Records a retired instruction executed by the datapath, after its execution.
+
+        :param pc: address of the instruction
+        :type pc: int
+        :param decoded: the decoded instruction
+        :type decoded: DecodedInstruction
+        :param address: address of the data memory accessed (see get_address(), computed before the execution)
+        :type address: int
+        :param read_register: returns the value of a register given its address (e.g. RegisterFiles.get_value)
+        :type read_register: function
+        :return: None
+        :rtype: NoneType
+        """
+        signals = decoded.signals
+        if signals[4]:
+            # store: the value written to the data memory
+            self.record(pc, decoded.instruction, 0, read_register(decoded.rs2) & ((1 << 8 * signals[9]) - 1), address)
+        elif signals[8] and decoded.rd:
+            self.record(pc, decoded.instruction, decoded.rd, read_register(decoded.rd) & MASK_32, address)
+        else:
+            self.record(pc, decoded.instruction, 0, 0, address)
+
+    @staticmethod
+    def get_address(decoded, read_register):
+        """
+        Returns the address of the data memory accessed by an instruction, before its execution.
+
+        :param decoded: the decoded instruction
+        :type decoded: DecodedInstruction
+        :param read_register: returns the value of a register given its address (e.g. RegisterFiles.get_value)
+        :type read_register: function
+        :return: the address or NO_ADDRESS if the instruction is not a load or a store
+        :rtype: int
+        """
+        signals = decoded.signals
+        if signals[4] or (signals[3] == 0 and signals[8]):
+            return (read_register(decoded.rs1) + decoded.imm) & MASK_32
+        return NO_ADDRESS
+
+    def flush(self):
+        """
+        Writes the entries in the columns to the file as a chunk and empties the columns.
+
+        :return: None
+        :rtype: NoneType
+        """
+        size = self.size
+        if not size:
+            return
+        self.file.write(CHUNK_HEADER.pack(size))
+        for name in WORD_COLUMNS:
+            words = getattr(self, name)
+            if sys.byteorder == "big":
+                words = words[:size]
+                words.byteswap()
+            self.file.write(memoryview(words)[:size])
+        self.file.write(memoryview(self.rd)[:size])
+        self.file.write(bytes(-size % 4))
+        self.entries += size
+        self.size = 0
+
+    def close(self):
+        """
+        Writes the remaining entries and closes the file.
+
+        :return: None
+        :rtype: NoneType
+        """
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
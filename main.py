@@ -1,12 +1,27 @@
 import argparse
+import json
 import re
 
+from classes.AssemblyCache import AssemblyCache
+from classes.ByteDataMemory import ByteDataMemory
+from classes.DataMemory import DataMemory
+from classes.Datapath import Datapath
+from classes.HaltReason import HaltReason
+from classes.PerfCounters import PerfCounters
+from classes.MappedDataMemory import MappedDataMemory
+from classes.PagedDataMemory import PagedDataMemory
 from classes.Processor import Processor
+from classes.SamplingProfiler import SAMPLING_PERIOD, SamplingProfiler
+from classes.TraceRecorder import TraceRecorder
 
 import PySimpleGUI as sg
 
+from utils.binary_program import get_program_format, read_binary_program
+from utils.encode_instructions import stream_assemble_file_to_binary
 from utils.get_instructions_asm_file import get_instructions_asm_file
 
+DATA_MEMORIES = {"list": DataMemory, "bytearray": ByteDataMemory, "paged": PagedDataMemory}
+
 
 def interface():
     sg.theme("DarkGrey14")
@@ -106,7 +121,10 @@ def interface():
                 print(source_file)
                 print("*------------------*")
                 print("Instructions")
-                instructions = get_instructions_asm_file(source_file)
+                if get_program_format(source_file) == "binary":
+                    instructions = memoryview(read_binary_program(source_file).image).cast("I").tolist()
+                else:
+                    instructions = get_instructions_asm_file(source_file)
                 print("*------------------*")
                 for i in range(len(instructions)):
                     print(f"{i}: {instructions[i]}") if values["-sourcefile-"] else \
@@ -134,7 +152,8 @@ def interface():
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        "-f", "--file", help="file to run", default="tests/files/gen_test.s"
+        "-f", "--file", help="file to run (assembly, binary or decimal text, detected automatically)",
+        default="tests/files/gen_test.s"
     )
     parser.add_argument("-r", help="print specified register value", type=int)
     parser.add_argument(
@@ -144,10 +163,95 @@ if __name__ == "__main__":
     parser.add_argument("-mem", help="print data memory values", action="store_true")
     parser.add_argument("-inst", help="print instruction memory values", action="store_true")
     parser.add_argument("-gui", help="open simple GUI", action="store_true")
+    parser.add_argument(
+        "-engine", help="execution engine", choices=Processor.ENGINES, default="interpreter"
+    )
+    parser.add_argument(
+        "-memory", help="data memory implementation (default: paged for ELF executables, list otherwise)",
+        choices=tuple(DATA_MEMORIES)
+    )
+    parser.add_argument(
+        "-words", help="size of the data memory in words (default: 32, whole address space if paged)", type=int
+    )
+    parser.add_argument("-map", help="file mapped (copy-on-write) into the data memory", metavar="FILE")
+    parser.add_argument(
+        "-mapbase", help="address of the mapped file (default: 0)", type=lambda x: int(x, 0), default=0
+    )
+    parser.add_argument("-mapshared", help="write the stores back to the mapped file", action="store_true")
+    parser.add_argument("-mapsave", help="write the final image of the mapped file to a file", metavar="FILE")
+    parser.add_argument(
+        "-artifact", help="write the encoded instructions of an assembly file next to it", action="store_true"
+    )
+    parser.add_argument("-nocache", help="always assemble, without the assembly cache", action="store_true")
+    parser.add_argument("-clearcache", help="remove the programs stored in the assembly cache", action="store_true")
+    parser.add_argument(
+        "-cachedir", help="directory of the assembly cache (default: ~/.cache/riscv-processor-model)", metavar="DIR"
+    )
+    parser.add_argument(
+        "-jobs", help="processes assembling the program (default: 1, 0 - one per CPU)", type=int, default=1
+    )
+    parser.add_argument("-maxinst", help="maximum number of instructions executed", type=int)
+    parser.add_argument("-timeout", help="maximum execution time, in seconds", type=float)
+    parser.add_argument(
+        "-stats", "--stats", help="print the performance counters of the run (default format: table)", nargs="?",
+        choices=("table", "json"), const="table"
+    )
+    parser.add_argument(
+        "-trace", help="record the executed instructions to a binary trace file (see classes/TraceReader.py)",
+        metavar="FILE"
+    )
+    parser.add_argument(
+        "-profile", help="print the sampling profile of the run: flat or collapsed stacks for flame graphs (default "
+        "format: flat)", nargs="?", choices=("flat", "collapsed"), const="flat"
+    )
+    parser.add_argument(
+        "-period", help=f"instructions between two samples of the profile (default: {SAMPLING_PERIOD})", type=int,
+        default=SAMPLING_PERIOD
+    )
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    assemble_parser = commands.add_parser(
+        "assemble", help="assemble an assembly file of any size into a binary program, as a stream"
+    )
+    assemble_parser.add_argument("source", help="assembly file")
+    assemble_parser.add_argument("output", help="binary program to write")
+    assemble_parser.add_argument(
+        "-base", help="load address written in the header (default: no header)", type=lambda x: int(x, 0)
+    )
+    assemble_parser.add_argument(
+        "-entry", help="entry address written in the header (default: the load address)", type=lambda x: int(x, 0)
+    )
     args = parser.parse_args()
-    if not args.gui:
-        cpu = Processor()
-        cpu.run(args.file)
+    if args.command == "assemble":
+        count = stream_assemble_file_to_binary(args.source, args.output, args.base, args.entry)
+        print(f"{count} instructions written to {args.output}")
+    elif not args.gui:
+        memory = args.memory or ("paged" if get_program_format(args.file) == "elf" else "list")
+        data_memory = DATA_MEMORIES[memory]
+        data_mem = data_memory() if args.words is None else data_memory(args.words)
+        if args.map:
+            data_mem = MappedDataMemory(args.map, args.mapbase, args.mapshared, data_mem)
+        assembly_cache = None
+        if not args.nocache or args.clearcache:
+            assembly_cache = AssemblyCache(args.cachedir)
+            if args.clearcache:
+                assembly_cache.clear()
+            if args.nocache:
+                assembly_cache = None
+        cpu = Processor(
+            Datapath(data_mem=data_mem),
+            engine=args.engine,
+            assembly_cache=assembly_cache,
+            assembly_workers=args.jobs or None,
+            perf_counters=args.stats is not None,
+            trace_recorder=TraceRecorder(args.trace) if args.trace else None,
+            profiler=SamplingProfiler(args.period) if args.profile else None,
+        )
+        try:
+            result = cpu.run(args.file, args.artifact, args.maxinst, args.timeout)
+        except ValueError as error:
+            parser.error(str(error))
+        if result.reason != HaltReason.ZERO_WORD:
+            print(f"Halted ({result.reason.value}) after {result.instructions} instructions in {result.elapsed:.3f} s")
         if args.r:
             cpu.print_reg(args.r)
         if args.d:
@@ -158,5 +262,19 @@ if __name__ == "__main__":
             cpu.print_data_memory()
         if args.inst:
             cpu.print_instructions()
+        if args.stats == "json":
+            print(json.dumps(cpu.get_perf_stats(), indent=2))
+        elif args.stats:
+            print(PerfCounters.format_table(cpu.get_perf_stats()))
+        if args.profile == "collapsed":
+            print(cpu.profiler.format_collapsed(cpu.symbolize))
+        elif args.profile:
+            print(cpu.profiler.format_flat(cpu.symbolize))
+        if args.trace:
+            cpu.trace_recorder.close()
+        if args.map:
+            if args.mapsave:
+                data_mem.save(args.mapsave)
+            data_mem.close()
     else:
         interface()
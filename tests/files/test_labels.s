@@ -0,0 +1,13 @@
+# Sum of 1..10 with a call to a function
+main:
+    addi x1, x0, 10
+    addi x2, x0, 0
+loop: add x2, x2, x1
+    addi x1, x1, -1
+    bnez x1, loop
+    jal x5, double
+    beq x0, x0, end
+double:
+    add x2, x2, x2
+    jalr x0, 0(x5)
+end: # halt
@@ -0,0 +1,4 @@
+addi x1, x0, 5
+addi x2, x2, 3
+addi x1, x1, -1
+bne x1, x0, -8
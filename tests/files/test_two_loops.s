@@ -0,0 +1,8 @@
+addi x1,x0,5
+addi x2,x2,3
+addi x1,x1,-1
+bne x1,x0,-8
+addi x3,x0,5
+addi x4,x4,2
+addi x3,x3,-1
+bne x3,x0,-8
@@ -0,0 +1,165 @@
+import random
+import timeit
+
+import pytest
+
+from classes.ALU import ALU, sra
+from classes.ALUOperation import ALUOperation
+from utils.mask_bits import mask_bits
+from utils.sign_extend import get_bit_size, sign_extend
+from utils.unsigned import unsigned
+
+
+def legacy_operate(select, in_1, in_2):
+    """
+    Operation of the ALU before the operation codes (string compares), used as reference.
+    """
+    if select == "add":
+        output = in_1 + in_2
+    elif select == "sub":
+        output = in_1 - in_2
+    elif select == "and":
+        output = in_1 & in_2
+    elif select == "or":
+        output = in_1 | in_2
+    elif select == "xor":
+        output = in_1 ^ in_2
+    elif select == "sll":
+        output = in_1 << in_2
+    elif select == "srl":
+        output = in_1 >> in_2
+    elif select == "slt":
+        output = int(in_1 < in_2)
+    elif select == "sltu":
+        output = int(unsigned(in_1) < unsigned(in_2))
+    elif select == "sra":
+        in_2 = mask_bits(in_2, 0, 4)
+        output = in_1 >> in_2
+        size = get_bit_size(output)
+        output = sign_extend(output, sign=mask_bits(output, size - in_2, size - in_2), size=size)
+    else:
+        output = None
+    return mask_bits(output, 0, 31)
+
+
+class LegacyALU(ALU):
+    """
+    ALU selecting the operation with string compares, as before the operation codes.
+    """
+
+    def set_select(self, select_value):
+        self.select = select_value
+
+    def operate(self):
+        self.output = legacy_operate(self.select, self.in_1, self.in_2)
+        return self.output
+
+
+VALUES = [0, 1, 2, 5, 31, 0x7FF, 0x800, 0x7FFFFFFF, 0x80000000, 0xFFFFFFCE, 0xFFFFFFFF]
+SHIFTS = [0, 1, 2, 4, 31]
+
+
+def mixed_stream(count, seed=0):
+    """
+    Returns a reproducible stream of (operation, a, b) with the operations of RV32I.
+    """
+    generator = random.Random(seed)
+    operations = ["add", "sub", "and", "or", "xor", "sll", "srl", "slt", "sltu", "sra"]
+    stream = []
+    for _ in range(count):
+        operation = generator.choice(operations)
+        if operation in ("sll", "srl"):
+            b = generator.choice(SHIFTS)
+        elif operation == "sra":
+            b = generator.choice(SHIFTS[1:4])
+        else:
+            b = generator.choice(VALUES)
+        # the legacy sra is only right for negative numbers with small shifts
+        a = generator.choice(VALUES[-2:]) if operation == "sra" else generator.choice(VALUES)
+        stream.append((operation, a, b))
+    return stream
+
+
+@pytest.mark.parametrize("operation", ["add", "sub", "and", "or", "xor", "slt", "sltu"])
+def test_same_as_legacy(operation):
+    alu = ALU()
+    alu.set_select(ALUOperation[operation.upper()])
+    for a in VALUES:
+        for b in VALUES:
+            alu.pass_inputs(a, b)
+            assert alu.operate() == legacy_operate(operation, a, b)
+
+
+@pytest.mark.parametrize("operation", ["sll", "srl"])
+def test_shifts_same_as_legacy(operation):
+    alu = ALU()
+    alu.set_select(operation)
+    for a in VALUES:
+        for b in SHIFTS:
+            alu.pass_inputs(a, b)
+            assert alu.operate() == legacy_operate(operation, a, b)
+
+
+def test_sra():
+    assert sra(0xFFFFFFCE, 2) == 0xFFFFFFF3 == legacy_operate("sra", 0xFFFFFFCE, 2)
+    assert sra(0x80000000, 31) == 0xFFFFFFFF
+    assert sra(0x7FFFFFFF, 30) == 0x1
+    assert sra(0x10, 2) == 0x4
+    assert sra(0x10, 5) == 0
+    # srai: funct7 (0x20) is in imm[11:5]
+    assert sra(0xFFFFFF00, 0x404) == 0xFFFFFFF0
+    alu = ALU()
+    alu.set_select(ALUOperation.SRA)
+    alu.pass_inputs(0x40, 0x402)
+    assert alu.operate() == alu.get_output() == 0x10
+
+
+def test_other_operations():
+    alu = ALU()
+    alu.pass_inputs(6, 4)
+    alu.set_select("mul")
+    assert alu.operate() == 24
+    alu.set_select(ALUOperation.DIV)
+    assert alu.operate() == 1
+    alu.set_select(ALUOperation.NOT)
+    assert alu.operate() == 0xFFFFFFF9
+    with pytest.raises(ValueError):
+        alu.set_select("nand")
+
+
+def run_stream(alu, operations):
+    results = []
+    for operation, a, b in operations:
+        alu.set_select(operation)
+        alu.pass_inputs(a, b)
+        results.append(alu.operate())
+    return results
+
+
+def test_mixed_stream_against_legacy_alu():
+    stream = mixed_stream(20000)
+    coded = [(ALUOperation[operation.upper()], a, b) for operation, a, b in stream]
+    assert run_stream(ALU(), coded) == run_stream(LegacyALU(), stream)
+
+
+@pytest.mark.benchmark
+def test_benchmark_against_legacy_alu():
+    stream = mixed_stream(20000)
+    coded = [(ALUOperation[operation.upper()], a, b) for operation, a, b in stream]
+    legacy_time = min(timeit.repeat(lambda: run_stream(LegacyALU(), stream), number=1, repeat=5))
+    new_time = min(timeit.repeat(lambda: run_stream(ALU(), coded), number=1, repeat=5))
+    assert new_time < legacy_time
+
+
+def test_output_computed_once_per_input():
+    alu = ALU()
+    alu.set_select(ALUOperation.ADD)
+    alu.pass_inputs(2, 3)
+    assert alu.operate() == 5
+    assert alu.operate() == 5
+    assert (alu.evaluations, alu.evaluations_avoided) == (1, 1)
+    alu.pass_inputs(2, 4)
+    assert alu.operate() == 6
+    alu.set_select(ALUOperation.SUB)
+    assert alu.operate() == 0xFFFFFFFE
+    assert (alu.evaluations, alu.evaluations_avoided) == (3, 1)
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+import classes.AssemblyCache
+from classes.AssemblyCache import MAGIC, AssemblyCache
+from classes.Processor import Processor
+from utils.encode_instructions import encode_instructions_from_file
+
+SOURCE = "addi x2, x0, 1\naddi x3, x0, 2\n"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AssemblyCache(str(tmp_path / "cache"))
+
+
+def test_init(tmp_path):
+    with pytest.raises(ValueError):
+        AssemblyCache(str(tmp_path), 0)
+    cache = AssemblyCache(str(tmp_path / "a" / "b"))
+    assert os.path.isdir(cache.directory)
+
+
+def test_encode(cache):
+    assert cache.lookup(SOURCE) is None
+    assert cache.encode(SOURCE) == ([1048851, 2097555], {})
+    assert cache.encode(SOURCE) == ([1048851, 2097555], {})
+    assert cache.get_stats() == {"hits": 1, "misses": 2, "evictions": 0, "size": 1, "bytes": len(MAGIC) + 12}
+    with open(cache.get_path(cache.get_key(SOURCE)), "rb") as f:
+        assert f.read() == MAGIC + bytes([2, 0, 0, 0, 0x13, 0x01, 0x10, 0x00, 0x93, 0x01, 0x20, 0x00])
+
+
+def test_symbols(cache):
+    source = "start:\naddi x1, x0, 1\nloop: addi x1, x1, 1\nj loop\n"
+    program = cache.encode(source)
+    assert program.symbols == {"start": 0, "loop": 4}
+    assert cache.lookup(source) == program
+
+
+def test_warm_run_skips_assembler(cache, monkeypatch):
+    expected = encode_instructions_from_file("files/test_r.s")
+    assert cache.encode_file("files/test_r.s").instructions == expected
+
+    def fail(text):
+        raise AssertionError("assembled again")
+
+    monkeypatch.setattr(classes.AssemblyCache, "assemble_text", fail)
+    cpu = Processor(assembly_cache=cache)
+    cpu.run("files/test_r.s")
+    assert cpu.instructions == expected
+    assert cpu.datapath.reg_files.get_value(4) == 50
+
+
+def test_assembler_version_is_part_of_key(cache, monkeypatch):
+    key = cache.get_key(SOURCE)
+    monkeypatch.setattr(classes.AssemblyCache, "ASSEMBLER_VERSION", -1)
+    assert cache.get_key(SOURCE) != key
+    cache.encode(SOURCE)
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_corrupted_entry(cache):
+    cache.encode(SOURCE)
+    path = cache.get_path(cache.get_key(SOURCE))
+    with open(path, "wb") as f:
+        f.write(MAGIC + b"\x00")
+    assert cache.lookup(SOURCE) is None
+    assert not os.path.exists(path)
+    assert cache.encode(SOURCE).instructions == [1048851, 2097555]
+
+
+def test_lru_eviction(tmp_path):
+    # Room for two programs of one instruction
+    cache = AssemblyCache(str(tmp_path), 2 * (len(MAGIC) + 8))
+    sources = [f"addi x{i}, x0, 1\n" for i in range(1, 4)]
+    cache.encode(sources[0])
+    cache.encode(sources[1])
+    os.utime(cache.get_path(cache.get_key(sources[0])), ns=(1, 1))
+    os.utime(cache.get_path(cache.get_key(sources[1])), ns=(2, 2))
+    # Using the first program makes the second the least recently used
+    cache.encode(sources[0])
+    cache.encode(sources[2])
+    assert cache.evictions == 1
+    assert cache.lookup(sources[1]) is None
+    assert cache.lookup(sources[0]) is not None
+    assert cache.lookup(sources[2]) is not None
+
+
+def test_clear(cache):
+    cache.encode(SOURCE)
+    cache.clear()
+    assert cache.get_stats() == {"hits": 0, "misses": 0, "evictions": 0, "size": 0, "bytes": 0}
+    assert cache.lookup(SOURCE) is None
@@ -0,0 +1,142 @@
+import tracemalloc
+
+import pytest
+
+from classes.InstructionMemory import InstructionMemory
+from classes.Processor import Processor
+from utils.binary_program import BINARY_HEADER, BINARY_MAGIC, get_program_format, read_binary_program, \
+    write_binary_program
+from utils.encode_instructions import assemble_file, encode_instructions_from_file, stream_assemble_file, \
+    stream_assemble_file_to_binary
+from utils.write_file_encoded_instructions import write_file
+
+
+def test_write_read_raw(tmp_path):
+    path = str(tmp_path / "program.bin")
+    write_binary_program(path, [0x00100113, 0xFFFFFFFF])
+    with open(path, "rb") as f:
+        assert f.read() == bytes([0x13, 0x01, 0x10, 0x00, 0xFF, 0xFF, 0xFF, 0xFF])
+    program = read_binary_program(path)
+    assert (bytes(program.image), program.load_address, program.entry) == (
+        bytes([0x13, 0x01, 0x10, 0x00, 0xFF, 0xFF, 0xFF, 0xFF]), 0, 0
+    )
+
+
+def test_write_read_header(tmp_path):
+    path = str(tmp_path / "program")
+    write_binary_program(path, [0x00100113], load_address=0x40, entry=0x44)
+    with open(path, "rb") as f:
+        assert f.read(BINARY_HEADER.size) == BINARY_MAGIC + bytes([0x40, 0, 0, 0, 0x44, 0, 0, 0])
+    program = read_binary_program(path)
+    assert (len(program.image), program.load_address, program.entry) == (4, 0x40, 0x44)
+
+
+def test_read_invalid(tmp_path):
+    path = tmp_path / "program.bin"
+    path.write_bytes(b"\x13\x01\x10")
+    with pytest.raises(ValueError):
+        read_binary_program(str(path))
+    path.write_bytes(BINARY_HEADER.pack(BINARY_MAGIC, 2, 0))
+    with pytest.raises(ValueError):
+        read_binary_program(str(path))
+
+
+def test_get_program_format(tmp_path):
+    assert get_program_format("files/test_r.s") == "asm"
+    assert get_program_format("files/test_r") == "text"
+    raw = str(tmp_path / "raw")
+    write_binary_program(raw, encode_instructions_from_file("files/test_r.s"))
+    assert get_program_format(raw) == "binary"
+    header = str(tmp_path / "header")
+    # Header of a program whose words are all made of digit characters
+    write_binary_program(header, [0x30303030], 0, 0)
+    assert get_program_format(header) == "binary"
+    (tmp_path / "empty.bin").write_bytes(b"")
+    assert get_program_format(str(tmp_path / "empty.bin")) == "binary"
+
+
+def test_load_instructions_from_binary_file(tmp_path):
+    path = str(tmp_path / "program.bin")
+    write_binary_program(path, [0x01234567, 0x89ABCDEF], load_address=8)
+    im = InstructionMemory(2)
+    generation = im.generation
+    program = im.load_instructions_from_binary_file(path)
+    assert program.load_address == 8
+    # The memory grows to hold the program and a zero word after it
+    assert im.instructions == [0, 0, 0x01234567, 0x89ABCDEF, 0]
+    assert im.instructions_bytes[8:16] == [0x67, 0x45, 0x23, 0x01, 0xEF, 0xCD, 0xAB, 0x89]
+    assert len(im.instructions_bytes) == 20
+    assert im.generation == generation + 1
+    with pytest.raises(ValueError):
+        im.fill_memory_image(b"\x00" * 4, 2)
+
+
+def test_run_binary_matches_text(tmp_path):
+    encoded = encode_instructions_from_file("files/book_test.s")
+    raw = str(tmp_path / "book_test.bin")
+    write_binary_program(raw, encoded)
+    text = str(tmp_path / "book_test")
+    write_file(encoded, text)
+    cpus = []
+    for file in (raw, text, "files/book_test.s"):
+        cpu = Processor()
+        cpu.run(file)
+        cpus.append(cpu)
+    for cpu in cpus[:2]:
+        assert cpu.datapath.reg_files.values == cpus[2].datapath.reg_files.values
+        assert cpu.datapath.data_mem.data == cpus[2].datapath.data_mem.data
+
+
+def test_run_binary_entry(tmp_path):
+    # addi x2, x0, 1 is skipped by the entry address
+    path = str(tmp_path / "program")
+    write_binary_program(path, [0x00100113, 0x00200193], load_address=0x100, entry=0x104)
+    cpu = Processor()
+    cpu.run(path)
+    assert cpu.datapath.reg_files.get_value(2) == 0
+    assert cpu.datapath.reg_files.get_value(3) == 2
+    assert cpu.datapath.prog_counter.get_value() == 0x108
+
+
+def test_stream_assemble_file_to_binary(tmp_path):
+    program = assemble_file("files/test_labels.s")
+    symbols = {}
+    assert list(stream_assemble_file("files/test_labels.s", symbols)) == program.instructions
+    assert symbols == program.symbols
+    path = str(tmp_path / "test_labels.bin")
+    assert stream_assemble_file_to_binary("files/test_labels.s", path, load_address=0x40) == len(program.instructions)
+    binary = read_binary_program(path)
+    assert (binary.load_address, binary.entry) == (0x40, 0x40)
+    assert binary.image.cast("I").tolist() == program.instructions
+    # Labels used before their definition are resolved, and errors are raised when the instruction is reached
+    source = tmp_path / "error.s"
+    source.write_text("j end\naddi x1, x0, 1\nend: beq x1, x2, missing\n")
+    stream = stream_assemble_file(str(source))
+    assert next(stream) == 0x0080006F
+    assert next(stream) == 0x00100093
+    with pytest.raises(ValueError):
+        next(stream)
+
+
+def test_stream_assemble_bounded_memory(tmp_path):
+    source = tmp_path / "big.s"
+    blocks = 500
+    with open(source, "w") as f:
+        for i in range(blocks):
+            f.write(f"block{i}:\n")
+            f.write("addi x1, x1, -1 # the comments make the source much bigger than the encoded program\n" * 100)
+            f.write(f"bne x1, x0, block{i}\n")
+        f.write(f"block{blocks}: add x8, x9, x10\n")
+    path = str(tmp_path / "big.bin")
+    tracemalloc.start()
+    try:
+        count = stream_assemble_file_to_binary(str(source), path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert count == 101 * blocks + 1
+    assert source.stat().st_size > 4 * 2**20
+    # Neither the source nor the encoded program (200 KB) is ever entirely in memory
+    assert peak < 2**17
+    with open(path, "rb") as f:
+        assert memoryview(f.read()).cast("I").tolist() == assemble_file(str(source)).instructions
@@ -0,0 +1,214 @@
+import pytest
+
+from classes.BlockTranslator import BlockTranslator
+from classes.Datapath import Datapath
+from classes.HookRegistry import HookRegistry
+from classes.InstructionMemory import InstructionMemory
+from classes.Processor import Processor
+from test_processor import *
+
+
+@pytest.fixture
+def cpu():
+    return Processor(engine="translated")
+
+
+@pytest.mark.parametrize(
+    "file",
+    [
+        "files/test_r.s",
+        "files/test_I.s",
+        "files/test_loads_stores.s",
+        "files/test_branches.s",
+        "files/test_jalr.s",
+        "files/test_uj.s",
+        "files/test_u.s",
+        "files/book_test.s",
+        "files/general_test_1.s",
+        "files/test_loop.s",
+        "files/test_two_loops.s",
+    ],
+)
+@pytest.mark.parametrize("trace_threshold", [None, 1, 50])
+def test_same_state_as_interpreter(file, trace_threshold):
+    reference = Processor(engine="interpreter")
+    reference.run(file)
+    translated = Processor(engine="translated", trace_threshold=trace_threshold)
+    translated.run(file)
+    for i in range(32):
+        assert translated.datapath.reg_files.get_value(i) == reference.datapath.reg_files.get_value(i)
+    assert translated.datapath.data_mem.data == reference.datapath.data_mem.data
+    assert translated.datapath.get_pc() == reference.datapath.get_pc()
+
+
+def test_blocks_cached_by_start_address(cpu):
+    cpu.run("files/test_loop.s")
+    assert cpu.datapath.reg_files.get_value(2) == 15
+    # [0x0, 0xC] runs once, [0x4, 0xC] runs 4 times (back-edge of bne)
+    assert cpu.get_engine_stats() == {
+        "blocks_compiled": 2,
+        "block_executions": 5,
+        "fallbacks": 0,
+        "traces_compiled": 0,
+        "trace_executions": 0,
+        "trace_iterations": 0,
+        "trace_evictions": 0,
+    }
+    assert sorted(cpu.execution_engine.blocks) == [0x0, 0x4]
+    source = cpu.execution_engine.sources[0x4]
+    assert "x2 = (x2 + 3) & 0xFFFFFFFF" in source
+    assert "if x1 != 0:" in source
+
+
+def test_invalidate():
+    datapath = Datapath(inst_mem=InstructionMemory(8, [0x00500093, 0x00308113, 0xFFF08093, 0xFE009CE3, 0]))
+    translator = BlockTranslator(datapath)
+    translator.run()
+    assert sorted(translator.blocks) == [0x0, 0x4]
+    assert translator.invalidate(0x8) == 2
+    assert translator.blocks == {}
+    datapath.inst_mem.fill_memory([0x00100093, 0])
+    datapath.prog_counter.set_value(0)
+    translator.run()
+    assert translator.blocks_compiled == 3
+    assert datapath.reg_files.get_value(1) == 1
+
+
+def test_fallback_to_interpreter():
+    datapath = Datapath(inst_mem=InstructionMemory(4, [0x00500093, 0x0000007F]))
+    translator = BlockTranslator(datapath)
+    with pytest.raises(ValueError):
+        translator.run()
+    stats = translator.get_stats()
+    assert (stats["blocks_compiled"], stats["block_executions"], stats["fallbacks"]) == (1, 1, 1)
+    assert datapath.reg_files.get_value(1) == 5
+    assert datapath.get_pc() == 4
+
+
+def test_hot_loop_becomes_trace():
+    cpu = Processor(engine="translated", trace_threshold=2)
+    cpu.run("files/test_loop.s")
+    assert cpu.datapath.reg_files.get_value(2) == 15
+    # iterations 1 and 2 run as blocks (bne taken twice), iterations 3 to 5 inside the trace
+    stats = cpu.get_engine_stats()
+    assert (stats["block_executions"], stats["traces_compiled"]) == (2, 1)
+    assert (stats["trace_executions"], stats["trace_iterations"]) == (1, 3)
+    assert cpu.trace_cache.heads() == [0x4]
+    trace = cpu.trace_cache.get(0x4)
+    assert trace.blocks == (0x4,)
+    assert trace.ranges == ((0x4, 0x10),)
+    assert "while True:" in trace.source
+    assert "if not (x1 != 0):" in trace.source
+    # branches inside the trace are only profiled when they leave it
+    assert cpu.branch_profile.get_counts(0xC) == (2, 1)
+
+
+# 'beq' skips the increment every 4 iterations
+SIDE_EXIT_LOOP = """
+addi x1, x0, 2000
+loop:
+andi x3, x1, 3
+beq x3, x0, skip
+addi x2, x2, 1
+skip:
+addi x1, x1, -1
+bne x1, x0, loop
+"""
+
+
+def test_trace_with_side_exit_compiled_once():
+    # the trace is left through the side exit every 4 iterations and entered again from the cache
+    cpu = Processor(engine="translated")
+    cpu.run_asm(SIDE_EXIT_LOOP)
+    assert cpu.datapath.reg_files.get_value(2) == 1500
+    stats = cpu.get_engine_stats()
+    assert stats["traces_compiled"] == 1
+    assert stats["trace_executions"] > 400
+    assert cpu.trace_cache.get(0x4).branches == (False, True)
+
+
+def test_trace_along_cold_path_built_again():
+    # after 2 iterations the profile of 'beq' is even, so the first trace follows it taken and is left 3 times out of 4
+    cpu = Processor(engine="translated", trace_threshold=2)
+    cpu.run_asm(SIDE_EXIT_LOOP)
+    assert cpu.datapath.reg_files.get_value(2) == 1500
+    assert cpu.get_engine_stats()["traces_compiled"] == 2
+    assert cpu.trace_cache.get(0x4).branches == (False, True)
+
+
+def test_trace_builds_capped():
+    datapath = Datapath(inst_mem=InstructionMemory(8, [0x00500093, 0x00308113, 0xFFF08093, 0xFE009CE3, 0]))
+    translator = BlockTranslator(datapath)
+    for _ in range(BlockTranslator.MAX_TRACE_BUILDS):
+        assert 0x4 not in translator.trace_failures
+        assert translator.build_trace(0x4) is not None
+    assert 0x4 in translator.trace_failures
+    translator.invalidate(0x8)
+    assert translator.trace_failures == set()
+
+
+def test_branch_to_next_instruction():
+    # 'beq x3, x0, 4' continues at the next instruction either way, its direction is returned by the block
+    program = "addi x1, x0, {}\nloop:\nandi x3, x1, 3\nbeq x3, x0, 4\naddi x1, x1, -1\nbne x1, x0, loop"
+    reference = Processor(engine="interpreter")
+    reference.run_asm(program.format(20))
+    translated = Processor(engine="translated", trace_threshold=None)
+    translated.run_asm(program.format(20))
+    assert translated.branch_profile.get_counts(0x8) == reference.branch_profile.get_counts(0x8) == (5, 15)
+    cpu = Processor(engine="translated")
+    cpu.run_asm(program.format(2000))
+    trace = cpu.trace_cache.get(0x4)
+    assert trace.branches == (False, True)
+    assert "if x3 == 0:" in trace.source
+
+
+def test_trace_cache_eviction():
+    cpu = Processor(engine="translated", trace_threshold=2, trace_cache_size=1)
+    cpu.run("files/test_two_loops.s")
+    assert cpu.datapath.reg_files.get_value(2) == 15
+    assert cpu.datapath.reg_files.get_value(4) == 10
+    stats = cpu.get_engine_stats()
+    assert (stats["traces_compiled"], stats["trace_evictions"]) == (2, 1)
+    assert cpu.trace_cache.heads() == [0x14]
+
+
+def test_invalidate_removes_traces():
+    datapath = Datapath(inst_mem=InstructionMemory(8, [0x00500093, 0x00308113, 0xFFF08093, 0xFE009CE3, 0]))
+    translator = BlockTranslator(datapath, trace_threshold=1)
+    translator.run()
+    assert 0x4 in translator.trace_cache
+    translator.invalidate(0x20)
+    assert 0x4 in translator.trace_cache
+    translator.invalidate(0x8)
+    assert len(translator.trace_cache) == 0
+
+
+def test_invalid_trace_threshold():
+    with pytest.raises(ValueError):
+        Processor(engine="translated", trace_threshold=0)
+
+
+def test_perf_counters_inside_traces():
+    # the loops run inside traces left through a side exit, counted as the interpreter counts them
+    stats = []
+    for engine in ("interpreter", "translated"):
+        cpu = Processor(engine=engine, trace_threshold=2, perf_counters=True)
+        cpu.run("files/test_two_loops.s")
+        stats.append({key: value for key, value in cpu.get_perf_stats().items() if key not in ("wall_time", "mips")})
+    assert cpu.get_engine_stats()["trace_executions"] == 2
+    assert stats[0] == stats[1]
+    assert (stats[1]["instructions"], stats[1]["branches_taken"], stats[1]["branches_not_taken"]) == (32, 8, 2)
+
+
+def test_hooks_inside_traces():
+    # the hooks are called from the traces in the order the interpreter calls them
+    events = []
+    for engine in ("interpreter", "translated"):
+        cpu = Processor(engine=engine, trace_threshold=2)
+        events.append([])
+        for event in HookRegistry.EVENTS:
+            cpu.hooks.register(event, lambda *args, event=event, log=events[-1]: log.append((event,) + args))
+        cpu.run("files/test_two_loops.s")
+    assert cpu.get_engine_stats()["trace_executions"] == 2
+    assert events[0] == events[1]
+    assert sum(event[0] == "on_retire" for event in events[1]) == 32
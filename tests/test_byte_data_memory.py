@@ -0,0 +1,95 @@
+import pytest
+
+from classes.ByteDataMemory import ByteDataMemory
+from classes.DataMemory import DataMemory
+from classes.Datapath import Datapath
+from classes.Processor import Processor
+
+
+def test_init():
+    dm = ByteDataMemory(16)
+    assert dm.words == 16
+    assert dm.data == bytearray(64)
+    assert dm.data_in is None
+    assert dm.data_out is None
+    assert not dm.write_enable
+    assert not dm.read_enable
+
+
+def test_load():
+    dm = ByteDataMemory(4)
+    dm.data[:] = bytes([1, 2, 3, 4, 5, 6, 7, 8, 0x89, 0x90, 11, 12, 0x80, 0, 0, 0x80])
+    dm.set_enable(False, True)
+    assert dm.load(0, DataMemory.WORD, False) == 0x04030201
+    assert dm.load(4, DataMemory.HALF_WORD, False) == 0x0605
+    assert dm.load(8, DataMemory.BYTE, False) == 0xFFFFFF89
+    assert dm.load(8, DataMemory.BYTE, True) == 0x89
+    assert dm.load(8, DataMemory.HALF_WORD, False) == 0xFFFF9089
+    assert dm.load(8, DataMemory.HALF_WORD, True) == 0x9089
+    assert dm.load(12, DataMemory.WORD, False) == 0x80000080
+    dm.set_enable(False, False)
+    assert dm.load(0, DataMemory.WORD, False) == "Read Enable is unset!"
+    dm.set_enable(False, True)
+    with pytest.raises(ValueError):
+        dm.load(0, 5, False)
+    with pytest.raises(IndexError):
+        dm.load(100, DataMemory.WORD, False)
+    with pytest.raises(IndexError):
+        dm.load(2, DataMemory.WORD, False)
+
+
+def test_store():
+    dm = ByteDataMemory(16)
+    dm.set_enable(True, False)
+    assert dm.store(0, 0x04030201, DataMemory.WORD) == 0x04030201
+    assert list(dm.data[0:4]) == [1, 2, 3, 4]
+    assert dm.store(4, 0x10605, DataMemory.HALF_WORD) == 0x0605
+    assert list(dm.data[4:6]) == [5, 6]
+    assert dm.store(8, 0x107, DataMemory.BYTE) == 0x07
+    assert dm.get_value(8) == 0x07
+    dm.set_enable(False, False)
+    assert dm.store(0, 0x04030201, DataMemory.WORD) == "Write Enable is unset!"
+    dm.set_enable(True, False)
+    with pytest.raises(ValueError):
+        dm.store(0, 0x04030201, 5)
+    with pytest.raises(ValueError):
+        dm.store(0, 0x100000000, DataMemory.WORD)
+    with pytest.raises(IndexError):
+        dm.store(100, 5, DataMemory.WORD)
+
+
+@pytest.mark.parametrize("size", [DataMemory.BYTE, DataMemory.HALF_WORD, DataMemory.WORD])
+@pytest.mark.parametrize("value", [0, 0x7F, 0x80, 0xFF, 0x7FFF, 0x8000, 0xFFFF, 0x12345678, 0x80000000, 0xFFFFFFFF])
+def test_same_as_list_memory(size, value):
+    reference = DataMemory(4)
+    memory = ByteDataMemory(4)
+    for dm in (reference, memory):
+        dm.set_enable(True, True)
+    assert memory.store(8, value, size) == reference.store(8, value, size)
+    assert list(memory.data) == reference.data
+    for load_size in (DataMemory.BYTE, DataMemory.HALF_WORD, DataMemory.WORD):
+        for uns in (False, True):
+            assert memory.load(8, load_size, uns) == reference.load(8, load_size, uns)
+
+
+def test_large_memory():
+    dm = ByteDataMemory(16 * 2**20)
+    dm.set_enable(True, True)
+    assert len(dm.data) == 64 * 2**20
+    dm.store(64 * 2**20 - 4, 0xDEADBEEF, DataMemory.WORD)
+    assert dm.load(64 * 2**20 - 4, DataMemory.WORD, True) == 0xDEADBEEF
+    with pytest.raises(IndexError):
+        dm.load(64 * 2**20, DataMemory.BYTE, True)
+    dm.clear_memory()
+    assert dm.get_value(64 * 2**20 - 1) == 0
+
+
+@pytest.mark.parametrize("engine", Processor.ENGINES)
+def test_processor_with_byte_memory(engine):
+    reference = Processor()
+    reference.run("files/test_loads_stores.s")
+    cpu = Processor(Datapath(data_mem=ByteDataMemory()), engine=engine)
+    cpu.run("files/test_loads_stores.s")
+    assert list(cpu.datapath.data_mem.data) == reference.datapath.data_mem.data
+    for i in range(32):
+        assert cpu.datapath.reg_files.get_value(i) == reference.datapath.reg_files.get_value(i)
@@ -7,6 +7,7 @@ from classes.Datapath import Datapath
 from classes.ImmediateGenerator import ImmediateGenerator
 from classes.InstructionMemory import InstructionMemory
 from classes.InstructionType import InstructionType
+from classes.Processor import Processor
 from classes.ProgramCounter import ProgramCounter
 from classes.RegisterFiles import RegisterFiles
 
@@ -112,3 +113,33 @@ def test_get_value_rd(datapath):
 def test_set_reg_w_en(datapath):
     datapath.set_signals(0, 0, 0, 0, 0, "add", InstructionType.I, 0, 1, 2, 0)
     assert datapath.reg_w_en == 1
+
+
+def test_single_evaluation_per_cycle(datapath):
+    # addi x1, x0, 5
+    datapath.inst_mem.instructions[0] = 0x00500093
+    datapath.set_signals(0, 0, 1, 1, 0, "add", InstructionType.I, False, True, 0, False)
+    datapath.run()
+    assert datapath.reg_files.get_value(1) == 5
+    assert datapath.get_pc() == 4
+    # operate(), store_into_memory() and write_back() share the ALU output
+    assert datapath.get_evaluation_stats() == {
+        "alu_evaluations": 1,
+        "alu_evaluations_avoided": 2,
+        "imm_evaluations": 1,
+        "imm_evaluations_avoided": 0,
+    }
+    assert datapath.get_immediate() == 5
+    assert datapath.get_evaluation_stats()["imm_evaluations_avoided"] == 1
+
+
+def test_evaluation_stats_of_program():
+    cpu = Processor()
+    cpu.run("files/test_loop.s")
+    # 16 instructions executed, immediates come from the decode cache
+    assert cpu.get_evaluation_stats() == {
+        "alu_evaluations": 16,
+        "alu_evaluations_avoided": 32,
+        "imm_evaluations": 0,
+        "imm_evaluations_avoided": 0,
+    }
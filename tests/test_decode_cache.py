@@ -0,0 +1,42 @@
+import pytest
+
+from classes.ALUOperation import ALUOperation
+from classes.DecodeCache import DecodeCache, DecodedInstruction
+from classes.Processor import Processor
+
+
+@pytest.fixture
+def cpu():
+    return Processor()
+
+
+def test_lookup_and_insert():
+    cache = DecodeCache()
+    assert cache.lookup(0x00500093) is None
+    decoded = DecodedInstruction(0x00500093, 1, 0, 5, 5, ALUOperation.ADD, (), None)
+    assert cache.insert(decoded) is decoded
+    assert cache.lookup(0x00500093) is decoded
+    assert cache.get_stats() == {"hits": 1, "misses": 1, "size": 1}
+    cache.clear()
+    assert cache.get_stats() == {"hits": 0, "misses": 0, "size": 0}
+
+
+def test_run_loop_hits_cache(cpu):
+    cpu.reset()
+    cpu.run("files/test_loop.s")
+    assert cpu.datapath.reg_files.get_value(1) == 0
+    assert cpu.datapath.reg_files.get_value(2) == 15
+    # 4 distinct instruction words, 1 + 5 * 3 instructions executed
+    assert cpu.get_decode_cache_stats() == {"hits": 12, "misses": 4, "size": 4}
+
+
+def test_decoded_instruction(cpu):
+    cpu.reset()
+    cpu.run("files/test_loop.s")
+    decoded = cpu.decode_cache.entries[cpu.datapath.inst_mem.instructions[2]]
+    assert (decoded.rd, decoded.rs1, decoded.imm) == (1, 1, 0xFFFFFFFF)
+    assert decoded.operation == ALUOperation.ADD
+    assert decoded.comparison_type is None
+    branch = cpu.decode_cache.entries[cpu.datapath.inst_mem.instructions[3]]
+    assert (branch.rs1, branch.rs2, branch.imm) == (1, 0, 0xFFFFFFF8)
+    assert branch.comparison_type == "bne"
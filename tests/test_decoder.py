@@ -0,0 +1,154 @@
+import pytest
+
+from classes.ALUOperation import ALUOperation
+from classes.ControlUnit import ControlUnit
+from classes.Decoder import Decoder
+from classes.InstructionType import InstructionType
+
+
+def legacy_signals(opcode, funct3, funct7):
+    """
+    Control signals of an instruction as decoded by the original if/elif chains of the control unit (reference for
+    the decode tables).
+    """
+    size, load_unsigned = 0, False
+    if opcode == 0x33:
+        inst_type = InstructionType.R
+    elif opcode in [0x13, 0x03, 0x67]:
+        inst_type = InstructionType.I
+    elif opcode == 0x23:
+        inst_type = InstructionType.S
+    elif opcode == 0x63:
+        inst_type = InstructionType.SB
+    elif opcode == 0x6F:
+        inst_type = InstructionType.UJ
+    elif opcode in [0x37, 0x17]:
+        inst_type = InstructionType.U
+    else:
+        raise ValueError(f"Invalid instruction! Opcode ({opcode}) not supported!")
+    inst_load = opcode == 0x03
+    inst_jalr = opcode == 0x67
+    if inst_load or inst_type == InstructionType.S:
+        if funct3 == 0x0:
+            size, load_unsigned = 1, False
+        elif funct3 == 0x1:
+            size, load_unsigned = 2, False
+        elif funct3 == 0x2:
+            size, load_unsigned = 4, False
+        elif funct3 == 0x4:
+            size, load_unsigned = 1, True
+        elif funct3 == 0x5:
+            size, load_unsigned = 2, True
+    if inst_type == InstructionType.R:
+        if funct7 == 0x00:
+            operation = {0x0: "add", 0x4: "xor", 0x6: "or", 0x7: "and", 0x1: "sll", 0x5: "srl", 0x2: "slt",
+                         0x3: "sltu"}[funct3]
+        elif funct7 == 0x20 and funct3 in (0x0, 0x5):
+            operation = "sub" if funct3 == 0x0 else "sra"
+        else:
+            raise ValueError("Invalid funct7!")
+    elif inst_type == InstructionType.I and not inst_load and not inst_jalr:
+        if funct3 == 0x0:
+            operation = "add"
+        elif funct3 == 0x4:
+            operation = "xor"
+        elif funct3 == 0x6:
+            operation = "or"
+        elif funct3 == 0x7:
+            operation = "and"
+        elif funct3 == 0x1 and funct7 == 0x00:
+            operation = "sll"
+        elif funct3 == 0x5 and funct7 == 0x00:
+            operation = "srl"
+        elif funct3 == 0x5 and funct7 == 0x20:
+            operation = "sra"
+        elif funct3 == 0x2:
+            operation = "slt"
+        elif funct3 == 0x3:
+            operation = "sltu"
+        else:
+            raise ValueError("Invalid combination of funct3 and funct7")
+    else:
+        operation = "add"
+    comparison_type = None
+    if opcode == 0x63:
+        comparison_type = {0x0: "beq", 0x1: "bne", 0x4: "blt", 0x6: "blt", 0x5: "bge", 0x7: "bge"}.get(funct3)
+    if inst_load:
+        wb_sel = 0
+    elif inst_jalr or inst_type == InstructionType.UJ:
+        wb_sel = 2
+    else:
+        wb_sel = 1
+    return (
+        1 if inst_type in [InstructionType.UJ, InstructionType.SB] or opcode == 0x17 else 0,
+        1 if inst_jalr or inst_type == InstructionType.UJ else 0,
+        0 if inst_type is InstructionType.R else 1,
+        wb_sel,
+        1 if inst_type == InstructionType.S else 0,
+        ALUOperation[operation.upper()],
+        inst_type,
+        inst_type == InstructionType.R and funct3 in [0x6, 0x7],
+        inst_type not in [InstructionType.S, InstructionType.SB],
+        size,
+        load_unsigned,
+    ), comparison_type
+
+
+# Encodings accepted by the original control unit that are not valid RV32I instructions
+NOT_RV32I = {
+    0x03: (0x3, 0x6, 0x7),
+    0x23: (0x3, 0x4, 0x5, 0x6, 0x7),
+    0x63: (0x2, 0x3),
+    0x67: (0x1, 0x2, 0x3, 0x4, 0x5, 0x6, 0x7),
+}
+
+
+def test_tables_match_legacy_decoding():
+    checked = 0
+    for opcode in range(0x80):
+        for funct3 in range(0x8):
+            for funct7 in range(0x80):
+                try:
+                    expected, comparison_type = legacy_signals(opcode, funct3, funct7)
+                except (ValueError, KeyError):
+                    with pytest.raises(ValueError):
+                        Decoder.decode_fields(opcode, funct3, funct7)
+                    continue
+                if funct3 in NOT_RV32I.get(opcode, ()):
+                    with pytest.raises(ValueError):
+                        Decoder.decode_fields(opcode, funct3, funct7)
+                    continue
+                signals = Decoder.decode_fields(opcode, funct3, funct7)
+                assert signals.get_signals() == expected
+                assert signals.comparison_type == comparison_type
+                checked += 1
+    # 10 R-type, 6 * 128 + 3 I-type, 5 * 128 loads, 128 jalr, 3 * 128 stores, 6 * 128 branches, 3 * 1024 U/UJ
+    assert checked == 10 + 771 + 640 + 128 + 384 + 768 + 3072
+
+
+def test_decode_instruction_word():
+    # addi x8, x9, -12
+    signals = Decoder.decode(0xFF448413)
+    assert signals.inst_type == InstructionType.I
+    assert signals.operation == ALUOperation.ADD
+    assert signals.b_sel == 1
+    # srai x12, x4, 2
+    assert Decoder.decode(0x40225613).operation == ALUOperation.SRA
+    # bne x1, x2, -50
+    assert Decoder.decode(0xFC2097E3).comparison_type == "bne"
+    with pytest.raises(ValueError):
+        Decoder.decode(0xFFFFFFFF)
+
+
+def test_control_unit_facade():
+    control = ControlUnit()
+    control.fetch_instruction(0x0221A423)  # sw x2, 40(x3)
+    control.set_signals()
+    assert control.get_signals() == (0, 0, 1, 1, 1, ALUOperation.ADD, InstructionType.S, False, False, 4, False)
+    control.fetch_instruction(0x00C7C6B3)  # xor x13, x15, x12
+    control.set_signals()
+    assert control.alu_sel == ALUOperation.XOR
+    assert control.inst_type == InstructionType.R
+    control.fetch_instruction(0x7F)
+    with pytest.raises(ValueError):
+        control.set_signals()
@@ -0,0 +1,99 @@
+import glob
+import timeit
+
+import pytest
+
+from classes.Disassembler import Disassembler
+from classes.InstructionMemory import InstructionMemory
+from classes.Processor import Processor
+from utils.encode_instruction import encode_instruction
+from utils.encode_instructions import assemble_file, encode_instructions_from_text
+
+LOOP = """
+addi x1, x0, 2000
+loop: addi x2, x2, 3
+xor x3, x2, x1
+sw x3, 0(x0)
+addi x1, x1, -1
+bne x1, x0, loop
+"""
+
+
+@pytest.mark.parametrize(
+    "instruction, expected_output",
+    [
+        (0x003100B3, "add x1, x2, x3"),
+        (0x403100B3, "sub x1, x2, x3"),
+        (0xFFF00093, "addi x1, x0, -1"),
+        (0x40205093, "srai x1, x0, 2"),
+        (0x00311093, "slli x1, x2, 3"),
+        (0xFFC12083, "lw x1, -4(x2)"),
+        (0x00414083, "lbu x1, 4(x2)"),
+        (0x000100E7, "jalr x1, 0(x2)"),
+        (0x0020A423, "sw x2, 8(x1)"),
+        (0xFE209CE3, "bne x1, x2, -8"),
+        (0x0000F2B7, "lui x5, 0xF"),
+        (0xFFFFF297, "auipc x5, 0xFFFFF"),
+        (0xFF9FF0EF, "jal x1, -8"),
+        (0x00000073, "ecall"),
+        (0x00100073, "ebreak"),
+        (0x00000000, ".word 0x00000000"),
+        (0x022080B3, ".word 0x022080B3"),
+    ],
+)
+def test_disassemble(instruction, expected_output):
+    assert Disassembler().disassemble(instruction) == expected_output
+
+
+def test_disassemble_round_trip():
+    # The text of every instruction of the test programs is assembled back into the same word
+    disassembler = Disassembler()
+    for file in sorted(glob.glob("files/*.s")):
+        for instruction in assemble_file(file).instructions:
+            assert encode_instruction(disassembler.disassemble(instruction)) == instruction
+
+
+def test_entries_and_decode_cache():
+    cpu = Processor()
+    cpu.run("files/test_loop.s")
+    stats = cpu.get_decode_cache_stats()
+    disassembler = Disassembler(cpu.decode_cache)
+    words = cpu.datapath.inst_mem.instructions[:4] * 3
+    assert disassembler.disassemble_all(words) == [disassembler.disassemble(word) for word in words]
+    assert len(disassembler.entries) == 4
+    # The instructions executed were already decoded by the processor
+    assert cpu.get_decode_cache_stats()["misses"] == stats["misses"]
+    disassembler.clear()
+    assert disassembler.entries == {}
+
+
+def test_print_instructions(capsys):
+    im = InstructionMemory(3)
+    im.load_instructions_from_asm("addi x2, x0, 1\nsw x2, 4(x0)")
+    im.print_instructions()
+    assert capsys.readouterr().out.splitlines() == [
+        "Inst 0000: 0x00100113  addi x2, x0, 1",
+        "Inst 0001: 0x00202223  sw x2, 4(x0)",
+        "Inst 0002: 0x00000000  .word 0x00000000",
+    ]
+
+
+def test_annotate_trace():
+    encoded = encode_instructions_from_text(LOOP)
+    trace = encoded[:1] + encoded[1:] * 2000
+    disassembler = Disassembler()
+    annotated = disassembler.disassemble_all(trace)
+    body = ["addi x2, x2, 3", "xor x3, x2, x1", "sw x3, 0(x0)", "addi x1, x1, -1", "bne x1, x0, -16"]
+    assert annotated == ["addi x1, x0, 2000"] + body * 2000
+    # Each instruction of the loop is decoded once
+    assert len(disassembler.entries) == 6
+
+
+@pytest.mark.benchmark
+def test_benchmark_annotate_trace():
+    # Annotating the trace of a run takes a small fraction of the run itself
+    encoded = encode_instructions_from_text(LOOP)
+    trace = encoded[:1] + encoded[1:] * 2000
+    run_time = min(timeit.repeat(lambda: Processor().run_asm(LOOP), number=1, repeat=5))
+    annotate_time = min(timeit.repeat(lambda: Disassembler().disassemble_all(trace), number=1, repeat=5))
+    assert annotate_time * 10 < run_time
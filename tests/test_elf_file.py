@@ -0,0 +1,185 @@
+import struct
+
+import pytest
+
+from classes.ByteDataMemory import ByteDataMemory
+from classes.Datapath import Datapath
+from classes.ElfFile import PF_R, PF_W, PF_X, PT_LOAD, STT_FUNC, STT_OBJECT, ElfFile
+from classes.PagedDataMemory import PagedDataMemory
+from classes.Processor import Processor
+from utils.binary_program import get_program_format
+from utils.encode_instruction import encode_instruction
+
+ELF_PATH = "files/test_elf"
+
+TEXT = [
+    "addi x8, x0, 1",  # skipped, the entry is 0x4
+    "lw x5, 64(x0)",
+    "lw x6, 68(x0)",
+    "addi x6, x6, 7",
+    "sw x6, 68(x0)",
+    "jal x1, 12",
+    None,
+    None,
+    "addi x7, x0, 3",  # func
+    "jalr x0, 0(x1)",
+]
+
+# name, address, size, type, section (0 - undefined)
+SYMBOLS = [
+    ("_start", 0x4, 0x14, STT_FUNC, 1),
+    ("func", 0x20, 0x8, STT_FUNC, 1),
+    ("value", 0x40, 0x4, STT_OBJECT, 2),
+    ("counter", 0x44, 0x4, STT_OBJECT, 3),
+    ("external", 0x0, 0x0, STT_FUNC, 0),
+]
+
+
+def build_elf(text, text_address, entry, data, data_address, bss_size, symbols, machine=243, elf_class=1):
+    """
+    Builds a minimal statically linked ELF32 executable with a text segment, a data segment (with .bss) and a symbol
+    table.
+    """
+    program_headers_offset = 52
+    text_offset = program_headers_offset + 2 * 32
+    data_offset = text_offset + len(text)
+    strtab = b"\x00"
+    symtab = bytes(16)
+    for name, address, size, symbol_type, section in symbols:
+        symtab += struct.pack("<IIIBBH", len(strtab), address, size, (1 << 4) | symbol_type, 0, section)
+        strtab += name.encode() + b"\x00"
+    shstrtab = b"\x00.text\x00.data\x00.bss\x00.symtab\x00.strtab\x00.shstrtab\x00"
+    symtab_offset = data_offset + len(data)
+    strtab_offset = symtab_offset + len(symtab)
+    shstrtab_offset = strtab_offset + len(strtab)
+    section_headers_offset = shstrtab_offset + len(shstrtab) + (-(shstrtab_offset + len(shstrtab)) % 4)
+    sections = [
+        (0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        (1, 1, 6, text_address, text_offset, len(text), 0, 0, 4, 0),
+        (7, 1, 3, data_address, data_offset, len(data), 0, 0, 4, 0),
+        (13, 8, 3, data_address + len(data), symtab_offset, bss_size, 0, 0, 4, 0),
+        (18, 2, 0, 0, symtab_offset, len(symtab), 5, 1, 4, 16),
+        (26, 3, 0, 0, strtab_offset, len(strtab), 0, 0, 1, 0),
+        (34, 3, 0, 0, shstrtab_offset, len(shstrtab), 0, 0, 1, 0),
+    ]
+    header = struct.pack(
+        "<16sHHIIIIIHHHHHH", b"\x7fELF" + bytes([elf_class, 1, 1]) + bytes(9), 2, machine, 1, entry,
+        program_headers_offset, section_headers_offset, 0, 52, 32, 2, 40, len(sections), 6
+    )
+    program_headers = struct.pack(
+        "<IIIIIIII", PT_LOAD, text_offset, text_address, text_address, len(text), len(text), PF_R | PF_X, 4
+    ) + struct.pack(
+        "<IIIIIIII", PT_LOAD, data_offset, data_address, data_address, len(data), len(data) + bss_size,
+        PF_R | PF_W, 4
+    )
+    image = header + program_headers + text + data + symtab + strtab + shstrtab
+    image += bytes(section_headers_offset - len(image))
+    return image + b"".join(struct.pack("<IIIIIIIIII", *section) for section in sections)
+
+
+def build_test_elf(**kwargs):
+    text = b"".join(struct.pack("<I", encode_instruction(i) if i else 0) for i in TEXT)
+    return build_elf(text, 0x0, 0x4, struct.pack("<I", 0x12345678), 0x40, 8, SYMBOLS, **kwargs)
+
+
+def test_checked_in_file_matches_builder():
+    with open(ELF_PATH, "rb") as f:
+        assert f.read() == build_test_elf()
+
+
+def test_read_headers():
+    with ElfFile(ELF_PATH) as elf:
+        assert elf.entry == 0x4
+        segments = elf.get_load_segments()
+        assert [(s.address, s.file_size, s.memory_size, s.flags) for s in segments] == [
+            (0x0, 40, 40, PF_R | PF_X),
+            (0x40, 4, 12, PF_R | PF_W),
+        ]
+        assert elf.get_segment_data(segments[1]) == bytes([0x78, 0x56, 0x34, 0x12]) + bytes(8)
+    assert elf.mapping.closed
+
+
+def test_symbols():
+    elf = ElfFile(ELF_PATH)
+    elf.close()
+    # Undefined symbols are not part of the table
+    assert [s.name for s in elf.symbols] == ["_start", "func", "value", "counter"]
+    assert elf.get_symbol("func").address == 0x20
+    assert elf.get_symbol("external") is None
+    assert elf.symbolize(0x4) == ("_start", 0)
+    assert elf.symbolize(0x10) == ("_start", 0xC)
+    assert elf.symbolize(0x24) == ("func", 4)
+    assert elf.symbolize(0x18) is None
+    assert elf.symbolize(0x0) is None
+
+
+@pytest.mark.parametrize("kwargs", [{"machine": 62}, {"elf_class": 2}])
+def test_invalid_elf(tmp_path, kwargs):
+    path = tmp_path / "invalid"
+    path.write_bytes(build_test_elf(**kwargs))
+    with pytest.raises(ValueError):
+        ElfFile(str(path))
+    path.write_bytes(build_test_elf()[:60])
+    with pytest.raises(ValueError):
+        ElfFile(str(path))
+    path.write_bytes(b"")
+    with pytest.raises(ValueError):
+        ElfFile(str(path))
+
+
+@pytest.mark.parametrize("data_memory", [None, ByteDataMemory, PagedDataMemory])
+def test_run_elf(data_memory):
+    cpu = Processor(Datapath(data_mem=data_memory()) if data_memory else None)
+    # .bss must be zero-filled when loaded
+    cpu.datapath.data_mem.write_image(0x44, b"\xFF" * 8)
+    assert get_program_format(ELF_PATH) == "elf"
+    cpu.run(ELF_PATH)
+    assert cpu.elf.get_symbol("counter").address == 0x44
+    reg_files = cpu.datapath.reg_files
+    assert reg_files.get_value(8) == 0
+    assert reg_files.get_value(5) == 0x12345678
+    assert reg_files.get_value(6) == 7
+    assert reg_files.get_value(7) == 3
+    assert reg_files.get_value(1) == 0x18
+    data_mem = cpu.datapath.data_mem
+    assert [data_mem.get_value(0x44 + i) for i in range(8)] == [7, 0, 0, 0, 0, 0, 0, 0]
+    # The text segment is also visible to loads
+    assert data_mem.get_value(0x4) == 0x83
+
+
+@pytest.mark.parametrize("engine", Processor.ENGINES)
+def test_run_elf_linked_at_0x10000(tmp_path, engine):
+    path = tmp_path / "high"
+    text = b"".join(struct.pack("<I", encode_instruction(i) if i else 0) for i in TEXT)
+    path.write_bytes(build_elf(text, 0x10000, 0x10004, struct.pack("<I", 0x12345678), 0x20000, 8, []))
+    # lw x5, 64(x0) reads address 0x40, empty in this layout
+    with pytest.raises(ValueError, match="-memory paged"):
+        Processor(engine=engine).run(str(path))
+    cpu = Processor(Datapath(data_mem=PagedDataMemory()), engine=engine)
+    cpu.run(str(path))
+    reg_files = cpu.datapath.reg_files
+    assert (reg_files.get_value(5), reg_files.get_value(6), reg_files.get_value(7)) == (0, 7, 3)
+    assert reg_files.get_value(1) == 0x10018
+    assert cpu.datapath.get_pc() == 0x10018
+    assert cpu.datapath.data_mem.get_value(0x10004) == 0x83
+
+
+def test_elf_linked_at_0x80000000(tmp_path):
+    # the usual base of bare-metal executables, rejected before the instruction memory is extended
+    path = tmp_path / "bare_metal"
+    text = b"".join(struct.pack("<I", encode_instruction(i) if i else 0) for i in TEXT)
+    path.write_bytes(build_elf(text, 0x80000000, 0x80000004, struct.pack("<I", 0x12345678), 0x80010000, 8, []))
+    cpu = Processor(Datapath(data_mem=PagedDataMemory()))
+    size = len(cpu.datapath.inst_mem.instructions)
+    with pytest.raises(ValueError, match="0x80000000"):
+        cpu.run(str(path))
+    assert len(cpu.datapath.inst_mem.instructions) == size
+
+
+def test_paged_write_image_skips_zero_pages():
+    memory = PagedDataMemory()
+    memory.write_image(0x1FFE, bytes(2) + b"\x01" + bytes(2 * 4096))
+    assert sorted(memory.pages) == [2]
+    assert memory.get_value(0x2000) == 1
+    with pytest.raises(IndexError):
+        memory.write_image(memory.size - 1, b"\x00\x00")
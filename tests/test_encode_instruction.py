@@ -1,6 +1,120 @@
+import glob
+import os
+import re
+import timeit
+
 import pytest
 
-from utils.encode_instruction import encode_instruction
+from classes.InstructionType import InstructionType
+from utils.encode_instruction import (
+    TARGET_OPERANDS,
+    _encode_chunk,
+    _resolve_target,
+    assemble,
+    encode_instruction,
+    f3,
+    get_symbol_table,
+    registers,
+)
+from utils.get_instructions_asm_file import get_instructions_asm_file
+from utils.get_type import get_type
+from utils.mask_bits import mask_bits
+from utils.sign_extend import sign_extend
+
+LEGACY_PSEUDO_INSTRUCTIONS = {
+    "nop": lambda inst: ["addi", "x0", "x0", "0"],
+    "li": lambda inst: ["addi", inst[1], "x0", inst[2]],
+    "mv": lambda inst: ["addi", inst[1], inst[2], "0"],
+    "not": lambda inst: ["xori", inst[1], inst[2], "-1"],
+    "neg": lambda inst: ["sub", inst[1], "x0", inst[2]],
+    "beqz": lambda inst: ["beq", inst[1], "x0", inst[2]],
+    "bnez": lambda inst: ["bne", inst[1], "x0", inst[2]],
+    "j": lambda inst: ["jal", "x0", inst[1]],
+    "jr": lambda inst: ["jalr", "x0", inst[1], "0"],
+    "ret": lambda inst: ["jalr", "x0", "x1", "0"],
+}
+
+
+def legacy_immediate(text):
+    if text[0:2] in ["0x", "0X"]:
+        return int(text[2:], 16)
+    elif text[0:2] in ["0b", "0B"]:
+        return int(text[2:], 2)
+    return int(text)
+
+
+def legacy_encode_instruction(instruction, address=0, symbols=None):
+    """
+    The assembler before the mnemonic table: splits the instruction with re.split(), scans the lists of get_type() and
+    builds the encoding with mask_bits() and sign_extend(), one field at a time.
+    """
+    inst = [_ for _ in re.split("[(.*?) ,]", instruction) if _]
+    inst_type, mnemonic = get_type(inst)
+    if symbols is not None:
+        position = TARGET_OPERANDS.get(mnemonic)
+        if position is not None and position < len(inst):
+            inst[position] = _resolve_target(inst[position], address, symbols)
+    position = 4 if inst_type in [InstructionType.R, InstructionType.I, InstructionType.S, InstructionType.SB] else 3
+    if len(inst) > position and inst[position][0] != "#":
+        raise ValueError("Comments should start with the # sign!")
+    if inst_type == InstructionType.PSEUDO:
+        inst = LEGACY_PSEUDO_INSTRUCTIONS[mnemonic](inst)
+        inst_type, mnemonic = get_type(inst)
+    encoded = 0
+    if inst_type == InstructionType.R:
+        encoded |= (0x20 if mnemonic in ["sub", "sra"] else 0x0) << 25
+        encoded |= registers[inst[3]] << 20
+        encoded |= registers[inst[2]] << 15
+        encoded |= f3[mnemonic] << 12
+        encoded |= registers[inst[1]] << 7
+        encoded |= 0x33
+    elif inst_type in [InstructionType.I, InstructionType.S]:
+        if inst[2] in registers.keys():
+            rs1, imm = registers[inst[2]], inst[3]
+        else:
+            rs1, imm = registers[inst[3]], inst[2]
+        imm = sign_extend(legacy_immediate(imm), 12)
+        if inst_type == InstructionType.I:
+            if mnemonic == "jalr":
+                opcode = 0x67
+            elif mnemonic in ["lb", "lh", "lw", "lbu", "lhu"]:
+                opcode = 0x03
+            else:
+                opcode = 0x13
+            encoded = 0 if mnemonic != "srai" else (1 << 30)
+            encoded |= imm << 20
+            encoded |= registers[inst[1]] << 7
+            encoded |= opcode
+        else:
+            encoded |= mask_bits(imm, 5, 11) << 25
+            encoded |= registers[inst[1]] << 20
+            encoded |= mask_bits(imm, 0, 4) << 7
+            encoded |= 0x23
+        encoded |= rs1 << 15
+        encoded |= f3[mnemonic] << 12
+    elif inst_type == InstructionType.U:
+        encoded |= legacy_immediate(inst[2]) << 12
+        encoded |= registers[inst[1]] << 7
+        encoded |= 0x37 if mnemonic == "lui" else 0x17
+    elif inst_type == InstructionType.SB:
+        imm = sign_extend(legacy_immediate(inst[3]), 13)
+        encoded |= mask_bits(imm, 12, 12) << 31
+        encoded |= mask_bits(imm, 5, 10) << 25
+        encoded |= registers[inst[2]] << 20
+        encoded |= registers[inst[1]] << 15
+        encoded |= f3[mnemonic] << 12
+        encoded |= mask_bits(imm, 1, 4) << 8
+        encoded |= mask_bits(imm, 11, 11) << 7
+        encoded |= 0x63
+    elif inst_type == InstructionType.UJ:
+        imm = sign_extend(legacy_immediate(inst[2]), 21)
+        encoded |= mask_bits(imm, 20, 20) << 31
+        encoded |= mask_bits(imm, 1, 10) << 21
+        encoded |= mask_bits(imm, 11, 11) << 20
+        encoded |= mask_bits(imm, 12, 19) << 12
+        encoded |= registers[inst[1]] << 7
+        encoded |= 0x6F
+    return mask_bits(encoded, 0, 31)
 
 
 @pytest.mark.parametrize(
@@ -84,3 +198,179 @@ def test_encode_instruction(instruction, expected_output):
         pytest.raises(ValueError)
     else:
         assert encode_instruction(instruction) == expected_output
+
+
+def test_get_symbol_table():
+    symbols, instructions = get_symbol_table(
+        ["start:", "addi x1, x0, 1", "loop: addi x1, x1, 1  # comment", "bne x1, x0, loop", "end: # done"]
+    )
+    assert symbols == {"start": 0, "loop": 4, "end": 12}
+    assert instructions == ["addi x1, x0, 1", "addi x1, x1, 1  # comment", "bne x1, x0, loop"]
+    with pytest.raises(ValueError):
+        get_symbol_table(["loop:", "nop", "loop: nop"])
+
+
+@pytest.mark.parametrize(
+    "instruction, address, expected_output",
+    [
+        ("bne x1, x2, back", 50, 0xFC2097E3),
+        ("jal x1, back", 500, 0xE0DFF0EF),
+        ("beqz x1, forward", 0, encode_instruction("beq x1, x0, 100")),
+        ("bnez x1, forward", 8, encode_instruction("bne x1, x0, 92")),
+        ("j back", 4, encode_instruction("jal x0, -4")),
+        ("bne x1, x2, -50", 50, 0xFC2097E3),
+        ("bne x1, x2, missing", 0, ValueError),
+    ],
+)
+def test_encode_instruction_with_labels(instruction, address, expected_output):
+    symbols = {"back": 0, "forward": 100}
+    if expected_output == ValueError:
+        with pytest.raises(ValueError):
+            encode_instruction(instruction, address, symbols)
+    else:
+        assert encode_instruction(instruction, address, symbols) == expected_output
+
+
+def test_assemble():
+    program = assemble(get_instructions_asm_file("files/test_labels.s"))
+    assert program.symbols == {"main": 0, "loop": 8, "double": 28, "end": 36}
+    assert program.instructions[4] == encode_instruction("bne x1, x0, -8")
+    assert program.instructions[5] == encode_instruction("jal x5, 8")
+    assert program.instructions[6] == encode_instruction("beq x0, x0, 12")
+    # Programs without labels are encoded as before
+    assert assemble(["addi x1, x0, 5", "bne x1, x0, -8"]).instructions == [
+        encode_instruction("addi x1, x0, 5"), encode_instruction("bne x1, x0, -8")
+    ]
+
+
+def generate_program(blocks):
+    # Each block branches back to its own label and jumps forward to the next block
+    lines = []
+    for i in range(blocks):
+        lines += [
+            f"block{i}: addi x1, x1, -{i % 100}",
+            "sw x2, 40(x3)",
+            f"bne x1, x0, block{i}",
+            "lui x5, 0xFFFF",
+            f"beqz x2, block{max(i - 7, 0)}",
+            f"j block{i + 1}",
+        ]
+    return lines + [f"block{blocks}:", "add x8, x9, x10"]
+
+
+def test_assemble_parallel():
+    # Chunks of 5 instructions never line up with the blocks, so labels are resolved across chunks
+    lines = generate_program(40)
+    serial = assemble(lines)
+    parallel = assemble(lines, workers=2, chunk_size=5)
+    assert parallel == serial
+    assert len(parallel.instructions) == 241
+    # 3 chunks for 8 workers, the last one shorter
+    assert assemble(lines, workers=8, chunk_size=100) == serial
+    with pytest.raises(ValueError):
+        assemble(lines + ["j missing"], workers=2, chunk_size=5)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 7, 240, 241])
+def test_encode_chunks_merge_in_order(chunk_size):
+    symbols, instructions = get_symbol_table(generate_program(40))
+    serial = _encode_chunk((0, instructions), symbols)
+    chunks = [(start, instructions[start:start + chunk_size]) for start in range(0, len(instructions), chunk_size)]
+    # Encoded out of order, each chunk from the address of its first instruction
+    encoded = {start: _encode_chunk((start, chunk), symbols) for start, chunk in reversed(chunks)}
+    assert [instruction for start, _ in chunks for instruction in encoded[start]] == serial
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="parallel assembly needs more than one CPU")
+def test_benchmark_parallel_assembly():
+    lines = generate_program(10000)
+    serial_time = min(timeit.repeat(lambda: assemble(lines), number=1, repeat=3))
+    parallel_time = min(timeit.repeat(lambda: assemble(lines, workers=None), number=1, repeat=3))
+    assert parallel_time < serial_time
+
+
+@pytest.mark.parametrize(
+    "instruction",
+    [
+        "beq x1, x2, 2048",
+        "bne x1, x2, 4094",
+        "blt x1, x2, -4096",
+        "bgeu x1, x2, 0xFFE",
+        "jal x1, 2048",
+        "jal x1, -365026",
+        "j 0x7FFFE",
+        "srai x1, x2, 0b11",
+        "addi x1, x2, 007",
+        "sw x1, 0X10(x2) # comment",
+        "li x5, -2048",
+    ],
+)
+def test_encode_instruction_against_legacy(instruction):
+    assert encode_instruction(instruction) == legacy_encode_instruction(instruction)
+
+
+def test_encode_instruction_tabs_and_case():
+    assert encode_instruction("addi\tx1,\tx2, 3") == encode_instruction("addi x1, x2, 3")
+    assert encode_instruction("ADD x1, x2, x3") == encode_instruction("add x1, x2, x3")
+
+
+def test_encode_label_targets():
+    symbols = {"loop": 0}
+    assert encode_instruction("beq x1, x2, -8", 8, symbols) == encode_instruction("beq x1, x2, loop", 8, symbols)
+    assert encode_instruction("beq x1, x2, -16", 16, symbols) == encode_instruction("beq x1, x2, loop", 16, symbols)
+    assert encode_instruction("j loop", 4, symbols) == encode_instruction("jal x0, -4")
+    with pytest.raises(ValueError):
+        encode_instruction("beq x1, x2, missing", 0, symbols)
+
+
+@pytest.mark.parametrize("instruction", ["beq x1, x2, far", "bnez x1, far", "jal x1, far", "j far"])
+def test_label_offset_range(instruction):
+    assert encode_instruction(instruction, 0, {"far": 2044}) == encode_instruction(instruction.replace("far", "2044"))
+    assert encode_instruction(instruction, 2048, {"far": 0}) == encode_instruction(instruction.replace("far", "-2048"))
+    with pytest.raises(ValueError, match=r"far, offset 2048"):
+        encode_instruction(instruction, 0, {"far": 2048})
+    with pytest.raises(ValueError, match=r"far, offset -2052"):
+        encode_instruction(instruction, 2052, {"far": 0})
+
+
+def test_assemble_label_out_of_range():
+    # 'far' is 2044 bytes after the branch with 510 instructions between them, 2048 bytes with 511
+    lines = ["beq x0, x0, far", "jal x0, far"] + ["addi x1, x1, 1"] * 509 + ["far:", "addi x2, x0, 1"]
+    assert len(assemble(lines).instructions) == 512
+    with pytest.raises(ValueError, match="far"):
+        assemble(lines[:2] + ["addi x1, x1, 1"] + lines[2:])
+
+
+def test_encode_system_instructions():
+    assert encode_instruction("ecall") == 0x00000073
+    assert encode_instruction("EBREAK # stop") == 0x00100073
+
+
+def test_encode_instruction_errors():
+    with pytest.raises(ValueError):
+        encode_instruction("mul x1, x2, x3")
+    with pytest.raises(ValueError):
+        encode_instruction("ecall x1")
+    with pytest.raises(ValueError):
+        encode_instruction("add x1, x2, x3 comment")
+    with pytest.raises(ValueError):
+        encode_instruction("jal x1, 8 comment")
+
+
+def encode_programs(encode, programs):
+    return [[encode(line, 4 * i, symbols) for i, line in enumerate(instructions)] for symbols, instructions in programs]
+
+
+def test_assembler_against_legacy_assembler():
+    programs = [get_symbol_table(get_instructions_asm_file(file)) for file in sorted(glob.glob("files/*.s"))]
+    assert encode_programs(encode_instruction, programs) == encode_programs(legacy_encode_instruction, programs)
+
+
+@pytest.mark.benchmark
+def test_benchmark_against_legacy_assembler():
+    # One pass over the programs per run, each line is encoded once
+    programs = [get_symbol_table(get_instructions_asm_file(file)) for file in sorted(glob.glob("files/*.s"))]
+    legacy_time = min(timeit.repeat(lambda: encode_programs(legacy_encode_instruction, programs), number=1, repeat=25))
+    new_time = min(timeit.repeat(lambda: encode_programs(encode_instruction, programs), number=1, repeat=25))
+    assert new_time * 4 < legacy_time
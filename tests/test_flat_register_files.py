@@ -0,0 +1,62 @@
+import pytest
+
+from classes.Datapath import Datapath
+from classes.FlatRegisterFiles import FlatRegisterFiles
+from classes.Processor import Processor
+from classes.RegisterFiles import RegisterFiles
+
+
+def test_flat_register_files():
+    rf = FlatRegisterFiles(10)
+    rf.set_write_enable(True)
+    rf.set_addresses(5, 3, 1)
+    rf.write(100)
+    assert rf.get_value(5) == 100
+    assert rf.get_value_rd() == 100
+    rf.set_addresses(0, 5, 5)
+    rf.write(200)
+    assert rf.get_value(0) == 0
+    assert rf.values[0] == 0
+    assert rf.get_value_rs1() == rf.get_value_rs2() == 100
+    rf.print_all()
+    rf.set_write_enable(False)
+    assert rf.write(10) == "Write Enable is unset!"
+
+
+@pytest.mark.parametrize("register_files", [FlatRegisterFiles, RegisterFiles])
+def test_snapshot_and_restore(register_files):
+    rf = register_files()
+    rf.set_write_enable(True)
+    rf.set_addresses(7, 0, 0)
+    rf.write(0x1234)
+    snapshot = rf.snapshot()
+    rf.write(0x5678)
+    assert rf.get_value(7) == 0x5678
+    rf.restore(snapshot)
+    assert rf.get_value(7) == 0x1234
+    rf.restore([1] * 32)
+    assert rf.get_value(0) == 0
+    assert rf.get_value(31) == 1
+    assert snapshot[7] == 0x1234
+
+
+def test_default_register_files():
+    assert isinstance(Datapath().reg_files, FlatRegisterFiles)
+
+
+@pytest.mark.parametrize("engine", ["threaded", "translated"])
+def test_engines_share_values(engine):
+    cpu = Processor(engine=engine)
+    values = cpu.datapath.reg_files.values
+    cpu.run("files/test_loop.s")
+    assert cpu.execution_engine.registers is values
+    assert values[2] == 15
+
+
+@pytest.mark.parametrize("engine", Processor.ENGINES)
+def test_register_objects_still_supported(engine):
+    reference = Processor()
+    reference.run("files/general_test_1.s")
+    cpu = Processor(Datapath(reg_files=RegisterFiles()), engine=engine)
+    cpu.run("files/general_test_1.s")
+    assert cpu.datapath.reg_files.snapshot() == reference.datapath.reg_files.snapshot()
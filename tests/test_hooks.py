@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from classes.BlockTranslator import BlockTranslator
+from classes.HookRegistry import HookRegistry
+from classes.Processor import Processor
+from classes.ThreadedEngine import ThreadedEngine
+
+# 20000 iterations of a loop with a load, a store and a branch
+LOOP_PROGRAM = """
+lui x1, 5
+addi x1, x1, -480
+loop:
+sw x1, 0(x0)
+lw x2, 0(x0)
+addi x1, x1, -1
+bne x1, x0, loop
+"""
+
+
+def test_register_and_bind():
+    registry = HookRegistry()
+    assert registry.bind() == {}
+    calls = []
+    first = registry.register("on_retire", lambda pc, instruction: calls.append(("first", pc)))
+    assert registry.bind() == {"on_retire": first}
+    assert registry.bind() is registry.bind()
+    registry.register("on_retire", lambda pc, instruction: calls.append(("second", pc)))
+    registry.bind()["on_retire"](0x4, 0x13)
+    assert calls == [("first", 0x4), ("second", 0x4)]
+    registry.unregister("on_retire", first)
+    assert registry.bind()["on_retire"] is not first
+    registry.clear()
+    assert registry.bind() == {}
+
+
+def test_invalid_event():
+    registry = HookRegistry()
+    with pytest.raises(ValueError):
+        registry.register("on_fetch", print)
+    with pytest.raises(ValueError):
+        registry.unregister("on_retire", print)
+    with pytest.raises(ValueError):
+        registry.unregister("on_fetch", print)
+
+
+def test_engines_without_hooks_are_not_instrumented(monkeypatch):
+    # Without hooks, the run takes the same code as the engines used directly: nothing is checked per instruction
+    cpu = Processor(engine="threaded")
+    cpu.run_asm(LOOP_PROGRAM)
+    assert cpu.execution_engine.hooks == {}
+    plain = ThreadedEngine(cpu.datapath, cpu.decode_cache)
+    plain.load()
+    assert all(
+        handler.__code__ is plain_handler.__code__
+        for handler, plain_handler in zip(cpu.execution_engine.handlers, plain.handlers)
+        if handler is not None
+    )
+    cpu = Processor(engine="translated", trace_threshold=2)
+    cpu.run_asm(LOOP_PROGRAM)
+    assert cpu.execution_engine.hooks == {}
+    sources = [trace.source for trace in map(cpu.trace_cache.get, cpu.trace_cache.heads())]
+    sources += cpu.execution_engine.sources.values()
+    assert sources and not any("on_" in source for source in sources)
+    cpu = Processor(engine="interpreter")
+    monkeypatch.setattr(cpu, "run_instrumented", None)
+    cpu.run_asm(LOOP_PROGRAM)
+    assert cpu.datapath.reg_files.get_value(1) == 0
+
+
+def test_traces_recompiled_with_other_hooks():
+    cpu = Processor(engine="translated", trace_threshold=2)
+    cpu.run_asm(LOOP_PROGRAM)
+    assert cpu.get_engine_stats()["trace_executions"] == 1
+    retired = []
+    cpu.hooks.register("on_retire", lambda pc, instruction: retired.append(pc))
+    cpu.reset()
+    cpu.run_asm(LOOP_PROGRAM)
+    assert len(retired) == 2 + 4 * 20000
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("engine", ["threaded", "translated"])
+def test_benchmark_without_hooks(engine):
+    def run(direct):
+        cpu = Processor(engine=engine, trace_threshold=2)
+        cpu.load_instructions_from_asm(LOOP_PROGRAM)
+        if not direct:
+            execute = cpu.execute
+        elif engine == "threaded":
+            plain = ThreadedEngine(cpu.datapath, cpu.decode_cache)
+            plain.load()
+            execute = plain.run
+        else:
+            execute = BlockTranslator(cpu.datapath, cpu.decode_cache, cpu.branch_profile, cpu.trace_cache, 2).run
+        start = time.perf_counter()
+        execute()
+        return time.perf_counter() - start
+
+    times = {True: [], False: []}
+    for _ in range(5):
+        for direct in times:
+            times[direct].append(run(direct))
+    assert min(times[False]) < min(times[True]) * 1.15
@@ -61,3 +61,40 @@ def test_fill_memory_bytes():
     # Test case 3: Check that the function handles empty input correctly
     im = InstructionMemory(0, [])
     assert im.instructions_bytes == []
+
+
+def test_load_instructions_from_asm_file(tmp_path):
+    source = tmp_path / "test.r.s"
+    source.write_text(open("files/test_r.s").read())
+    im = InstructionMemory(32)
+    encoded = im.load_instructions_from_asm_file(str(source))
+    assert encoded[:3] == [1048851, 2097555, 52429331]
+    assert im.instructions[:len(encoded)] == encoded
+    # The encoded instructions are only written to a file if requested
+    assert list(tmp_path.iterdir()) == [source]
+    im.load_instructions_from_asm_file(str(source), write_artifact=True)
+    artifact = tmp_path / "test.r"
+    assert [int(x) for x in artifact.read_text().split()] == encoded
+
+
+def test_load_instructions_from_asm():
+    im = InstructionMemory(8)
+    encoded = im.load_instructions_from_asm("# comment\r\naddi x2, x0, 1\r\n\r\naddi x3, x0, 2\r\n")
+    assert encoded == [1048851, 2097555]
+    assert im.instructions == [1048851, 2097555, 0, 0, 0, 0, 0, 0]
+    assert InstructionMemory(32).load_instructions_from_asm(open("files/test_r.s").read()) == \
+        InstructionMemory(32).load_instructions_from_asm_file("files/test_r.s")
+
+
+def test_load_instructions_from_asm_stream():
+    im = InstructionMemory(4)
+    generation = im.generation
+    count = im.load_instructions_from_asm_stream("files/test_labels.s")
+    program = InstructionMemory(32)
+    encoded = program.load_instructions_from_asm_file("files/test_labels.s")
+    assert count == len(encoded)
+    # The memory grows to hold the program and a zero word after it
+    assert im.instructions == encoded + [0]
+    assert im.instructions_bytes == program.instructions_bytes[:4 * (count + 1)]
+    assert im.symbols == program.symbols
+    assert im.generation == generation + 1
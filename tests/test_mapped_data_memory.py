@@ -0,0 +1,81 @@
+import pytest
+
+from classes.DataMemory import DataMemory
+from classes.Datapath import Datapath
+from classes.MappedDataMemory import MappedDataMemory
+from classes.Processor import Processor
+
+
+@pytest.fixture
+def image(tmp_path):
+    file = tmp_path / "image.bin"
+    file.write_bytes(bytes([1, 2, 3, 4, 0x80, 0xFF, 7, 8]))
+    return str(file)
+
+
+def test_load_from_file(image):
+    with MappedDataMemory(image, base=0x10000000) as dm:
+        dm.set_enable(False, True)
+        assert dm.end == 0x10000008
+        assert dm.load(0x10000000, DataMemory.WORD, True) == 0x04030201
+        assert dm.load(0x10000004, DataMemory.HALF_WORD, False) == 0xFFFFFF80
+        assert dm.load(0x10000004, DataMemory.BYTE, True) == 0x80
+        assert dm.get_value(0x10000007) == 8
+        # outside the region
+        assert dm.load(0x20000000, DataMemory.WORD, True) == 0
+        with pytest.raises(IndexError):
+            dm.load(0x10000002, DataMemory.WORD, True)
+
+
+def test_write_image(image):
+    with MappedDataMemory(image, base=0x10000000) as dm:
+        dm.write_image(0x0FFFFFFE, bytes(range(10, 22)))
+        assert [dm.get_value(0x0FFFFFFE + i) for i in range(12)] == list(range(10, 22))
+        assert dm.memory.get_value(0x0FFFFFFF) == 11
+        assert dm.mapping[:] == bytes(range(12, 20))
+
+
+def test_copy_on_write(image, tmp_path):
+    with MappedDataMemory(image) as dm:
+        dm.set_enable(True, True)
+        assert dm.store(0, 0xDEADBEEF, DataMemory.WORD) == 0xDEADBEEF
+        assert dm.store(0x100, 5, DataMemory.WORD) == 5
+        assert dm.load(0, DataMemory.WORD, True) == 0xDEADBEEF
+        assert dm.load(0x100, DataMemory.WORD, True) == 5
+        assert dm.memory.get_stats()["pages"] == 1
+        dm.save(str(tmp_path / "final.bin"))
+    with open(image, "rb") as f:
+        assert f.read() == bytes([1, 2, 3, 4, 0x80, 0xFF, 7, 8])
+    with open(tmp_path / "final.bin", "rb") as f:
+        assert f.read() == bytes([0xEF, 0xBE, 0xAD, 0xDE, 0x80, 0xFF, 7, 8])
+
+
+def test_shared(image):
+    dm = MappedDataMemory(image, shared=True)
+    dm.set_enable(True, False)
+    dm.store(4, 0x0A, DataMemory.BYTE)
+    dm.close()
+    with open(image, "rb") as f:
+        assert f.read() == bytes([1, 2, 3, 4, 0x0A, 0xFF, 7, 8])
+
+
+def test_invalid_mapping(image, tmp_path):
+    with pytest.raises(ValueError):
+        MappedDataMemory(image, base=2)
+    empty = tmp_path / "empty.bin"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError):
+        MappedDataMemory(str(empty))
+
+
+def test_processor_with_mapped_memory(tmp_path):
+    file = tmp_path / "zeros.bin"
+    file.write_bytes(bytes(128))
+    reference = Processor()
+    reference.run("files/test_loads_stores.s")
+    memory = MappedDataMemory(str(file), memory=DataMemory(0))
+    cpu = Processor(Datapath(data_mem=memory), engine="translated")
+    cpu.run("files/test_loads_stores.s")
+    assert list(memory.mapping[:]) == reference.datapath.data_mem.data
+    memory.close()
+    assert file.read_bytes() == bytes(128)
@@ -0,0 +1,87 @@
+import pytest
+
+from classes.DataMemory import DataMemory
+from classes.Datapath import Datapath
+from classes.PagedDataMemory import PagedDataMemory
+from classes.Processor import Processor
+
+
+@pytest.fixture
+def dm():
+    memory = PagedDataMemory()
+    memory.set_enable(True, True)
+    return memory
+
+
+def test_pages_allocated_on_write(dm):
+    assert dm.load(0x7FFFFFF0, DataMemory.WORD, True) == 0
+    assert dm.get_stats()["pages"] == 0
+    assert dm.store(0x7FFFFFF0, 0x80000001, DataMemory.WORD) == 0x80000001
+    assert dm.store(0x10000000, 0xFF, DataMemory.BYTE) == 0xFF
+    assert sorted(dm.pages) == [0x10000, 0x7FFFF]
+    assert dm.load(0x7FFFFFF0, DataMemory.WORD, False) == 0x80000001
+    assert dm.load(0x10000000, DataMemory.BYTE, False) == 0xFFFFFFFF
+    assert dm.load(0x10000000, DataMemory.BYTE, True) == 0xFF
+    assert dm.get_value(0x7FFFFFF3) == 0x80
+    assert dm.get_value(0x20000000) == 0
+
+
+def test_page_lookup_cache():
+    dm = PagedDataMemory(cache_size=2)
+    dm.set_enable(True, True)
+    dm.store(0x0000, 1, DataMemory.WORD)
+    dm.store(0x0004, 2, DataMemory.WORD)
+    assert (dm.cache_hits, dm.cache_misses) == (1, 1)
+    # page 2 maps to the same entry as page 0
+    dm.store(0x2000, 3, DataMemory.WORD)
+    assert dm.load(0x0000, DataMemory.WORD, True) == 1
+    assert dm.get_stats() == {"pages": 2, "cache_hits": 1, "cache_misses": 3}
+    with pytest.raises(ValueError):
+        PagedDataMemory(cache_size=3)
+
+
+def test_bounds_and_errors():
+    dm = PagedDataMemory(words=1024)
+    dm.set_enable(True, True)
+    with pytest.raises(IndexError):
+        dm.load(4096, DataMemory.WORD, True)
+    with pytest.raises(IndexError):
+        dm.store(4096, 1, DataMemory.BYTE)
+    with pytest.raises(IndexError):
+        dm.store(2, 1, DataMemory.WORD)
+    with pytest.raises(ValueError):
+        dm.load(0, 3, True)
+    with pytest.raises(ValueError):
+        dm.store(0, 0x100000000, DataMemory.WORD)
+    dm.set_enable(False, False)
+    assert dm.load(0, DataMemory.WORD, True) == "Read Enable is unset!"
+    assert dm.store(0, 1, DataMemory.WORD) == "Write Enable is unset!"
+
+
+def test_clear_memory(dm):
+    dm.store(0x1000, 5, DataMemory.WORD)
+    dm.clear_memory()
+    assert dm.pages == {}
+    assert dm.load(0x1000, DataMemory.WORD, True) == 0
+
+
+def test_print_data(capsys):
+    dm = PagedDataMemory()
+    dm.set_enable(True, False)
+    dm.store(0x3000, 0xAB, DataMemory.BYTE)
+    dm.print_data()
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 4096
+    assert lines[0] == "Pos 3000: 0xAB"
+
+
+@pytest.mark.parametrize("engine", Processor.ENGINES)
+def test_processor_with_paged_memory(engine):
+    reference = Processor()
+    reference.run("files/test_loads_stores.s")
+    cpu = Processor(Datapath(data_mem=PagedDataMemory()), engine=engine)
+    cpu.run("files/test_loads_stores.s")
+    memory = cpu.datapath.data_mem
+    assert [memory.get_value(i) for i in range(128)] == reference.datapath.data_mem.data
+    for i in range(32):
+        assert cpu.datapath.reg_files.get_value(i) == reference.datapath.reg_files.get_value(i)
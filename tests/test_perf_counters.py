@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from classes.PerfCounters import PerfCounters
+from classes.RunResult import RunResult
+
+# Loop trace of two blocks: 0x0-0x8 falls through its branch to 0x8, 0x8-0x10 branches back to the head
+RANGES = ((0x0, 0x8), (0x8, 0x10))
+BRANCHES = (False, True)
+
+
+@pytest.mark.parametrize(
+    "side, executions, taken",
+    [
+        # left at the head, after 3 full iterations
+        (0, [3, 3, 3, 3], [0, 0, 0, 3]),
+        # side exit at the end of the first block (branch taken) in the third iteration
+        (1, [3, 3, 2, 2], [0, 1, 0, 2]),
+        # side exit at the end of the second block (branch not taken) in the third iteration
+        (2, [3, 3, 3, 3], [0, 0, 0, 2]),
+    ],
+)
+def test_record_trace(side, executions, taken):
+    counters = PerfCounters()
+    counters.resize(4)
+    counters.record_trace(RANGES, BRANCHES, 3, side)
+    assert counters.executions == executions
+    assert counters.taken == taken
+
+
+def test_record_run_resets_the_run_counters():
+    # addi x1, x0, 5 / bne x1, x0, -4 / lw x2, 0(x0)
+    instructions = [0x00500093, 0xFE009EE3, 0x00002103]
+    counters = PerfCounters()
+    counters.resize(3)
+    counters.record(0x0, False)
+    counters.record_block(0x4, 0x8, True)
+    counters.record_block(0x4, 0x8, False)
+    counters.record(0x8, False)
+    counters.record_run(RunResult(None, 5, 0.5), instructions)
+    assert (counters.executions, counters.taken) == ([0, 0, 0], [0, 0, 0])
+    stats = counters.get_stats()
+    assert (stats["branches_taken"], stats["branches_not_taken"]) == (1, 1)
+    assert stats["loads"]["word"] == 1
+    assert stats["mnemonics"] == {"bne": 2, "addi": 1, "lw": 1}
+    assert stats["mips"] == 5 / 0.5 / 1e6
+
+
+def test_format_table():
+    counters = PerfCounters()
+    counters.resize(1)
+    counters.record(0x0, False)
+    counters.record_run(RunResult(None, 1, 0.25), [0x00500093])
+    stats = counters.get_stats()
+    table = PerfCounters.format_table(stats).splitlines()
+    assert table[0].split() == ["instructions", "1"]
+    assert table[-1].split() == ["addi", "1", "100.00%"]
+    assert json.loads(json.dumps(stats)) == stats
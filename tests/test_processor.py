@@ -1,6 +1,10 @@
 import pytest
 
+from classes.HaltReason import HaltReason
 from classes.Processor import Processor
+from classes.SamplingProfiler import SamplingProfiler
+from classes.TraceReader import TraceEntry, TraceReader
+from classes.TraceRecorder import NO_ADDRESS, TraceRecorder
 
 
 # TODO: tests passing individually, but not together
@@ -241,3 +245,192 @@ def test_run_general_2(cpu):
     for i in range(10, 32):
         x |= cpu.datapath.reg_files.get_value(i)
     assert x == 0
+
+
+def test_run_asm(cpu):
+    cpu.reset()
+    cpu.run_asm(open("files/test_r.s").read())
+    assert cpu.datapath.reg_files.get_value(2) == 1
+    assert cpu.datapath.reg_files.get_value(3) == 2
+    assert cpu.datapath.reg_files.get_value(4) == 50
+
+
+def test_run_labels(cpu):
+    cpu.reset()
+    cpu.run("files/test_labels.s")
+    assert cpu.datapath.reg_files.get_value(1) == 0
+    assert cpu.datapath.reg_files.get_value(2) == 110
+    assert cpu.datapath.inst_mem.symbols["double"] == 28
+
+
+def test_run_result_zero_word(cpu):
+    result = cpu.run("files/test_r.s")
+    assert (result.reason, result.instructions) == (HaltReason.ZERO_WORD, 18)
+    assert result.elapsed >= 0
+    assert cpu.datapath.get_pc() == 72
+
+
+@pytest.mark.parametrize("mnemonic, reason", [("ecall", HaltReason.ECALL), ("ebreak", HaltReason.EBREAK)])
+def test_halt_on_system_instruction(cpu, mnemonic, reason):
+    result = cpu.run_asm(f"addi x1, x0, 5\n{mnemonic}\naddi x1, x0, 7")
+    assert (result.reason, result.instructions) == (reason, 1)
+    assert cpu.datapath.reg_files.get_value(1) == 5
+    assert cpu.datapath.get_pc() == 4
+
+
+def test_max_instructions(cpu):
+    # infinite loop (until x1 wraps around)
+    result = cpu.run_asm("addi x1, x1, 1\nbne x1, x0, -4", max_instructions=1001)
+    assert (result.reason, result.instructions) == (HaltReason.MAX_INSTRUCTIONS, 1001)
+    assert cpu.datapath.reg_files.get_value(1) == 501
+    assert cpu.datapath.get_pc() == 4
+    # the execution resumes where it stopped
+    result = cpu.execute(max_instructions=999)
+    assert (result.reason, result.instructions) == (HaltReason.MAX_INSTRUCTIONS, 999)
+    assert cpu.datapath.reg_files.get_value(1) == 1000
+    assert cpu.datapath.get_pc() == 0
+
+
+def test_timeout(cpu):
+    result = cpu.run_asm("addi x1, x1, 1\njal x0, -4", timeout=0.05)
+    assert result.reason == HaltReason.DEADLINE
+    assert result.elapsed >= 0.05
+    assert cpu.datapath.reg_files.get_value(1) == (result.instructions + 1) // 2
+
+
+def test_out_of_bounds(cpu):
+    result = cpu.run_asm("addi x1, x0, 1\njal x0, 2000")
+    assert (result.reason, result.instructions) == (HaltReason.OUT_OF_BOUNDS, 2)
+    assert cpu.datapath.get_pc() == 2004
+
+
+PERF_PROGRAM = """
+addi x1, x0, 5
+loop:
+sw x1, 0(x0)
+lb x2, 0(x0)
+addi x1, x1, -1
+bne x1, x0, loop
+jal x3, 4
+"""
+
+
+def test_perf_counters(cpu):
+    cpu = Processor(engine=cpu.engine, perf_counters=True)
+    result = cpu.run_asm(PERF_PROGRAM)
+    stats = cpu.get_perf_stats()
+    assert stats["instructions"] == stats["cycles"] == result.instructions == 22
+    assert (stats["branches_taken"], stats["branches_not_taken"], stats["jumps"]) == (4, 1, 1)
+    assert stats["loads"] == {"byte": 5, "half": 0, "word": 0}
+    assert stats["stores"] == {"byte": 0, "half": 0, "word": 5}
+    assert stats["mnemonics"] == {"addi": 6, "bne": 5, "lb": 5, "sw": 5, "jal": 1}
+    assert (stats["runs"], stats["wall_time"]) == (1, result.elapsed)
+    assert stats["mips"] > 0
+    cpu.reset()
+    assert cpu.get_perf_stats()["instructions"] == 0
+
+
+# 'beq x3, x0, 4' continues at the next instruction whether it is taken or not
+BRANCH_TO_NEXT_PROGRAM = """
+addi x1, x0, 200
+loop:
+andi x3, x1, 3
+beq x3, x0, 4
+addi x2, x2, 1
+addi x1, x1, -1
+bne x1, x0, loop
+"""
+
+
+@pytest.mark.parametrize("trace_threshold", [None, 2, 50])
+def test_perf_counters_same_in_all_engines(trace_threshold):
+    stats = []
+    for engine in Processor.ENGINES:
+        cpu = Processor(engine=engine, perf_counters=True, trace_threshold=trace_threshold)
+        cpu.run_asm(BRANCH_TO_NEXT_PROGRAM)
+        stats.append({key: value for key, value in cpu.get_perf_stats().items() if key not in ("wall_time", "mips")})
+    assert stats[0] == stats[1] == stats[2]
+    # 'beq' taken 50 times out of 200, 'bne' 199 times
+    assert (stats[0]["branches_taken"], stats[0]["branches_not_taken"]) == (249, 151)
+
+
+def test_perf_counters_disabled(cpu):
+    cpu.run_asm(PERF_PROGRAM)
+    assert cpu.perf_counters is None
+    assert cpu.get_perf_stats() == {}
+
+
+def test_trace_recorder(cpu, tmp_path):
+    file = str(tmp_path / "run.trace")
+    with TraceRecorder(file, chunk_size=4) as recorder:
+        cpu = Processor(engine=cpu.engine, trace_recorder=recorder)
+        cpu.run_asm(PERF_PROGRAM)
+    with TraceReader(file) as reader:
+        assert len(reader) == 22
+        assert reader[:6] == [
+            TraceEntry(0x0, 0x00500093, 1, 5, NO_ADDRESS),
+            TraceEntry(0x4, 0x00102023, 0, 5, 0),
+            TraceEntry(0x8, 0x00000103, 2, 5, 0),
+            TraceEntry(0xC, 0xFFF08093, 1, 4, NO_ADDRESS),
+            TraceEntry(0x10, 0xFE009AE3, 0, 0, NO_ADDRESS),
+            TraceEntry(0x4, 0x00102023, 0, 4, 0),
+        ]
+        assert reader[-1] == TraceEntry(0x14, 0x004001EF, 3, 0x18, NO_ADDRESS)
+
+
+def test_hooks(cpu):
+    events = []
+    for event in ("on_load", "on_store", "on_branch", "on_jump"):
+        cpu.hooks.register(event, lambda *args, event=event: events.append((event,) + args))
+    retired = []
+    cpu.hooks.register("on_retire", lambda pc, instruction: retired.append(pc))
+    cpu.run_asm(PERF_PROGRAM)
+    assert len(retired) == 22
+    assert retired[:6] == [0x0, 0x4, 0x8, 0xC, 0x10, 0x4]
+    assert events[:3] == [("on_store", 0x4, 0, 4, 5), ("on_load", 0x8, 0, 1, 5), ("on_branch", 0x10, 0x4, True)]
+    assert [event for event in events if event[0] == "on_branch"][-1] == ("on_branch", 0x10, 0x4, False)
+    assert events[-1] == ("on_jump", 0x14, 0x18, 3)
+    assert len(events) == 16
+
+
+PROFILE_PROGRAM = """
+addi x5, x0, 200
+loop:
+jal x1, work
+addi x5, x5, -1
+bne x5, x0, loop
+jal x0, end
+work:
+addi x6, x0, 10
+spin:
+addi x6, x6, -1
+bne x6, x0, spin
+jalr x0, x1, 0
+end:
+addi x31, x0, 1
+"""
+
+
+def test_sampling_profiler(cpu):
+    profiler = SamplingProfiler(period=10)
+    cpu = Processor(engine=cpu.engine, profiler=profiler)
+    result = cpu.run_asm(PROFILE_PROGRAM)
+    assert 0 < profiler.get_total() <= result.instructions // 10
+    functions = profiler.get_functions(cpu.symbolize)
+    assert next(iter(functions)) == "spin"
+    assert functions["spin"] >= 0.6 * profiler.get_total()
+    stacks = dict(line.rsplit(" ", 1) for line in profiler.format_collapsed(cpu.symbolize).splitlines())
+    assert set(stacks) <= {"loop", "loop;work", "loop;spin"}
+    assert int(stacks["loop;spin"]) == functions["spin"]
+    assert profiler.sites == []
+
+
+def test_reset_clears_labels_and_trace_hooks():
+    cpu = Processor(engine="translated", trace_threshold=2)
+    cpu.hooks.register("on_retire", lambda pc, instruction: None)
+    cpu.run_asm(PROFILE_PROGRAM)
+    assert cpu.symbolize(0x4) is not None
+    assert cpu.trace_hooks
+    cpu.reset()
+    assert (cpu._labels, cpu.trace_hooks) == (None, {})
+    assert cpu.symbolize(0x4) is None
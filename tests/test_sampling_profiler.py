@@ -0,0 +1,130 @@
+import timeit
+
+import pytest
+
+from classes.Processor import Processor
+from classes.SamplingProfiler import MAX_STACK_DEPTH, SamplingProfiler
+
+
+def test_call_stack_tracking():
+    profiler = SamplingProfiler()
+    profiler.resize(16)
+    profiler.on_jump(0x4, 0x20, 1)
+    profiler.on_jump(0x24, 0x30, 1)
+    profiler.sample(0x30)
+    # a jump without link that is not a return
+    profiler.on_jump(0x34, 0x38, 0)
+    assert profiler.sites == [0x4, 0x24]
+    profiler.on_jump(0x38, 0x28, 0)
+    profiler.sample(0x28)
+    profiler.on_jump(0x2C, 0x8, 0)
+    profiler.sample(0x8)
+    assert (profiler.sites, profiler.returns) == ([], [])
+    assert profiler.stacks == {((0x4, 0x24), 0xC): 1, ((0x4,), 0xA): 1, ((), 0x2): 1}
+
+
+def test_stack_depth_is_bounded():
+    profiler = SamplingProfiler()
+    for pc in range(0, 8 * MAX_STACK_DEPTH, 4):
+        profiler.on_jump(pc, pc + 4, 1)
+    assert len(profiler.sites) == MAX_STACK_DEPTH
+    assert profiler.sites[0] == 4 * MAX_STACK_DEPTH
+
+
+def test_formats():
+    profiler = SamplingProfiler(period=10)
+    profiler.resize(4)
+    profiler.sample(0x8)
+    profiler.on_jump(0x4, 0xC, 1)
+    profiler.sample(0xC)
+    profiler.sample(0xC)
+    # outside of the instruction memory
+    profiler.sample(0x40)
+    symbols = {0x0: "main", 0xC: "func"}
+
+    def symbolize(address):
+        start = max(start for start in symbols if start <= address)
+        return symbols[start], address - start
+
+    assert profiler.get_total() == 3
+    assert profiler.get_functions(symbolize) == {"func": 2, "main": 1}
+    assert profiler.get_hot_spots(symbolize) == [(0xC, "func", 2), (0x8, "main+0x8", 1)]
+    assert profiler.get_hot_spots() == [(0xC, "", 2), (0x8, "", 1)]
+    assert profiler.format_collapsed(symbolize) == "main 1\nmain;func 2"
+    assert profiler.format_collapsed() == "0x00000004;0x0000000C 2\n0x00000008 1"
+    flat = profiler.format_flat(symbolize).splitlines()
+    assert flat[0].split() == ["samples", "3"]
+    assert flat[3].split() == ["func", "2", "66.67%"]
+    assert flat[-1].split() == ["0x00000008", "main+0x8", "1", "33.33%"]
+    profiler.call_stacks = False
+    assert profiler.format_collapsed(symbolize) == "func 2\nmain 1"
+
+
+def test_invalid_period():
+    with pytest.raises(ValueError):
+        SamplingProfiler(period=0)
+
+
+@pytest.mark.parametrize(
+    "engine, collapsed",
+    [
+        ("interpreter", "0x00000018 1\n_start 4\n_start;func 2"),
+        ("threaded", "0x00000018 1\n_start 4\n_start;func 2"),
+        # the samples are taken between the blocks
+        ("translated", "0x00000018 1\n_start;func 1"),
+    ],
+)
+def test_profile_elf_symbols(engine, collapsed):
+    profiler = SamplingProfiler(period=1)
+    cpu = Processor(engine=engine, profiler=profiler)
+    result = cpu.run("files/test_elf")
+    assert result.instructions == 7
+    # the last sample is the zero word the function returns to, outside of the symbols
+    assert profiler.format_collapsed(cpu.symbolize) == collapsed
+
+
+def test_symbolize_labels():
+    cpu = Processor()
+    cpu.load_instructions_from_asm("addi x1, x0, 1\nloop:\naddi x1, x1, 1\nend:\naddi x2, x0, 1")
+    assert cpu.symbolize(0x0) is None
+    assert cpu.symbolize(0x4) == ("loop", 0)
+    assert cpu.symbolize(0x10) == ("end", 8)
+
+
+# 20000 iterations of a loop with a load, a store and a branch: 2 + 4 * 20000 instructions
+LOOP_PROGRAM = "lui x1, 5\naddi x1, x1, -480\nloop:\nsw x1, 0(x0)\nlw x2, 0(x0)\naddi x1, x1, -1\nbne x1, x0, loop"
+
+
+@pytest.mark.parametrize(
+    "period, hot_spots",
+    [
+        (1, [(0x8, 20000), (0xC, 20000), (0x10, 20000), (0x14, 20000), (0x4, 1), (0x18, 1)]),
+        (3, [(0x8, 6667), (0xC, 6667), (0x14, 6667), (0x10, 6666)]),
+        # the samples are taken after 2 + 4 * n instructions, before 'addi x1, x1, -1'
+        (4, [(0x10, 20000)]),
+        (1024, [(0x10, 78)]),
+        # a single sample when the program ends
+        (80002, [(0x18, 1)]),
+        (80003, []),
+    ],
+)
+def test_threaded_sampling_period(period, hot_spots):
+    # The threaded engine takes a sample exactly every period instructions
+    profiler = SamplingProfiler(period=period, call_stacks=False)
+    cpu = Processor(engine="threaded", profiler=profiler)
+    cpu.load_instructions_from_asm(LOOP_PROGRAM)
+    cpu.execute()
+    assert profiler.get_total() == (2 + 4 * 20000) // period
+    assert [(pc, samples) for pc, _, samples in profiler.get_hot_spots()] == hot_spots
+
+
+@pytest.mark.benchmark
+def test_benchmark_sampling():
+    def run(profiler):
+        cpu = Processor(engine="threaded", profiler=profiler)
+        cpu.load_instructions_from_asm(LOOP_PROGRAM)
+        return timeit.timeit(cpu.execute, number=1)
+
+    runs = [(run(None), run(SamplingProfiler(call_stacks=False))) for _ in range(5)]
+    plain_time, profiled_time = map(min, zip(*runs))
+    assert profiled_time < plain_time * 1.15
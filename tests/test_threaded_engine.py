@@ -0,0 +1,55 @@
+import pytest
+
+from classes.Processor import Processor
+from test_processor import *
+
+
+@pytest.fixture
+def cpu():
+    return Processor(engine="threaded")
+
+
+def test_invalid_engine():
+    with pytest.raises(ValueError):
+        Processor(engine="jit")
+
+
+def test_reset_keeps_engine(cpu):
+    cpu.reset()
+    assert cpu.engine == "threaded"
+
+
+def test_run_loop(cpu):
+    cpu.reset()
+    cpu.run("files/test_loop.s")
+    assert cpu.datapath.reg_files.get_value(1) == 0
+    assert cpu.datapath.reg_files.get_value(2) == 15
+    assert cpu.datapath.get_pc() == 16
+
+
+@pytest.mark.parametrize(
+    "file",
+    [
+        "files/test_r.s",
+        "files/test_I.s",
+        "files/test_loads_stores.s",
+        "files/test_branches.s",
+        "files/test_jalr.s",
+        "files/test_uj.s",
+        "files/test_u.s",
+        "files/book_test.s",
+        "files/general_test_1.s",
+        "files/test_loop.s",
+    ],
+)
+def test_same_state_as_interpreter(file):
+    reference = Processor(engine="interpreter")
+    reference.reset()
+    reference.run(file)
+    threaded = Processor(engine="threaded")
+    threaded.reset()
+    threaded.run(file)
+    for i in range(32):
+        assert threaded.datapath.reg_files.get_value(i) == reference.datapath.reg_files.get_value(i)
+    assert threaded.datapath.data_mem.data == reference.datapath.data_mem.data
+    assert threaded.datapath.get_pc() == reference.datapath.get_pc()
@@ -0,0 +1,56 @@
+import pytest
+
+from classes.BranchProfile import BranchProfile
+from classes.Processor import Processor
+from classes.TraceCache import Trace, TraceCache
+
+
+def make_trace(head):
+    return Trace(head, None, (head,), ((head, head + 4),), (None,), "")
+
+
+def test_lru_eviction():
+    cache = TraceCache(2)
+    assert cache.put(make_trace(0x0)) == []
+    assert cache.put(make_trace(0x4)) == []
+    assert cache.get(0x0).head == 0x0
+    evicted = cache.put(make_trace(0x8))
+    assert [trace.head for trace in evicted] == [0x4]
+    assert cache.heads() == [0x0, 0x8]
+    assert cache.evictions == 1
+    assert cache.get(0x4) is None
+
+
+def test_resize_and_remove():
+    cache = TraceCache(3)
+    for head in (0x0, 0x4, 0x8):
+        cache.put(make_trace(head))
+    assert [trace.head for trace in cache.resize(1)] == [0x0, 0x4]
+    assert len(cache) == 1 and 0x8 in cache
+    assert cache.remove(0x8).head == 0x8
+    assert cache.remove(0x8) is None
+    with pytest.raises(ValueError):
+        cache.resize(0)
+    with pytest.raises(ValueError):
+        TraceCache(0)
+
+
+def test_branch_profile():
+    profile = BranchProfile()
+    assert profile.get_counts(0x10) == (0, 0)
+    assert profile.record(0x10, True) == [1, 0]
+    profile.record(0x10, False)
+    profile.record(0x10, False)
+    profile.record(0x20, True)
+    assert profile.get_counts(0x10) == (1, 2)
+    assert not profile.is_taken_bias(0x10)
+    assert profile.is_taken_bias(0x20)
+    assert profile.hottest(1) == [(0x10, 1, 2)]
+    profile.clear()
+    assert profile.counts == {}
+
+
+def test_interpreter_records_branches():
+    cpu = Processor()
+    cpu.run("files/test_loop.s")
+    assert cpu.get_branch_profile().get_counts(0xC) == (4, 1)
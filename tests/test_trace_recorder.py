@@ -0,0 +1,55 @@
+import pytest
+
+from classes.TraceReader import TraceEntry, TraceReader
+from classes.TraceRecorder import NO_ADDRESS, TraceRecorder
+
+
+def write_trace(file, entries, chunk_size):
+    with TraceRecorder(file, chunk_size) as recorder:
+        for i in range(entries):
+            recorder.record(4 * i, i ^ 0x13, i % 32, 0xFFFFFFFF - i, NO_ADDRESS if i % 3 else i)
+    return recorder
+
+
+def expected_entry(i):
+    return TraceEntry(4 * i, i ^ 0x13, i % 32, 0xFFFFFFFF - i, NO_ADDRESS if i % 3 else i)
+
+
+@pytest.mark.parametrize("entries", [0, 1, 7, 8, 9, 23])
+def test_round_trip(tmp_path, entries):
+    file = str(tmp_path / "run.trace")
+    recorder = write_trace(file, entries, chunk_size=8)
+    assert recorder.entries == entries
+    with TraceReader(file) as reader:
+        assert len(reader) == entries
+        assert len(reader.chunks) == (entries + 7) // 8
+        assert list(reader) == [expected_entry(i) for i in range(entries)]
+
+
+def test_index_and_slice(tmp_path):
+    file = str(tmp_path / "run.trace")
+    write_trace(file, 100000, chunk_size=4096)
+    with TraceReader(file) as reader:
+        assert reader[0] == expected_entry(0)
+        assert reader[4096] == expected_entry(4096)
+        assert reader[-1] == expected_entry(99999)
+        assert reader[4090:4100] == [expected_entry(i) for i in range(4090, 4100)]
+        assert reader[10:40:10] == [expected_entry(i) for i in range(10, 40, 10)]
+        assert reader.get_column("pc", 8000, 8200).tolist() == [4 * i for i in range(8000, 8200)]
+        assert reader.get_column("rd", 99990).tolist() == [i % 32 for i in range(99990, 100000)]
+        assert len(reader.get_column("value")) == 100000
+        with pytest.raises(IndexError):
+            reader[100000]
+
+
+def test_invalid_trace_file(tmp_path):
+    file = tmp_path / "run.trace"
+    file.write_bytes(b"RVAC\x00\x00\x00\x00")
+    with pytest.raises(ValueError):
+        TraceReader(str(file))
+    write_trace(str(file), 10, chunk_size=8)
+    file.write_bytes(file.read_bytes()[:-4])
+    with pytest.raises(ValueError):
+        TraceReader(str(file))
+    with pytest.raises(ValueError):
+        TraceRecorder(str(file), chunk_size=0)
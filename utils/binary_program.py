@@ -0,0 +1,112 @@
+import os
+import struct
+import sys
+from array import array
+from collections import namedtuple
+from itertools import islice
+
+from classes.ElfFile import ELF_MAGIC
+
+# Optional header of a binary program: magic, load address and entry PC (32-bit little-endian)
+BINARY_MAGIC = b"RV32"
+BINARY_HEADER = struct.Struct("<4sII")
+
+# Number of instructions packed and written at a time by write_binary_program()
+WRITE_CHUNK_WORDS = 4096
+
+# Bytes of a text file with one decimal instruction per line
+TEXT_BYTES = frozenset(b"0123456789+- \t\r\n")
+
+
+class BinaryProgram(namedtuple("BinaryProgram", ["image", "load_address", "entry"])):
+    """
+    The BinaryProgram class holds a program read from a binary file.
+
+        image (memoryview) - the instructions as 32-bit little-endian words
+        load_address (int) - address of the first instruction in the instruction memory
+        entry (int) - address of the first instruction to be executed
+    """
+
+    __slots__ = ()
+
+
+def read_binary_program(file):
+    """
+    Reads a binary program: the instructions as raw 32-bit little-endian words, optionally preceded by a header
+    (BINARY_MAGIC, load address and entry PC). Without the header the program is loaded and starts at address 0.
+
+    :param file: binary file containing the program
+    :type file: str
+    :return: the program
+    :rtype: BinaryProgram
+    :raises: ValueError if the size of the program is not a multiple of 4 or an address is not a multiple of 4
+    """
+    with open(file, "rb") as f:
+        data = f.read()
+    load_address = entry = 0
+    image = memoryview(data)
+    if data[:len(BINARY_MAGIC)] == BINARY_MAGIC and len(data) >= BINARY_HEADER.size:
+        _, load_address, entry = BINARY_HEADER.unpack_from(data)
+        image = image[BINARY_HEADER.size:]
+    if len(image) % 4 != 0:
+        raise ValueError(f"Invalid binary program ({file}). The size must be a multiple of 4!")
+    if load_address % 4 != 0 or entry % 4 != 0:
+        raise ValueError(f"Invalid binary program ({file}). The addresses must be multiples of 4!")
+    return BinaryProgram(image, load_address, entry)
+
+
+def write_binary_program(file, encoded_instructions, load_address=None, entry=None):
+    """
+    Writes a binary program (see read_binary_program()). The header is written if an address is given. The
+    instructions are packed and written in chunks of WRITE_CHUNK_WORDS, so they can come from a generator of any size
+    (see utils.encode_instructions.stream_assemble_file()).
+
+    :param file: path of the binary file
+    :type file: str
+    :param encoded_instructions: encoded instructions
+    :type encoded_instructions: iterable
+    :param load_address: address of the first instruction in the instruction memory (default: 0)
+    :type load_address: int, optional
+    :param entry: address of the first instruction to be executed (default: the load address)
+    :type entry: int, optional
+    :return: number of instructions written
+    :rtype: int
+    """
+    encoded_instructions = iter(encoded_instructions)
+    count = 0
+    with open(file, "wb") as f:
+        if load_address is not None or entry is not None:
+            load_address = load_address or 0
+            f.write(BINARY_HEADER.pack(BINARY_MAGIC, load_address, load_address if entry is None else entry))
+        while True:
+            words = array("I", islice(encoded_instructions, WRITE_CHUNK_WORDS))
+            if not words:
+                return count
+            if sys.byteorder == "big":
+                words.byteswap()
+            f.write(words.tobytes())
+            count += len(words)
+
+
+def get_program_format(file):
+    """
+    Detects the format of a program file: "asm" (extension .s), "elf" (ELF magic number), "binary" (binary header,
+    extension .bin or any byte that can not be in a text file) or "text" (one decimal instruction per line).
+
+    :param file: path of the program file
+    :type file: str
+    :return: the format of the program
+    :rtype: str
+    """
+    extension = os.path.splitext(file)[1].lower()
+    if extension == ".s":
+        return "asm"
+    with open(file, "rb") as f:
+        start = f.read(64)
+    if start[:len(ELF_MAGIC)] == ELF_MAGIC:
+        return "elf"
+    if extension == ".bin":
+        return "binary"
+    if start[:len(BINARY_MAGIC)] == BINARY_MAGIC or not TEXT_BYTES.issuperset(start):
+        return "binary"
+    return "text"
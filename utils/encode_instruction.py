@@ -1,8 +1,9 @@
+import os
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
 from classes.InstructionType import InstructionType
-from utils.get_instruction_parts import get_instruction_parts
-from utils.get_type import get_type
-from utils.mask_bits import mask_bits
-from utils.sign_extend import sign_extend
 
 registers = {
     "x0": 0,
@@ -107,136 +108,178 @@ f3 = {
     "jalr": 0x0,
 }
 
+# Label defined at the start of a line, e.g. "loop:" or "loop: addi x1, x1, -1"
+LABEL_DEFINITION = re.compile(r"\s*([A-Za-z_][A-Za-z0-9_]*)\s*:\s*(.*)")
+LABEL = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Mnemonic -> position of the branch/jump target in the instruction parts
+TARGET_OPERANDS = {
+    "beq": 3,
+    "bne": 3,
+    "blt": 3,
+    "bge": 3,
+    "bltu": 3,
+    "bgeu": 3,
+    "jal": 2,
+    "beqz": 2,
+    "bnez": 2,
+    "j": 1,
+}
+
+# Offsets of the labels that can be encoded: bit 11 of the offset of branches and 'jal' is its sign (see _encoder_sb())
+LABEL_OFFSETS = range(-2048, 2048)
+
+
+class AssembledProgram(namedtuple("AssembledProgram", ["instructions", "symbols"])):
+    """
+    The AssembledProgram class holds a program encoded by the assembler.
+
+        instructions (list) - encoded instructions
+        symbols (dict) - symbol table, the address of each label keyed on its name
+    """
+
+    __slots__ = ()
+
+
+MASK_32 = 0xFFFFFFFF
+
+# Register name -> number shifted into the rd, rs1 and rs2 fields of an instruction
+RD = {name: number << 7 for name, number in registers.items()}
+RS1 = {name: number << 15 for name, number in registers.items()}
+RS2 = {name: number << 20 for name, number in registers.items()}
 
-# TODO: Refactor
 
+# Decimal immediates in the range of the 13-bit branch offsets -> value, so most immediates are a lookup
+DECIMAL_IMMEDIATES = {str(value): value for value in range(-4096, 4096)}
 
-def _encode_r(inst, mnemonic):
+
+class Mnemonic(namedtuple("Mnemonic", ["type", "opcode", "funct3", "funct7", "encoder"])):
+    """
+    The Mnemonic class holds everything the assembler needs to encode an instruction given its mnemonic.
+
+        type (InstructionType) - type of the instruction
+        opcode (int) - opcode of the instruction (of the base instruction for pseudo-instructions)
+        funct3 (int) - funct3 field of the instruction
+        funct7 (int) - funct7 field of the instruction (imm[11:5] of srai)
+        encoder (function) - function encoding the parts of the instruction, with the fixed fields built in
+    """
+
+    __slots__ = ()
+
+
+def _parse_immediate(text):
+    """
+    Parses an immediate in decimal, hexadecimal (0x) or binary (0b).
+
+    :param text: The immediate
+    :type text: str
+    :return: The value of the immediate
+    :rtype: int
+    :raises: ValueError if the immediate is not a valid number
     """
-    Encode R-Type instruction into 32-bit machine code.
+    value = DECIMAL_IMMEDIATES.get(text)
+    if value is not None:
+        return value
+    try:
+        return int(text, 0)
+    except ValueError:
+        # Decimals with leading zeros, e.g. "010"
+        return int(text, 10)
+
+
+def _encoder_r(opcode, funct3, funct7):
+    """
+    Builds the encoder of an R-Type instruction.
 
     # R-Type
     # funct7    rs2     rs1     funct3      rd      opcode
     #  (7)      (5)     (5)       (3)       (5)       (7)
     # opcode = 0110011 (0x33)
 
-    :param inst: A list of strings that represents the instruction and its operands
-    :type inst: list
-    :param mnemonic: The string containing the mnemonic of the instruction
-    :type mnemonic: str
-    :return: The encoded instruction in 32-bit format
-    :rtype: int
+    :param opcode: The opcode of the instruction
+    :type opcode: int
+    :param funct3: The funct3 field of the instruction
+    :type funct3: int
+    :param funct7: The funct7 field of the instruction
+    :type funct7: int
+    :return: Function encoding the parts of the instruction into 32-bit machine code
+    :rtype: function
     """
-    rd = registers[inst[1]]
-    rs1 = registers[inst[2]]
-    rs2 = registers[inst[3]]
-    opcode = 0x33
-    funct3 = f3[mnemonic]
-    funct7 = 0x20 if mnemonic in ["sub", "sra"] else 0x0
-    encoded_instruction = 0
-    encoded_instruction |= funct7 << (32 - 7)
-    encoded_instruction |= rs2 << (32 - 7 - 5)
-    encoded_instruction |= rs1 << (32 - 7 - 5 - 5)
-    encoded_instruction |= funct3 << (32 - 7 - 5 - 5 - 3)
-    encoded_instruction |= rd << (32 - 7 - 5 - 5 - 3 - 5)
-    encoded_instruction |= opcode
-    encoded_instruction = mask_bits(encoded_instruction, 0, 31)
-    return encoded_instruction
+    fields = funct7 << 25 | funct3 << 12 | opcode
+
+    def encode(inst):
+        return fields | RS2[inst[3]] | RS1[inst[2]] | RD[inst[1]]
 
+    return encode
 
-def _encode_i(inst, mnemonic):
+
+def _encoder_i(opcode, funct3, funct7):
     """
-    Encode I-Type instruction into 32-bit machine code.
+    Builds the encoder of an I-Type instruction. The operands can be "rd, rs1, imm" or "rd, imm(rs1)".
 
     # I-Type
     # imm[11:0]    rs1     funct3      rd      opcode
     #    (12)      (5)       (3)       (5)       (7)
     # opcode = 0010011 (0x13) - arithmetics, 0000011 (0x03) - loads, 1100111 (0x67) - jalr
 
-    :param inst: A list of strings that represents the instruction and its operands
-    :type inst: list
-    :param mnemonic: The string containing the mnemonic of the instruction
-    :type mnemonic: str
-    :return: The encoded instruction in 32-bit format
-    :rtype: int
+    :param opcode: The opcode of the instruction
+    :type opcode: int
+    :param funct3: The funct3 field of the instruction
+    :type funct3: int
+    :param funct7: The funct7 field of the instruction (imm[11:5] of srai)
+    :type funct7: int
+    :return: Function encoding the parts of the instruction into 32-bit machine code
+    :rtype: function
+    """
+    fields = funct7 << 25 | funct3 << 12 | opcode
+
+    def encode(inst):
+        rs1 = RS1.get(inst[2])
+        if rs1 is not None:
+            imm = _parse_immediate(inst[3])
+        else:
+            rs1 = RS1[inst[3]]
+            imm = _parse_immediate(inst[2])
+        return fields | imm << 20 & MASK_32 | rs1 | RD[inst[1]]
+
+    return encode
+
+
+def _encoder_s(opcode, funct3, funct7):
     """
-    rd = registers[inst[1]]
-    if inst[2] in registers.keys():
-        rs1 = registers[inst[2]]
-        imm = inst[3]
-    else:
-        rs1 = registers[inst[3]]
-        imm = inst[2]
-    if imm[0:2] in ["0x", "0X"]:
-        imm = int(imm[2:], 16)
-    elif imm[0:2] in ["0b", "0B"]:
-        imm = int(imm[2:], 2)
-    else:
-        imm = int(imm)
-    imm = sign_extend(imm, 12)
-    if mnemonic == "jalr":
-        opcode = 0x67
-    elif mnemonic in ["lb", "lh", "lw", "lbu", "lhu"]:
-        opcode = 0x03
-    else:
-        opcode = 0x13
-    funct3 = f3[mnemonic]
-    encoded_instruction = 0 if mnemonic != "srai" else (1 << 30)
-    encoded_instruction |= imm << (32 - 12)
-    encoded_instruction |= rs1 << (32 - 12 - 5)
-    encoded_instruction |= funct3 << (32 - 12 - 5 - 3)
-    encoded_instruction |= rd << (32 - 12 - 5 - 3 - 5)
-    encoded_instruction |= opcode
-    encoded_instruction = mask_bits(encoded_instruction, 0, 31)
-    return encoded_instruction
-
-
-def _encode_s(inst, mnemonic):
-    """
-    Encode S-Type instruction into 32-bit machine code.
+    Builds the encoder of an S-Type instruction. The operands can be "rs2, rs1, imm" or "rs2, imm(rs1)".
 
     # S-Type
     # imm[11:5]     rs2     rs1     funct3     imm[4:0]     opcode
     #   (7)         (5)     (5)       (3)         (5)        (7)
     # opcode = 0100011 (0x23)
 
-    :param inst: A list of strings that represents the instruction and its operands
-    :type inst: list
-    :param mnemonic: The string containing the mnemonic of the instruction
-    :type mnemonic: str
-    :return: The encoded instruction in 32-bit format
-    :rtype: int
+    :param opcode: The opcode of the instruction
+    :type opcode: int
+    :param funct3: The funct3 field of the instruction
+    :type funct3: int
+    :param funct7: Not used (the field holds imm[11:5])
+    :type funct7: int
+    :return: Function encoding the parts of the instruction into 32-bit machine code
+    :rtype: function
     """
-    rs2 = registers[inst[1]]
-    if inst[2] in registers.keys():
-        rs1 = registers[inst[2]]
-        imm = inst[3]
-    else:
-        rs1 = registers[inst[3]]
-        imm = inst[2]
-    if imm[0:2] in ["0x", "0X"]:
-        imm = int(imm[2:], 16)
-    elif imm[0:2] in ["0b", "0B"]:
-        imm = int(imm[2:], 2)
-    else:
-        imm = int(imm)
-    imm = sign_extend(imm, 12)
-    opcode = 0x23
-    funct3 = f3[mnemonic]
-    encoded_instruction = 0
-    encoded_instruction |= (mask_bits(imm, 5, 11)) << (32 - 7)
-    encoded_instruction |= rs2 << (32 - 7 - 5)
-    encoded_instruction |= rs1 << (32 - 7 - 5 - 5)
-    encoded_instruction |= funct3 << (32 - 7 - 5 - 5 - 3)
-    encoded_instruction |= (mask_bits(imm, 0, 4)) << (32 - 7 - 5 - 5 - 3 - 5)
-    encoded_instruction |= opcode
-    encoded_instruction = mask_bits(encoded_instruction, 0, 31)
-    return encoded_instruction
-
-
-def _encode_u(inst, mnemonic):
-    """
-    Encode U-Type instruction into 32-bit machine code.
+    fields = funct3 << 12 | opcode
+
+    def encode(inst):
+        rs1 = RS1.get(inst[2])
+        if rs1 is not None:
+            imm = _parse_immediate(inst[3])
+        else:
+            rs1 = RS1[inst[3]]
+            imm = _parse_immediate(inst[2])
+        return fields | (imm >> 5 & 0x7F) << 25 | RS2[inst[1]] | rs1 | (imm & 0x1F) << 7
+
+    return encode
+
+
+def _encoder_u(opcode, funct3, funct7):
+    """
+    Builds the encoder of a U-Type instruction.
 
     # U-Type
     # imm[31:12]     rd     opcode
@@ -244,184 +287,374 @@ def _encode_u(inst, mnemonic):
     # opcode = 0110111 (0x37) -> lui
     # opcode = 0010111 (0x17) -> auipc
 
-    :param inst: A list of strings that represents the instruction and its operands
-    :type inst: list
-    :param mnemonic: The string containing the mnemonic of the instruction
-    :type mnemonic: str
-    :return: The encoded instruction in 32-bit format
-    :rtype: int
+    :param opcode: The opcode of the instruction
+    :type opcode: int
+    :param funct3: Not used
+    :type funct3: int
+    :param funct7: Not used
+    :type funct7: int
+    :return: Function encoding the parts of the instruction into 32-bit machine code
+    :rtype: function
     """
-    opcode = 0x37 if mnemonic == "lui" else 0x17
-    rd = registers[inst[1]]
-    if inst[2][0:2] in ["0x", "0X"]:
-        imm = int(inst[2][2:], 16)
-    elif inst[2][0:2] in ["0b", "0B"]:
-        imm = int(inst[2][2:], 2)
-    else:
-        imm = int(inst[2])
-    encoded_instruction = 0
-    encoded_instruction |= imm << (32 - 20)
-    encoded_instruction |= rd << (32 - 20 - 5)
-    encoded_instruction |= opcode
-    encoded_instruction = mask_bits(encoded_instruction, 0, 31)
-    return encoded_instruction
 
+    def encode(inst):
+        return (_parse_immediate(inst[2]) << 12 | RD[inst[1]] | opcode) & MASK_32
+
+    return encode
 
-def _encode_sb(inst, mnemonic):
+
+def _encoder_sb(opcode, funct3, funct7):
     """
-    Encode SB-Type instruction into 32-bit machine code.
+    Builds the encoder of an SB-Type instruction.
 
     # SB-Type
     # imm[12]   imm[10:5]   rs2     rs1     funct3      imm[4:1]    imm[11]     opcode
     #   (1)        (6)      (5)     (5)       (3)          (4)        (1)         (7)
     # opcode = 1100011 (0x63)
 
-    :param inst: A list of strings that represents the instruction and its operands
-    :type inst: list
-    :param mnemonic: The string containing the mnemonic of the instruction
-    :type mnemonic: str
-    :return: The encoded instruction in 32-bit format
-    :rtype: int
+    :param opcode: The opcode of the instruction
+    :type opcode: int
+    :param funct3: The funct3 field of the instruction
+    :type funct3: int
+    :param funct7: Not used
+    :type funct7: int
+    :return: Function encoding the parts of the instruction into 32-bit machine code
+    :rtype: function
+    """
+    fields = funct3 << 12 | opcode
+
+    def encode(inst):
+        imm = _parse_immediate(inst[3])
+        if imm & 0x800:
+            # Bit 11 is the sign of the offset for the immediate generator
+            imm |= 0x1000
+        return (
+            fields
+            | (imm >> 12 & 0x1) << 31
+            | (imm >> 5 & 0x3F) << 25
+            | RS2[inst[2]]
+            | RS1[inst[1]]
+            | (imm >> 1 & 0xF) << 8
+            | (imm >> 11 & 0x1) << 7
+        )
+
+    return encode
+
+
+def _encoder_uj(opcode, funct3, funct7):
     """
-    opcode = 0x63
-    rs1 = registers[inst[1]]
-    rs2 = registers[inst[2]]
-    if inst[3][0:2] in ["0x", "0X"]:
-        imm = int(inst[3][2:], 16)
-    elif inst[3][0:2] in ["0b", "0B"]:
-        imm = int(inst[3][2:], 2)
-    else:
-        imm = int(inst[3])
-    imm = sign_extend(imm, 13)
-    funct3 = f3[mnemonic]
-    encoded_instruction = 0
-    encoded_instruction |= (mask_bits(imm, 12, 12)) << (32 - 1)
-    encoded_instruction |= (mask_bits(imm, 5, 10)) << (32 - 1 - 6)
-    encoded_instruction |= rs2 << (32 - 1 - 6 - 5)
-    encoded_instruction |= rs1 << (32 - 1 - 6 - 5 - 5)
-    encoded_instruction |= funct3 << (32 - 1 - 6 - 5 - 5 - 3)
-    encoded_instruction |= (mask_bits(imm, 1, 4)) << (32 - 1 - 6 - 5 - 5 - 3 - 4)
-    encoded_instruction |= (mask_bits(imm, 11, 11)) << (32 - 1 - 6 - 5 - 5 - 3 - 4 - 1)
-    encoded_instruction |= opcode
-    encoded_instruction = mask_bits(encoded_instruction, 0, 31)
-    return encoded_instruction
-
-
-def _encode_uj(inst, mnemonic):
-    """
-    Encode UJ-Type instruction into 32-bit machine code.
+    Builds the encoder of a UJ-Type instruction.
 
     # UJ-Type
     # imm[20]   imm[10:1]   imm[11]     imm[19:12]    rd      opcode
     #   (1)        (10)       (1)           (8)       (5)       (7)
     # opcode = 1101111 (0x6F) -> jal
 
-    :param inst: A list of strings that represents the instruction and its operands
-    :type inst: list
-    :param mnemonic: The string containing the mnemonic of the instruction
-    :type mnemonic: str
-    :return: The encoded instruction in 32-bit format
-    :rtype: int
+    :param opcode: The opcode of the instruction
+    :type opcode: int
+    :param funct3: Not used
+    :type funct3: int
+    :param funct7: Not used
+    :type funct7: int
+    :return: Function encoding the parts of the instruction into 32-bit machine code
+    :rtype: function
     """
-    # TODO: Mnemonic unused, refactor!
+
     # TODO: Add option to write 'jal offset' meaning 'jal ra, offset'
-    opcode = 0x6F
-    rd = registers[inst[1]]
-    if inst[2][0:2] in ["0x", "0X"]:
-        imm = int(inst[2][2:], 16)
-    elif inst[2][0:2] in ["0b", "0B"]:
-        imm = int(inst[2][2:], 2)
-    else:
-        imm = int(inst[2])
-    imm = sign_extend(imm, 21)
-    encoded_instruction = 0
-    encoded_instruction |= (mask_bits(imm, 20, 20)) << (32 - 1)
-    encoded_instruction |= (mask_bits(imm, 1, 10)) << (32 - 1 - 10)
-    encoded_instruction |= (mask_bits(imm, 11, 11)) << (32 - 1 - 10 - 1)
-    encoded_instruction |= (mask_bits(imm, 12, 19)) << (32 - 1 - 10 - 1 - 8)
-    encoded_instruction |= rd << (32 - 1 - 10 - 1 - 8 - 5)
-    encoded_instruction |= opcode
-    encoded_instruction = mask_bits(encoded_instruction, 0, 31)
-    return encoded_instruction
-
-
-def _encode_pseudo(inst, mnemonic):
-    if mnemonic == "nop":
-        return _encode_i(["addi", "x0", "x0", "0"], "addi")
-    elif mnemonic == "li":
-        rd = inst[1]
-        imm = inst[2]
-        return _encode_i(["addi", rd, "x0", imm], "addi")
-    elif mnemonic == "mv":
-        rd = inst[1]
-        rs = inst[2]
-        return _encode_i(["addi", rd, rs, "0"], "addi")
-    elif mnemonic == "not":
-        rd = inst[1]
-        rs = inst[2]
-        return _encode_i(["xori", rd, rs, "-1"], "xori")
-    elif mnemonic == "neg":
-        rd = inst[1]
-        rs = inst[2]
-        return _encode_r(["sub", rd, "x0", rs], "sub")
-    elif mnemonic == "beqz":
-        rs = inst[1]
-        offset = inst[2]
-        return _encode_sb(["beq", rs, "x0", offset], "beq")
-    elif mnemonic == "bnez":
-        rs = inst[1]
-        offset = inst[2]
-        return _encode_sb(["bne", rs, "x0", offset], "bne")
-    elif mnemonic == "j":
-        offset = inst[1]
-        return _encode_uj(["jal", "x0", offset], "jal")
-    elif mnemonic == "jr":
-        rs = inst[1]
-        return _encode_i(["jalr", "x0", rs, "0"], "jalr")
-    elif mnemonic == "ret":
-        return _encode_i(["jalr", "x0", "x1", "0"], "jalr")
-    else:
-        raise ValueError(f"Invalid mnemonic ({mnemonic})!")
-
-
-def encode_instruction(instruction):
-    """
-    Encode a RISC-V Assembly instruction into 32-bit machine code based on its type.
+    def encode(inst):
+        imm = _parse_immediate(inst[2])
+        if imm & 0x800:
+            # Bit 11 is the sign of the offset for the immediate generator
+            imm |= 0x1FF000
+        return (
+            (imm >> 20 & 0x1) << 31
+            | (imm >> 1 & 0x3FF) << 21
+            | (imm >> 11 & 0x1) << 20
+            | (imm >> 12 & 0xFF) << 12
+            | RD[inst[1]]
+            | opcode
+        )
+
+    return encode
+
+
+def _encoder_system(opcode, funct3, funct7):
+    """
+    Builds the encoder of a system instruction (ecall or ebreak), which has no operands.
+
+    # System
+    # funct12     rs1     funct3      rd      opcode
+    #  (12)       (5)       (3)       (5)       (7)
+    # opcode = 1110011 (0x73), funct12 = 0 -> ecall, 1 -> ebreak
+
+    :param opcode: The opcode of the instruction
+    :type opcode: int
+    :param funct3: Not used
+    :type funct3: int
+    :param funct7: The funct12 field of the instruction
+    :type funct7: int
+    :return: Function encoding the instruction into 32-bit machine code
+    :rtype: function
+    """
+    encoded = funct7 << 20 | opcode
+
+    def encode(inst):
+        return encoded
+
+    return encode
+
+
+def _encoder_pseudo(translate):
+    """
+    Builds the encoder of a pseudo-instruction, translating it into its base instruction.
+
+    :param translate: Function returning the base mnemonic and the parts of the base instruction
+    :type translate: function
+    :return: Function encoding the parts of the instruction into 32-bit machine code
+    :rtype: function
+    """
+
+    def encode(inst):
+        base, parts = translate(inst)
+        return MNEMONICS[base].encoder(parts)
+
+    return encode
+
+
+def _mnemonic(instruction_type, opcode, funct3, funct7, encoder):
+    return Mnemonic(instruction_type, opcode, funct3, funct7, encoder(opcode, funct3, funct7))
+
+
+# Pseudo-instruction -> function returning the base mnemonic and the parts of the base instruction
+PSEUDO_INSTRUCTIONS = {
+    "nop": lambda inst: ("addi", ["addi", "x0", "x0", "0"]),
+    "li": lambda inst: ("addi", ["addi", inst[1], "x0", inst[2]]),
+    "mv": lambda inst: ("addi", ["addi", inst[1], inst[2], "0"]),
+    "not": lambda inst: ("xori", ["xori", inst[1], inst[2], "-1"]),
+    "neg": lambda inst: ("sub", ["sub", inst[1], "x0", inst[2]]),
+    "beqz": lambda inst: ("beq", ["beq", inst[1], "x0", inst[2]]),
+    "bnez": lambda inst: ("bne", ["bne", inst[1], "x0", inst[2]]),
+    "j": lambda inst: ("jal", ["jal", "x0", inst[1]]),
+    "jr": lambda inst: ("jalr", ["jalr", "x0", inst[1], "0"]),
+    "ret": lambda inst: ("jalr", ["jalr", "x0", "x1", "0"]),
+}
+
+# Mnemonic -> type, opcode, funct3, funct7 and encoder, built once
+MNEMONICS = {
+    **{
+        mnemonic: _mnemonic(
+            InstructionType.R, 0x33, f3[mnemonic], 0x20 if mnemonic in ("sub", "sra") else 0x0, _encoder_r
+        )
+        for mnemonic in ("add", "and", "or", "slt", "sltu", "sll", "srl", "sra", "sub", "xor")
+    },
+    **{
+        mnemonic: _mnemonic(
+            InstructionType.I,
+            0x67 if mnemonic == "jalr" else 0x03 if mnemonic in ("lb", "lh", "lw", "lbu", "lhu") else 0x13,
+            f3[mnemonic],
+            0x20 if mnemonic == "srai" else 0x0,
+            _encoder_i,
+        )
+        for mnemonic in (
+            "addi", "andi", "jalr", "lb", "lbu", "lhu", "lh", "lw", "ori", "slti", "sltiu", "slli", "srai", "srli",
+            "xori",
+        )
+    },
+    **{mnemonic: _mnemonic(InstructionType.S, 0x23, f3[mnemonic], 0x0, _encoder_s) for mnemonic in ("sb", "sh", "sw")},
+    "lui": _mnemonic(InstructionType.U, 0x37, 0x0, 0x0, _encoder_u),
+    "auipc": _mnemonic(InstructionType.U, 0x17, 0x0, 0x0, _encoder_u),
+    **{
+        mnemonic: _mnemonic(InstructionType.SB, 0x63, f3[mnemonic], 0x0, _encoder_sb)
+        for mnemonic in ("beq", "bge", "bgeu", "blt", "bltu", "bne")
+    },
+    "jal": _mnemonic(InstructionType.UJ, 0x6F, 0x0, 0x0, _encoder_uj),
+    # funct12 of the system instructions in the funct7 field
+    "ecall": _mnemonic(InstructionType.SYSTEM, 0x73, 0x0, 0x0, _encoder_system),
+    "ebreak": _mnemonic(InstructionType.SYSTEM, 0x73, 0x0, 0x1, _encoder_system),
+    **{
+        mnemonic: Mnemonic(InstructionType.PSEUDO, 0x0, 0x0, 0x0, _encoder_pseudo(translate))
+        for mnemonic, translate in PSEUDO_INSTRUCTIONS.items()
+    },
+}
+
+# Mnemonic -> encoder, position of the first part after the operands (which must be a comment) and position of the
+# branch/jump target (0 if the instruction has none), so an instruction needs a single lookup
+ENCODERS = {
+    operation: (
+        mnemonic.encoder,
+        1 if mnemonic.type is InstructionType.SYSTEM
+        else 3 if mnemonic.type in (InstructionType.U, InstructionType.UJ, InstructionType.PSEUDO)
+        else 4,
+        TARGET_OPERANDS.get(operation, 0),
+    )
+    for operation, mnemonic in MNEMONICS.items()
+}
+
+
+def encode_instruction(instruction, address=0, symbols=None):
+    """
+    Encode a RISC-V Assembly instruction into 32-bit machine code based on its type. The target of a branch or jump
+    can be a label of the symbol table, which is replaced by its offset from the address of the instruction.
+
+    The parts of the instruction are separated by spaces, tabs, commas and parentheses, and the mnemonic selects the
+    encoder of ENCODERS, which has the fixed fields of the instruction built in.
 
     :param instruction: The Assembly instruction to be encoded into machine code
     :type instruction: str
+    :param address: The address of the instruction (default: 0)
+    :type address: int, optional
+    :param symbols: The symbol table, the address of each label keyed on its name (default: None, no labels)
+    :type symbols: dict, optional
     :return: The encoded instruction
     :rtype: int
-    :raises: ValueError if the type of instruction is not valid for RV32I
+    :raises: ValueError if the type of instruction is not valid for RV32I or a label is not defined or out of range
     """
-    instruction = get_instruction_parts(instruction)
-    inst_type, inst_operation = get_type(instruction)
+    if "(" in instruction:
+        instruction = instruction.replace("(", " ").replace(")", " ")
+    parts = instruction.replace(",", " ").split()
+    entry = ENCODERS.get(parts[0])
+    if entry is None:
+        entry = ENCODERS.get(parts[0].lower())
+        if entry is None:
+            raise ValueError("Invalid instruction!")
+    encoder, comment, target = entry
     # TODO: Refactor | To get comments working in pseudoinstructions, maybe call this function again after
     #  'translating' it
-    if inst_type in [
-        InstructionType.R,
-        InstructionType.I,
-        InstructionType.S,
-        InstructionType.SB,
-    ]:
-        if len(instruction) > 4 and instruction[4][0] != "#":
-            raise ValueError("Comments should start with the # sign!")
-    else:
-        if len(instruction) > 3 and instruction[3][0] != "#":
-            raise ValueError("Comments should start with the # sign!")
-    if inst_type == InstructionType.R:
-        return _encode_r(instruction, inst_operation)
-    elif inst_type == InstructionType.I:
-        return _encode_i(instruction, inst_operation)
-    elif inst_type == InstructionType.S:
-        return _encode_s(instruction, inst_operation)
-    elif inst_type == InstructionType.U:
-        return _encode_u(instruction, inst_operation)
-    elif inst_type == InstructionType.SB:
-        return _encode_sb(instruction, inst_operation)
-    elif inst_type == InstructionType.UJ:
-        return _encode_uj(instruction, inst_operation)
-    elif inst_type == InstructionType.PSEUDO:
-        return _encode_pseudo(instruction, inst_operation)
-    else:
-        raise ValueError(f"Invalid type of instruction ({inst_type})!")
+    if len(parts) > comment and parts[comment][0] != "#":
+        raise ValueError("Comments should start with the # sign!")
+    if target and symbols is not None and target < len(parts):
+        parts[target] = _resolve_target(parts[target], address, symbols)
+    return encoder(parts)
+
+
+def _resolve_target(target, address, symbols):
+    """
+    Replaces a label used as a branch/jump target by its offset from the address of the instruction.
+
+    :param target: The target operand (a label or a numeric offset)
+    :type target: str
+    :param address: The address of the instruction
+    :type address: int
+    :param symbols: The symbol table
+    :type symbols: dict
+    :return: The numeric offset
+    :rtype: str
+    :raises: ValueError if the target is a label that is not defined or too far from the instruction
+    """
+    label_address = symbols.get(target)
+    if label_address is not None:
+        offset = label_address - address
+        if offset not in LABEL_OFFSETS:
+            raise ValueError(f"Label out of range ({target}, offset {offset})!")
+        return str(offset)
+    # numeric offsets are returned without matching the pattern of the labels
+    if target[0] not in "+-0123456789" and LABEL.fullmatch(target):
+        raise ValueError(f"Undefined label ({target})!")
+    return target
+
+
+def strip_labels(asm_instructions, symbols=None):
+    """
+    First pass of the assembler as a generator: yields the instructions without the label definitions, adding each
+    label to the symbol table with the address of the instruction following it. The instructions are read one at a
+    time, so they can come from a stream of any size.
+
+    :param asm_instructions: Assembly instructions (a label can be alone in a line or before an instruction)
+    :type asm_instructions: iterable
+    :param symbols: The symbol table to be filled (default: None, the labels are only removed)
+    :type symbols: dict, optional
+    :return: The instructions without labels
+    :rtype: generator
+    :raises: ValueError if a label is defined twice
+    """
+    address = 0
+    for line in asm_instructions:
+        match = LABEL_DEFINITION.match(line)
+        if match is not None:
+            label, line = match.groups()
+            if symbols is not None:
+                if label in symbols:
+                    raise ValueError(f"Label ({label}) defined more than once!")
+                symbols[label] = address
+            if not line or line[0] == "#":
+                continue
+        yield line
+        address += 4
+
+
+def get_symbol_table(asm_instructions):
+    """
+    First pass of the assembler: removes the label definitions from the instructions, giving each label the address
+    of the instruction following it.
+
+    :param asm_instructions: Tuple of Assembly instructions (a label can be alone in a line or before an instruction)
+    :type asm_instructions: tuple
+    :return: The symbol table and the instructions without labels
+    :rtype: tuple
+    :raises: ValueError if a label is defined twice
+    """
+    symbols = {}
+    instructions = list(strip_labels(asm_instructions, symbols))
+    return symbols, instructions
+
+
+def encode_stream(asm_instructions, symbols):
+    """
+    Second pass of the assembler as a generator: yields the encoded instructions one at a time. The symbol table
+    must already be complete (see strip_labels()) for labels defined after the instructions using them.
+
+    :param asm_instructions: Assembly instructions, with or without label definitions
+    :type asm_instructions: iterable
+    :param symbols: The symbol table of the whole program
+    :type symbols: dict
+    :return: The encoded instructions
+    :rtype: generator
+    :raises: ValueError if an instruction is not valid or a label is not defined or out of range
+    """
+    for address, instruction in enumerate(strip_labels(asm_instructions)):
+        yield encode_instruction(instruction, 4 * address, symbols)
+
+
+def assemble(asm_instructions, workers=1, chunk_size=4096):
+    """
+    Two-pass assembler: builds the symbol table (see get_symbol_table()) and then encodes the instructions, resolving
+    the labels used as branch/jump targets.
+
+    With more than one worker, the second pass is split into chunks of consecutive instructions encoded in parallel
+    by a pool of processes, and the chunks are merged in order. The symbol table of the whole program is built
+    before the split and sent once to each process, so labels defined in other chunks are resolved as usual.
+
+    :param asm_instructions: Tuple of Assembly instructions
+    :type asm_instructions: tuple
+    :param workers: Number of processes encoding the instructions, None for one per CPU (default: 1, no processes)
+    :type workers: int, optional
+    :param chunk_size: Number of instructions encoded by a process at a time (default: 4096)
+    :type chunk_size: int, optional
+    :return: The encoded instructions and the symbol table
+    :rtype: AssembledProgram
+    """
+    symbols, instructions = get_symbol_table(asm_instructions)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1 or len(instructions) <= chunk_size:
+        return AssembledProgram(_encode_chunk((0, instructions), symbols), symbols)
+    chunks = [(start, instructions[start:start + chunk_size]) for start in range(0, len(instructions), chunk_size)]
+    with ProcessPoolExecutor(min(workers, len(chunks)), initializer=_set_chunk_symbols, initargs=(symbols,)) as pool:
+        encoded = [instruction for chunk in pool.map(_encode_chunk, chunks) for instruction in chunk]
+    return AssembledProgram(encoded, symbols)
+
+
+# Symbol table used by _encode_chunk() in the processes of the pool of assemble()
+_chunk_symbols = {}
+
+
+def _set_chunk_symbols(symbols):
+    global _chunk_symbols
+    _chunk_symbols = symbols
+
+
+def _encode_chunk(chunk, symbols=None):
+    start, instructions = chunk
+    if symbols is None:
+        symbols = _chunk_symbols
+    return [encode_instruction(instruction, 4 * (start + i), symbols) for i, instruction in enumerate(instructions)]
@@ -1,17 +1,27 @@
-from utils.encode_instruction import encode_instruction
-from utils.get_instructions_asm_file import get_instructions_asm_file
+from utils.binary_program import write_binary_program
+from utils.encode_instruction import assemble, encode_stream, strip_labels
+from utils.get_instructions_asm_file import (
+    get_instructions_asm_file,
+    get_instructions_asm_text,
+    iter_instructions_asm_file,
+)
+
+# Version of the assembler, part of the key of the assembly cache. Increment it whenever the encoding of any
+# instruction changes, so programs assembled by an older version are not reused.
+ASSEMBLER_VERSION = 2
 
 
 def encode_instructions(asm_instructions):
     """
-    Encodes a list of RISC-V Assembly instructions into their binary representation.
+    Encodes a list of RISC-V Assembly instructions into their binary representation (labels are resolved, see
+    utils.encode_instruction.assemble()).
 
     :param asm_instructions: Tuple of Assembly instructions
     :type asm_instructions: tuple
     :return: List of encoded instructions
     :rtype: list
     """
-    return list(map(encode_instruction, asm_instructions))
+    return assemble(asm_instructions).instructions
 
 
 def encode_instructions_from_file(file):
@@ -27,6 +37,86 @@ def encode_instructions_from_file(file):
     return encode_instructions(asm_instructions)
 
 
+def encode_instructions_from_text(text):
+    """
+    Encodes Assembly instructions given as a string into their binary representation, without any file.
+
+    :param text: The Assembly source
+    :type text: str
+    :return: List of encoded instructions
+    :rtype: list
+    """
+    return encode_instructions(get_instructions_asm_text(text))
+
+
+def assemble_file(file, workers=1):
+    """
+    Assembles the instructions of a file, keeping the symbol table.
+
+    :param file: The file containing the Assembly instructions
+    :type file: file
+    :param workers: Number of processes encoding the instructions (see utils.encode_instruction.assemble())
+    :type workers: int, optional
+    :return: The encoded instructions and the symbol table
+    :rtype: AssembledProgram
+    """
+    return assemble(get_instructions_asm_file(file), workers)
+
+
+def assemble_text(text, workers=1):
+    """
+    Assembles Assembly instructions given as a string, keeping the symbol table.
+
+    :param text: The Assembly source
+    :type text: str
+    :param workers: Number of processes encoding the instructions (see utils.encode_instruction.assemble())
+    :type workers: int, optional
+    :return: The encoded instructions and the symbol table
+    :rtype: AssembledProgram
+    """
+    return assemble(get_instructions_asm_text(text), workers)
+
+
+def stream_assemble_file(file, symbols=None):
+    """
+    Assembles the instructions of a file as a stream: the file is read line by line twice (the first pass builds the
+    symbol table, the second encodes) and the encoded instructions are yielded one at a time. Only the symbol table
+    is kept in memory, whatever the size of the source. Errors are raised when the instruction is reached.
+
+    :param file: The file containing the Assembly instructions
+    :type file: str
+    :param symbols: Dictionary filled with the symbol table of the file (default: None, a new one)
+    :type symbols: dict, optional
+    :return: The encoded instructions
+    :rtype: generator
+    :raises: ValueError if an instruction is not valid or a label is defined twice or not defined
+    """
+    if symbols is None:
+        symbols = {}
+    for _ in strip_labels(iter_instructions_asm_file(file), symbols):
+        pass
+    yield from encode_stream(iter_instructions_asm_file(file), symbols)
+
+
+def stream_assemble_file_to_binary(file, binary_file, load_address=None, entry=None):
+    """
+    Assembles an Assembly file into a binary program (see utils.binary_program), streaming the encoded instructions
+    straight to the binary file in bounded memory (see stream_assemble_file()).
+
+    :param file: The file containing the Assembly instructions
+    :type file: str
+    :param binary_file: path of the binary file
+    :type binary_file: str
+    :param load_address: address of the first instruction, written in the header (default: None, no header)
+    :type load_address: int, optional
+    :param entry: address of the first instruction to be executed, written in the header (default: None)
+    :type entry: int, optional
+    :return: number of instructions written
+    :rtype: int
+    """
+    return write_binary_program(binary_file, stream_assemble_file(file), load_address, entry)
+
+
 def print_encoded_instructions(encoded_instructions, representation):
     """
     Prints the encoded binary instructions in the specified representation.
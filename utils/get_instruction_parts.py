@@ -1,5 +1,8 @@
 import re
 
+# Parts of an instruction: everything between the separators (parenthesis, spaces, tabs and commas)
+INSTRUCTION_PARTS = re.compile(r"[^(.*?) ,\t]+")
+
 
 def get_instruction_parts(instruction):
     """
@@ -11,4 +14,4 @@ def get_instruction_parts(instruction):
     :return: The instruction divided into parts
     :rtype: list
     """
-    return [_ for _ in re.split("[(.*?) ,]", instruction) if _]
+    return INSTRUCTION_PARTS.findall(instruction)
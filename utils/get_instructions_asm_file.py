@@ -1,3 +1,6 @@
+import io
+
+
 def get_instructions_asm_file(file):
     """
     This function reads the assembly code from a file and stores each instruction as an element of a list.
@@ -8,16 +11,65 @@ def get_instructions_asm_file(file):
     :rtype: tuple
     :raises: FileNotFoundError if the file does not exist
     """
-    instructions = []
     try:
         f = open(file, "r")
     except FileNotFoundError:
         raise FileNotFoundError("File not found")
     else:
         with f:
-            for line in f:
-                # Allow one-line comments and ignore blank lines
-                if line != "\n" and line[0] != "#":
-                    # Remove the newlines
-                    instructions.append(line.rstrip())
-    return tuple(instructions)
+            return get_instructions_asm_lines(f)
+
+
+def get_instructions_asm_text(text):
+    """
+    This function splits assembly code given as a string and stores each instruction as an element of a list.
+
+    :param text: The Assembly source
+    :type text: str
+    :return: A tuple containing the instructions of the source
+    :rtype: tuple
+    """
+    return get_instructions_asm_lines(io.StringIO(text, newline=None))
+
+
+def get_instructions_asm_lines(lines):
+    """
+    This function filters lines of assembly code, keeping the instructions.
+
+    :param lines: The lines of the Assembly source (with their newlines)
+    :type lines: iterable
+    :return: A tuple containing the instructions
+    :rtype: tuple
+    """
+    return tuple(iter_instructions_asm_lines(lines))
+
+
+def iter_instructions_asm_lines(lines):
+    """
+    This function filters lines of assembly code as a generator, yielding the instructions one at a time.
+
+    :param lines: The lines of the Assembly source (with their newlines)
+    :type lines: iterable
+    :return: The instructions
+    :rtype: generator
+    """
+    for line in lines:
+        # Allow one-line comments and ignore blank lines
+        if line != "\n" and line[0] != "#":
+            # Remove the newlines
+            yield line.rstrip()
+
+
+def iter_instructions_asm_file(file):
+    """
+    This function reads the assembly code from a file lazily, yielding each instruction as it is read, so the file
+    is never entirely in memory.
+
+    :param file: The file containing the Assembly instructions
+    :type file: str
+    :return: The instructions of the file
+    :rtype: generator
+    :raises: FileNotFoundError if the file does not exist
+    """
+    with open(file, "r") as f:
+        yield from iter_instructions_asm_lines(f)
@@ -1,3 +1,5 @@
+import os
+
 from utils.encode_instructions import encode_instructions
 from utils.get_instructions_asm_file import get_instructions_asm_file
 
@@ -18,18 +20,31 @@ def write_file(info, file):
             f.write(str(item) + "\n")
 
 
-def write_file_encoded_instructions(file):
+def get_encoded_instructions_file_name(file):
+    """
+    Returns the name of the file with the encoded instructions of an assembly file (the path without the extension).
+
+    :param file: Assembly file path.
+    :type file: str
+    :return: Name of the file with the encoded instructions.
+    :rtype: str
+    """
+    return os.path.splitext(file)[0]
+
+
+def write_file_encoded_instructions(file, code=None):
     """
     Generates a file with the encoded instructions from an assembly file.
 
     :param file: Assembly file path.
     :type file: str
+    :param code: The instructions already encoded (default: the assembly file is encoded).
+    :type code: list, optional
     :return: Name of the generated file with the encoded instructions.
     :rtype: str
     """
-    file_name = file
-    new_file = file_name.split(".")[0]
-    asm = get_instructions_asm_file(file)
-    code = encode_instructions(asm)
+    new_file = get_encoded_instructions_file_name(file)
+    if code is None:
+        code = encode_instructions(get_instructions_asm_file(file))
     write_file(code, new_file)
     return new_file